@@ -2,17 +2,38 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-from flask import send_from_directory, send_file
+from flask import abort, Response
 import socket
 import joblib
 import pandas as pd
 import numpy as np
 import pickle
-from datetime import datetime
+from datetime import datetime, timedelta
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import json
 import traceback
+from config.db_router import DatabaseRouter
+from config.exporter import EXPORT_COLUMNS, PARQUET_MIME, pa, stream_parquet
+from config.incidents import IncidentAggregator
+from config.migrations import run_migrations
+from config.partition_manager import PartitionManager
+from config.sampling import SamplingPolicy
+from config.stats_buffer import StatsBuffer
+from config.storage import PredictionStore, SQLiteStorage
+from utils.batch_codec import BatchDecodeError, decode_batch
+from utils.batch_jobs import FINISHED as JOB_FINISHED, BatchJobManager, JobNotFound, JobQueueFull
+from utils.categories import load_categorizer
+from utils.encoders import NumpyJSONProvider, negotiate
+from utils.drift import DriftMonitor
+from utils.heavy_hitters import TopTalkers
+from utils.response_cache import DataVersion, ResponseCache
+from utils.rule_engine import HotRuleTable
+from utils.scoring import ScoringPipeline, attack_types, decide_attack, risk_levels
+from utils.shadow_scoring import ShadowScorer, load_shadow_models
+from utils.static_assets import StaticAssetIndex
+from utils.streaming import json_array_body, ndjson_body, primed, wants_ndjson
 
 # ============ SETUP ============
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -49,6 +70,8 @@ else:
     print("❌ Static folder not found!")
 
 app = Flask(__name__)
+# jsonify() through orjson when installed; NumPy values are accepted as they are
+app.json = NumpyJSONProvider(app)
 
 # ============ CORS ============
 CORS(app)
@@ -62,22 +85,70 @@ MYSQL_CONFIG = {
     'port': 3306
 }
 
-class SimpleDatabase:
+# Optional read replica for dashboard queries; see config/db_router.py.
+# Reads stay on MYSQL_CONFIG unless NIDS_REPLICA_HOST is set.
+REPLICA_CONFIG = dict(MYSQL_CONFIG,
+                      host=os.getenv('NIDS_REPLICA_HOST', ''),
+                      port=int(os.getenv('NIDS_REPLICA_PORT', 3306)))
+ROUTER_CONFIG = {
+    'read_pool_size': int(os.getenv('NIDS_READ_POOL_SIZE', 4)),
+    'max_lag': float(os.getenv('NIDS_REPLICA_MAX_LAG', 5.0)),
+    'check_interval': float(os.getenv('NIDS_REPLICA_CHECK_INTERVAL', 2.0)),
+    # Test mode only: accept a standalone server (no replication source) as the replica
+    'allow_standalone': os.getenv('NIDS_REPLICA_ALLOW_STANDALONE', '0') == '1'
+}
+WROTE_AT_COOKIE = 'nids_wrote_at'
+WROTE_AT_HEADER = 'X-NIDS-Wrote-At'
+
+class SimpleDatabase(PredictionStore):
     """Simple MySQL database handler"""
     
-    def __init__(self):
+    def __init__(self, pool_size=0, router=None):
         self.config = MYSQL_CONFIG
+        self.pool = None
+        self.router = router
+        if pool_size and not router:
+            self._init_pool(pool_size)
         self._init_database()
     
+    def _init_pool(self, pool_size):
+        """Create a connection pool for this process"""
+        try:
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name=f'nids_simple_{os.getpid()}',
+                pool_size=pool_size,
+                **self.config
+            )
+            print(f"✅ Database connection pool ready ({pool_size} connections)")
+        except Error as e:
+            print(f"⚠ Connection pool unavailable, using direct connections: {e}")
+    
     def get_connection(self):
         """Get MySQL connection"""
         try:
+            if self.router:
+                return self.router.writer()
+            if self.pool:
+                try:
+                    return self.pool.get_connection()
+                except PoolError:
+                    pass  # Pool exhausted, fall back to a direct connection
             conn = mysql.connector.connect(**self.config)
             return conn
         except Error as e:
             print(f"❌ Database Connection Error: {e}")
             return None
     
+    def get_read_connection(self):
+        """Replica connection for dashboard reads, routed by config/db_router.py"""
+        if not self.router:
+            return self.get_connection()
+        try:
+            return self.router.reader()
+        except Error as e:
+            print(f"❌ Database Connection Error: {e}")
+            return None
+    
     def _init_database(self):
         """Initialize database tables"""
         conn = self.get_connection()
@@ -105,7 +176,8 @@ class SimpleDatabase:
                     srv_serror_rate DECIMAL(5,4),
                     is_attack BOOLEAN,
                     client_ip VARCHAR(45),
-                    raw_features TEXT
+                    raw_features TEXT,
+                    features_blob VARBINARY(255)
                 )
             ''')
             
@@ -124,183 +196,38 @@ class SimpleDatabase:
             conn.commit()
             print("✅ Database tables created successfully")
             
-        except Error as e:
-            print(f"⚠ Database setup error: {e}")
-        finally:
-            cursor.close()
-            conn.close()
-    
-    def save_prediction(self, prediction_data, features, client_ip):
-        """Save prediction to database"""
-        conn = self.get_connection()
-        if not conn:
-            print("❌ No database connection available")
-            return None
-        
-        cursor = conn.cursor()
-        try:
-            print(f"💾 Attempting to save prediction to database...")
-            
-            def convert_value(value):
-                """Convert numpy/pandas types to Python native types"""
-                if isinstance(value, (np.integer, np.floating)):
-                    return value.item()
-                elif isinstance(value, pd.Series):
-                    return value.iloc[0].item() if len(value) > 0 else 0
-                elif isinstance(value, pd.DataFrame):
-                    return value.iloc[0, 0].item() if value.shape[0] > 0 and value.shape[1] > 0 else 0
-                elif isinstance(value, np.ndarray):
-                    return value.item() if value.size > 0 else 0
-                else:
-                    return value
-            
-            # Convert values
-            prediction = int(convert_value(prediction_data.get('prediction', 0)))
-            prediction_label = str(prediction_data.get('prediction_label', 'Unknown'))
-            confidence = float(convert_value(prediction_data.get('confidence', 0)))
-            attack_prob = float(convert_value(prediction_data.get('probabilities', {}).get('attack', 0)))
-            normal_prob = float(convert_value(prediction_data.get('probabilities', {}).get('normal', 0)))
-            
-            # Convert features
-            src_bytes = int(convert_value(features.get('src_bytes', 0)))
-            dst_bytes = int(convert_value(features.get('dst_bytes', 0)))
-            count = int(convert_value(features.get('count', 0)))
-            srv_count = int(convert_value(features.get('srv_count', 0)))
-            serror_rate = float(convert_value(features.get('serror_rate', 0.0)))
-            srv_serror_rate = float(convert_value(features.get('srv_serror_rate', 0.0)))
-            is_attack = bool(prediction == 1)
-            client_ip = str(client_ip)
-            
-            # Features to JSON
-            features_json = json.dumps({k: convert_value(v) for k, v in features.items()})
-            
-            # Insert into predictions
-            cursor.execute('''
-                INSERT INTO predictions (
-                    prediction, prediction_label, confidence,
-                    attack_probability, normal_probability,
-                    src_bytes, dst_bytes, count, srv_count,
-                    serror_rate, srv_serror_rate,
-                    is_attack, client_ip, raw_features
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                prediction, prediction_label, confidence,
-                attack_prob, normal_prob, src_bytes, dst_bytes,
-                count, srv_count, serror_rate, srv_serror_rate,
-                is_attack, client_ip, features_json
-            ))
-            
-            prediction_id = cursor.lastrowid
-            
-            # Save to attacks table if it's an attack
-            if prediction == 1:
-                attack_type = self._determine_attack_type(features)
-                severity = self._determine_severity(attack_prob)
-                
-                cursor.execute('''
-                    INSERT INTO attacks (prediction_id, attack_type, severity)
-                    VALUES (%s, %s, %s)
-                ''', (prediction_id, attack_type, severity))
-            
-            conn.commit()
-            print(f"✅ Saved to database with ID: {prediction_id}")
-            return prediction_id
+            # Converge with the MySQLDatabase schema and add the query indexes
+            applied = run_migrations(conn)
+            if applied:
+                print(f"✅ Applied schema migrations: {applied}")
             
         except Error as e:
-            print(f"❌ Database save error: {e}")
-            import traceback
-            traceback.print_exc()
-            conn.rollback()
-            return None
-        except Exception as e:
-            print(f"❌ Unexpected error: {e}")
-            import traceback
-            traceback.print_exc()
-            conn.rollback()
-            return None
-        finally:
-            cursor.close()
-            conn.close()
-    
-    def _determine_attack_type(self, features):
-        """Determine type of attack"""
-        src_bytes = features.get('src_bytes', 0)
-        dst_bytes = features.get('dst_bytes', 0)
-        count = features.get('count', 0)
-        serror_rate = features.get('serror_rate', 0)
-        
-        if count > 500 and serror_rate == 1.0:
-            return "Extreme DoS Attack"
-        elif src_bytes > 50000 and dst_bytes == 0:
-            return "DoS Attack"
-        elif src_bytes > 100000:
-            return "DDoS Attack"
-        else:
-            return "Suspicious Activity"
-    
-    def _determine_severity(self, attack_prob):
-        """Determine attack severity"""
-        if attack_prob > 80:
-            return "CRITICAL"
-        elif attack_prob > 60:
-            return "HIGH"
-        elif attack_prob > 40:
-            return "MEDIUM"
-        else:
-            return "LOW"
-    
-    def get_statistics(self):
-        """Get prediction statistics"""
-        conn = self.get_connection()
-        if not conn:
-            return {}
-        
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute('SELECT COUNT(*) as total FROM predictions')
-            total = cursor.fetchone()['total']
-            
-            cursor.execute('SELECT COUNT(*) as attacks FROM predictions WHERE is_attack = 1')
-            attacks = cursor.fetchone()['attacks']
-            
-            cursor.execute('SELECT COUNT(*) as normal FROM predictions WHERE is_attack = 0')
-            normal = cursor.fetchone()['normal']
-            
-            return {
-                'total_predictions': total,
-                'attack_count': attacks,
-                'normal_count': normal,
-                'attack_rate': round((attacks / total * 100), 2) if total > 0 else 0
-            }
-        except Error as e:
-            print(f"⚠ Statistics error: {e}")
-            return {}
+            print(f"⚠ Database setup error: {e}")
         finally:
             cursor.close()
             conn.close()
 
-# Initialize database
-try:
-    db = SimpleDatabase()
-    print("✅ Database connected successfully")
-except Exception as e:
-    print(f"⚠ Database initialization failed: {e}")
-    db = None
-
 # ============ ML MODEL LOADING ============
 print("\n📊 Loading Machine Learning Model...")
+MODEL_DIR = os.path.join(BASE_DIR, 'models', 'improved_model')
+# A smaller forest exported by compress_model.py can be served in its place
+MODEL_FILE = os.getenv('NIDS_MODEL_FILE', 'rf_improved.pkl')
 try:
-    rf_model = joblib.load('models/improved_model/rf_improved.pkl')
-    scaler = joblib.load('models/improved_model/scaler_improved.pkl')
-    pca_model = joblib.load('models/improved_model/pca_improved.pkl')
+    rf_model = joblib.load(os.path.join(MODEL_DIR, MODEL_FILE))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler_improved.pkl'))
+    pca_model = joblib.load(os.path.join(MODEL_DIR, 'pca_improved.pkl'))
     
-    with open('models/improved_model/feature_columns.pkl', 'rb') as f:
+    with open(os.path.join(MODEL_DIR, 'feature_columns.pkl'), 'rb') as f:
         feature_columns = pickle.load(f)
     
-    with open('models/improved_model/feature_mapping.pkl', 'rb') as f:
+    with open(os.path.join(MODEL_DIR, 'feature_mapping.pkl'), 'rb') as f:
         feature_mapping = pickle.load(f)
     
-    print("✅ ML Model loaded successfully")
+    # Pre-fork workers each score on their own core, so per-request
+    # thread fan-out inside the forest only adds overhead there
+    rf_model.n_jobs = int(os.getenv('NIDS_MODEL_JOBS', rf_model.n_jobs))
+    
+    print(f"✅ ML Model loaded successfully ({MODEL_FILE}, {len(rf_model.estimators_)} trees)")
     
 except Exception as e:
     print(f"❌ Failed to load model: {e}")
@@ -316,121 +243,434 @@ NORM_FACTORS = {
     'dst_host_srv_serror_rate': 50.0
 }
 
-def normalize_value(feature_name, raw_value):
-    """Convert raw value to normalized z-score"""
-    if feature_name in NORM_FACTORS:
-        try:
-            raw_float = float(raw_value)
-            normalized = raw_float * NORM_FACTORS[feature_name]
-            return float(max(-5.0, min(5.0, normalized)))
-        except:
-            return 0.0
-    return 0.0
+REQUIRED_FEATURES = [
+    'duration', 'src_bytes', 'dst_bytes', 'count', 'srv_count',
+    'serror_rate', 'srv_serror_rate', 'dst_host_count',
+    'dst_host_srv_count', 'dst_host_serror_rate', 'dst_host_srv_serror_rate'
+]
 
-# ============ PREDICTION FUNCTION ============
-def predict_traffic(input_data):
-    """Predict if traffic is normal or attack"""
-    print("🔍 Running PREDICT_TRAFFIC function...")
-    sample = {feature: 0.0 for feature in feature_columns}
-    
-    defaults = {
-        'duration': 0.0, 'src_bytes': 0.0, 'dst_bytes': 0.0,
-        'count': 0.0, 'srv_count': 0.0, 'serror_rate': 0.0,
-        'srv_serror_rate': 0.0, 'dst_host_count': 0.0,
-        'dst_host_srv_count': 0.0, 'dst_host_serror_rate': 0.0,
-        'dst_host_srv_serror_rate': 0.0
+# ============ DETECTION RULES ============
+# Manual attack rules live in config/detection_rules.json and are reloaded
+# when the file changes. Rows matched by a rule skip model inference unless
+# NIDS_RULE_PROBABILITIES=model asks for model probabilities on every row
+# ('rule' or 'model'; anything else stops startup). Per request,
+# ?model_probabilities=1 computes them only for the rows of that request.
+RULES_CONFIG = {
+    'path': os.getenv('NIDS_RULES_PATH', os.path.join(BASE_DIR, 'config', 'detection_rules.json')),
+    'probabilities': os.getenv('NIDS_RULE_PROBABILITIES', 'rule')
+}
+
+try:
+    detection_rules = HotRuleTable(RULES_CONFIG['path'], REQUIRED_FEATURES)
+    print(f"✅ Detection rules loaded: {len(detection_rules.table.names)} rules")
+except Exception as e:
+    print(f"❌ Failed to load detection rules: {e}")
+    exit(1)
+
+# NIDS_FOREST_EVAL=early stops walking trees once a row's attack decision
+# can no longer change (utils/early_exit.py); probabilities are then
+# estimates within reported bounds. /api/predict/batch?exact=1 overrides it.
+FOREST_EVAL = os.getenv('NIDS_FOREST_EVAL', 'exact')
+
+# ============ ATTACK CATEGORIES ============
+# Every scored row gets an attack type, a category of the 4-class model in
+# models/trained_models/config.json and the category probabilities, in the
+# same pass as the binary decision; see utils/categories.py. NIDS_CATEGORY_MODEL
+# names a multiclass classifier over the served PCA inputs (a path, or a file
+# next to config.json); without one the signature table is used.
+CATEGORY_CONFIG = {
+    'model': os.getenv('NIDS_CATEGORY_MODEL', ''),
+    'config': os.path.join(BASE_DIR, 'models', 'trained_models', 'config.json')
+}
+
+try:
+    categorizer = load_categorizer(CATEGORY_CONFIG['model'], CATEGORY_CONFIG['config'], REQUIRED_FEATURES)
+except Exception as e:
+    print(f"⚠ Category model unavailable, using attack signatures: {e}")
+    categorizer = load_categorizer('', CATEGORY_CONFIG['config'], REQUIRED_FEATURES)
+print(f"✅ Attack categories: {', '.join(categorizer.categories)} ({type(categorizer).__name__})")
+
+pipeline = ScoringPipeline(
+    rf_model, scaler, pca_model, feature_columns, feature_mapping,
+    NORM_FACTORS, REQUIRED_FEATURES, detection_rules,
+    rule_probabilities=RULES_CONFIG['probabilities'],
+    forest_eval=FOREST_EVAL,
+    categorizer=categorizer
+)
+
+def wants_model_probabilities():
+    """?model_probabilities=1: also return the forest's own probabilities, rule-matched rows included"""
+    return request.args.get('model_probabilities', '').lower() in ('1', 'true', 'yes')
+
+def model_probability_fields(model_proba, i):
+    """Row i of BatchScore.model_probabilities() as a response field"""
+    return {'model_probabilities': {'normal': round(float(model_proba[i, 0]) * 100, 2),
+                                    'attack': round(float(model_proba[i, 1]) * 100, 2)}}
+
+def category_fields(result, i):
+    """Category of row i as responses and save_predictions take it (attack_type for attacks only)"""
+    fields = {
+        'category': str(result.categories.category[i]),
+        'category_probabilities': result.categories.probabilities(i)
     }
+    if result.prediction[i] == 1:
+        fields['attack_type'] = str(result.categories.attack_type[i])
+    return fields
+
+# ============ ATTRIBUTIONS ============
+# Attack predictions from /api/predict and /api/batch-predict carry the
+# contribution of each input feature to the forest's attack probability
+# (utils/attributions.py); NIDS_ATTRIBUTION_TOP keeps only the largest ones.
+# /api/predict/batch adds them as columns with ?explain=1.
+ATTRIBUTION_CONFIG = {
+    'enabled': os.getenv('NIDS_ATTRIBUTIONS', '1') == '1',
+    'top': int(os.getenv('NIDS_ATTRIBUTION_TOP', 0)) or None
+}
+
+# ============ SHADOW SCORING ============
+# NIDS_SHADOW_SAMPLE_RATE > 0 scores that share of live rows with the
+# NIDS_SHADOW_MODELS entries of utils/shadow_scoring.py off the request
+# path; the default distill10x8 forest shares the served preprocessing.
+SHADOW_CONFIG = {
+    'models': [name for name in os.getenv('NIDS_SHADOW_MODELS', 'distill10x8').split(',') if name],
+    'sample_rate': float(os.getenv('NIDS_SHADOW_SAMPLE_RATE', 0.0)),
+    'queue_size': int(os.getenv('NIDS_SHADOW_QUEUE_SIZE', 10000)),
+    'workers': int(os.getenv('NIDS_SHADOW_WORKERS', 1))
+}
+
+shadow_scorer = ShadowScorer(
+    load_shadow_models(SHADOW_CONFIG['models'], BASE_DIR, pipeline.transform) if SHADOW_CONFIG['sample_rate'] > 0 else [],
+    decide_attack,
+    sample_rate=SHADOW_CONFIG['sample_rate'],
+    queue_size=SHADOW_CONFIG['queue_size'],
+    workers=SHADOW_CONFIG['workers']
+)
+
+def submit_shadow(input_data, probabilities, prediction):
+    """Hand a scored row to the shadow pool (never blocks)"""
+    if shadow_scorer.workers:
+        raw_vector = np.array([input_data.get(f, 0.0) for f in REQUIRED_FEATURES], dtype=float)
+        shadow_scorer.submit(raw_vector, float(probabilities[1]), int(prediction))
+
+# ============ TOP TALKERS ============
+# Space-Saving summaries of the busiest sources, attack sources and attack
+# types, per window, in fixed memory; see utils/heavy_hitters.py. Each
+# worker process counts the requests it served.
+TOP_TALKERS_CONFIG = {
+    'capacity': int(os.getenv('NIDS_TOP_TALKERS_CAPACITY', 1000)),
+    'window_seconds': int(os.getenv('NIDS_TOP_TALKERS_WINDOW', 60)),
+    'windows': int(os.getenv('NIDS_TOP_TALKERS_WINDOWS', 60))
+}
+top_talkers = TopTalkers(**TOP_TALKERS_CONFIG)
+
+def record_talkers(client_ip, X, prediction):
+    """Count a scored batch (raw feature rows and 0/1 predictions) from one source"""
+    prediction = np.asarray(prediction)
+    attack_rows = np.asarray(X)[prediction == 1]
+    types = attack_types(attack_rows, REQUIRED_FEATURES) if len(attack_rows) else None
+    top_talkers.record(client_ip or 'unknown', prediction, types)
+
+# ============ DRIFT MONITOR ============
+# Histograms of the scored-normal rows over sliding windows: mean shift
+# from the training baseline in models/improved_model/normal_mean.pkl, and
+# PSI / KS against a reference histogram of the first rows seen; see
+# utils/drift.py and GET /api/drift.
+DRIFT_CONFIG = {
+    'enabled': os.getenv('NIDS_DRIFT', '1') == '1',
+    'population': os.getenv('NIDS_DRIFT_ROWS', 'normal'),
+    'reference': os.getenv('NIDS_DRIFT_REFERENCE', 'warmup'),
+    'reference_rows': int(os.getenv('NIDS_DRIFT_REFERENCE_ROWS', 10000)),
+    'window_seconds': int(os.getenv('NIDS_DRIFT_WINDOW', 60)),
+    'windows': int(os.getenv('NIDS_DRIFT_WINDOWS', 5)),
+    'psi_warn': float(os.getenv('NIDS_DRIFT_PSI_WARN', 0.1)),
+    'psi_alert': float(os.getenv('NIDS_DRIFT_PSI_ALERT', 0.25)),
+    'ks_alert': float(os.getenv('NIDS_DRIFT_KS_ALERT', 0.2)),
+    'shift_alert': float(os.getenv('NIDS_DRIFT_SHIFT_ALERT', 1.0)),
+    'min_rows': int(os.getenv('NIDS_DRIFT_MIN_ROWS', 500))
+}
+
+drift_monitor = None
+if DRIFT_CONFIG['enabled']:
+    try:
+        normal_mean = joblib.load(os.path.join(MODEL_DIR, 'normal_mean.pkl'))
+        drift_monitor = DriftMonitor(
+            REQUIRED_FEATURES,
+            [normal_mean[feature_mapping[f]] for f in REQUIRED_FEATURES],
+            pipeline.scaled_inputs,
+            **{k: v for k, v in DRIFT_CONFIG.items() if k != 'enabled'}
+        )
+    except Exception as e:
+        print(f"⚠ Drift monitor disabled: {e}")
+
+def record_scored(client_ip, X, prediction):
+    """Feed a scored batch to the top-talker and drift monitors"""
+    record_talkers(client_ip, X, prediction)
+    if drift_monitor:
+        drift_monitor.record(X, prediction)
+
+# ============ RESPONSE CACHE ============
+# /api/stats and the /api/attacks endpoints are cached per query and served
+# until this process writes (data_version) or ttl seconds pass, with
+# single-flight recompute and ETag/304; see utils/response_cache.py
+CACHE_CONFIG = {
+    'enabled': os.getenv('NIDS_RESPONSE_CACHE', '1') == '1',
+    'ttl': float(os.getenv('NIDS_CACHE_TTL', 5.0)),
+    'max_entries': int(os.getenv('NIDS_CACHE_ENTRIES', 256)),
+    'max_bytes': int(os.getenv('NIDS_CACHE_MB', 64)) * 1024 * 1024,
+    'max_entry_bytes': int(os.getenv('NIDS_CACHE_ENTRY_MB', 8)) * 1024 * 1024
+}
+data_version = DataVersion()
+response_cache = ResponseCache(
+    data_version,
+    ttl=CACHE_CONFIG['ttl'],
+    max_entries=CACHE_CONFIG['max_entries'],
+    max_bytes=CACHE_CONFIG['max_bytes'],
+    max_entry_bytes=CACHE_CONFIG['max_entry_bytes']
+)
+
+def reads_pinned_to_primary():
+    """Requests reading their own recent writes skip the cache"""
+    return bool(db and db.router and db.router.pinned_to_primary())
+
+def cached_view(view):
+    if not CACHE_CONFIG['enabled']:
+        return view
+    return response_cache.cached(view, bypass=reads_pinned_to_primary)
+
+# ============ STORAGE BACKEND ============
+# 'mysql' (SimpleDatabase) or 'sqlite' (embedded, no server; for single-node
+# sensors and offline tests). Partitioning and the statistics buffer are
+# MySQL features and only run with the mysql backend.
+STORAGE_CONFIG = {
+    'backend': os.getenv('NIDS_STORAGE_BACKEND', 'mysql').lower(),
+    'sqlite_path': os.getenv('NIDS_SQLITE_PATH', os.path.join(BASE_DIR, 'data', 'nids.sqlite3'))
+}
+
+# ============ PARTITIONING ============
+# Off unless NIDS_PARTITIONING is 'day' or 'week'. Tables are converted once
+# with `python -m config.partition_manager convert`; workers then keep
+# future partitions created and purge expired ones in the background.
+PARTITION_CONFIG = {
+    'granularity': os.getenv('NIDS_PARTITIONING', ''),
+    'retention_days': int(os.getenv('NIDS_RETENTION_DAYS', 30)),
+    'ahead': int(os.getenv('NIDS_PARTITIONS_AHEAD', 7)),
+    'interval': float(os.getenv('NIDS_PARTITION_CHECK_INTERVAL', 3600))
+}
+partition_manager = None
+
+# ============ DAILY STATISTICS ============
+# Per-day counters are aggregated in memory and flushed to `statistics` in
+# one upsert every flush_interval seconds, with a replay log for crashes
+STATS_CONFIG = {
+    'flush_interval': float(os.getenv('NIDS_STATS_FLUSH_INTERVAL', 5.0)),
+    'log_dir': os.getenv('NIDS_STATS_LOG_DIR', os.path.join(BASE_DIR, 'logs', 'stats'))
+}
+
+# ============ ATTACK INCIDENTS ============
+# Attacks with the same source, type and severity less than window_seconds
+# apart are merged into one `incidents` row, written when the window closes
+# (or after max_duration); see config/incidents.py. With NIDS_ATTACK_ROWS=0
+# the per-attack `attacks` rows are no longer written at all, and
+# /api/attacks and /api/attacks/optimized serve incidents by default.
+INCIDENT_CONFIG = {
+    'enabled': os.getenv('NIDS_INCIDENTS', '1') == '1',
+    'attack_rows': os.getenv('NIDS_ATTACK_ROWS', '1') == '1',
+    'window_seconds': float(os.getenv('NIDS_INCIDENT_WINDOW', 60)),
+    'max_duration': float(os.getenv('NIDS_INCIDENT_MAX_DURATION', 300)),
+    'flush_interval': float(os.getenv('NIDS_INCIDENT_FLUSH_INTERVAL', 5.0))
+}
+
+# ============ SAMPLED PERSISTENCE ============
+# Attacks and uncertain predictions (normal probability <= keep_below) are
+# always stored. Confident normal rows are stored at normal_rate per source
+# after the first min_per_source per window, with sample_weight = 1 / rate;
+# the rest are counted in `sampled_counts` so /api/stats stays exact. See
+# config/sampling.py. A rate of 1 stores everything.
+SAMPLING_CONFIG = {
+    'normal_rate': float(os.getenv('NIDS_NORMAL_SAMPLE_RATE', 1.0)),
+    'keep_below': float(os.getenv('NIDS_SAMPLE_KEEP_BELOW', 95.0)),
+    'min_per_source': int(os.getenv('NIDS_SAMPLE_MIN_PER_SOURCE', 10)),
+    'window_seconds': float(os.getenv('NIDS_SAMPLE_WINDOW', 60))
+}
+
+# ============ BATCH JOBS ============
+# Large CSV files are scored in the background, chunk_size rows at a time,
+# by at most `workers` low-priority threads per process; see utils/batch_jobs.py
+JOBS_CONFIG = {
+    'dir': os.getenv('NIDS_JOBS_DIR', os.path.join(BASE_DIR, 'data', 'jobs')),
+    'workers': int(os.getenv('NIDS_JOB_WORKERS', 1)),
+    'max_queued': int(os.getenv('NIDS_JOB_QUEUE', 8)),
+    'chunk_size': int(os.getenv('NIDS_JOB_CHUNK_ROWS', 5000)),
+    'retention_hours': float(os.getenv('NIDS_JOB_RETENTION_HOURS', 24))
+}
+batch_jobs = None
+
+def validate_job_columns(columns):
+    missing = [col for col in REQUIRED_FEATURES if col not in columns]
+    if missing:
+        raise ValueError(f'Missing required columns: {missing}. Found: {columns}')
+
+def process_job_chunk(frame, job):
+    """Score one chunk of a batch job; returns (results DataFrame, counters)"""
+    validate_job_columns(list(frame.columns))
+    X = frame[REQUIRED_FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid = ~np.isnan(X).any(axis=1)
+    result = pipeline.score(X[valid])
+    attack_pct = result.attack_prob * 100
+    normal_pct = result.normal_prob * 100
+    labels, levels = risk_levels(result.prediction, result.confidence, attack_pct, normal_pct)
+    if shadow_scorer.workers:
+        shadow_scorer.submit_batch(X[valid], result.attack_prob, result.prediction)
+    record_scored(job['options'].get('client_ip'), X[valid], result.prediction)
     
-    for feature, default in defaults.items():
-        if feature not in input_data:
-            input_data[feature] = default
-    
-    # ============ MANUAL ATTACK DETECTION ============
-    is_definite_attack = False
-    attack_reasons = []
-    manual_confidence = 0.0
+    # Row numbers are the 1-based data rows of the uploaded file
+    results = pd.DataFrame(index=frame.index)
+    results.index.name = 'row'
+    results['prediction'] = pd.Series(pd.NA, index=frame.index, dtype='Int64')
+    results.loc[valid, 'prediction'] = result.prediction
+    results.loc[valid, 'prediction_label'] = labels
+    results.loc[valid, 'risk_level'] = levels
+    results.loc[valid, 'confidence'] = np.round(result.confidence, 2)
+    results.loc[valid, 'normal_probability'] = np.round(normal_pct, 2)
+    results.loc[valid, 'attack_probability'] = np.round(attack_pct, 2)
+    results.loc[valid, 'detection_method'] = np.where(result.rule_matched, 'Manual Rules', 'ML Model')
+    # NO_RULE (-1) picks the trailing empty name
+    results.loc[valid, 'rule'] = np.array(result.rules.names + [''], dtype=object)[result.rule_index]
+    results.loc[valid, 'category'] = result.categories.category
+    results.loc[valid, 'attack_type'] = np.where(result.prediction == 1, result.categories.attack_type, '')
+    results['error'] = None
+    for row in np.flatnonzero(~valid):
+        bad_columns = [col for col, value in zip(REQUIRED_FEATURES, X[row]) if np.isnan(value)]
+        results.iloc[row, results.columns.get_loc('error')] = f"non-numeric values in {bad_columns}"
     
-    # Rule 1: Extreme DoS pattern
-    if (input_data.get('count', 0) > 500 and 
-        input_data.get('serror_rate', 0) == 1.0 and
-        input_data.get('srv_serror_rate', 0) == 1.0):
-        is_definite_attack = True
-        attack_reasons.append("Extreme DoS: count>500, 100% errors")
-        manual_confidence = 99.9
+    saved = 0
+    if db and job['options'].get('persist') and valid.any():
+        records = []
+        for i, features in enumerate(X[valid].tolist()):
+            records.append(({
+                'prediction': int(result.prediction[i]),
+                'prediction_label': str(labels[i]),
+                'confidence': round(float(result.confidence[i]), 2),
+                'probabilities': {
+                    'normal': round(float(normal_pct[i]), 2),
+                    'attack': round(float(attack_pct[i]), 2)
+                },
+                **category_fields(result, i)
+            }, dict(zip(REQUIRED_FEATURES, features)), job['options'].get('client_ip')))
+        saved_ids = db.save_predictions(records)
+        if saved_ids:
+            results['prediction_id'] = pd.Series(pd.NA, index=frame.index, dtype='Int64')
+            results.loc[valid, 'prediction_id'] = saved_ids
+            saved = sum(prediction_id is not None for prediction_id in saved_ids)
     
-    # Rule 2: High connection count with zero bytes
-    elif input_data.get('count', 0) > 100 and input_data.get('src_bytes', 0) == 0:
-        is_definite_attack = True
-        attack_reasons.append(f"DoS: count={input_data['count']}, bytes=0")
-        manual_confidence = 85.0
+    attack_count = int(result.prediction.sum())
+    return results.reset_index(), {
+        'attack_count': attack_count,
+        'normal_count': len(result) - attack_count,
+        'saved_count': saved,
+        'rows_failed': int((~valid).sum())
+    }
+
+# ============ PER-PROCESS INITIALIZATION ============
+# Under a pre-fork server (gunicorn.conf.py) everything above is loaded once
+# in the master and shared copy-on-write with the workers. Database
+# connections and background threads cannot survive fork(), so they are
+# created here, in each worker, from gunicorn's post_worker_init hook.
+db = None
+
+def init_worker():
+    """Create the database handler and start background threads for this process"""
+    global db, partition_manager, batch_jobs
+    try:
+        if STORAGE_CONFIG['backend'] == 'sqlite':
+            db = SQLiteStorage(STORAGE_CONFIG['sqlite_path'])
+        elif REPLICA_CONFIG['host']:
+            router = DatabaseRouter(
+                MYSQL_CONFIG, REPLICA_CONFIG,
+                pool_size=int(os.getenv('NIDS_DB_POOL_SIZE', 0)),
+                read_pool_size=ROUTER_CONFIG['read_pool_size'],
+                max_lag=ROUTER_CONFIG['max_lag'],
+                check_interval=ROUTER_CONFIG['check_interval'],
+                allow_standalone=ROUTER_CONFIG['allow_standalone']
+            ).start()
+            db = SimpleDatabase(router=router)
+            print(f"✅ Dashboard reads routed to replica {REPLICA_CONFIG['host']}:{REPLICA_CONFIG['port']}")
+        else:
+            db = SimpleDatabase(pool_size=int(os.getenv('NIDS_DB_POOL_SIZE', 0)))
+        print("✅ Database connected successfully")
+    except Exception as e:
+        print(f"⚠ Database initialization failed: {e}")
+        db = None
     
-    # Rule 3: Extreme error rates
-    elif input_data.get('serror_rate', 0) > 0.8 or input_data.get('srv_serror_rate', 0) > 0.8:
-        is_definite_attack = True
-        attack_reasons.append(f"High error rate: serror={input_data.get('serror_rate', 0)}")
-        manual_confidence = 75.0
+    if isinstance(db, SimpleDatabase):
+        try:
+            db.stats = StatsBuffer(db.get_connection, STATS_CONFIG['log_dir'],
+                                   flush_interval=STATS_CONFIG['flush_interval']).start()
+        except OSError as e:
+            print(f"⚠ Statistics buffer disabled: {e}")
     
-    # Rule 4: DDoS pattern
-    elif (input_data.get('count', 0) > 200 and 
-          input_data.get('serror_rate', 0) > 0.9 and
-          input_data.get('srv_serror_rate', 0) > 0.9):
-        is_definite_attack = True
-        attack_reasons.append("DDoS pattern")
-        manual_confidence = 90.0
+    if isinstance(db, SimpleDatabase) and PARTITION_CONFIG['granularity']:
+        partition_manager = PartitionManager(
+            db.get_connection,
+            granularity=PARTITION_CONFIG['granularity'],
+            retention_days=PARTITION_CONFIG['retention_days'],
+            ahead=PARTITION_CONFIG['ahead']
+        )
+        partition_manager.start(PARTITION_CONFIG['interval'])
     
-    # If manual rules detect attack
-    if is_definite_attack:
-        for input_feature, raw_value in input_data.items():
-            if input_feature in feature_mapping:
-                norm_value = normalize_value(input_feature, raw_value)
-                model_feature = feature_mapping[input_feature]
-                sample[model_feature] = norm_value
-        
-        sample_df = pd.DataFrame([sample])[feature_columns]
-        scaled = scaler.transform(sample_df)
-        pca_transformed = pca_model.transform(scaled)
-        probabilities = rf_model.predict_proba(pca_transformed)[0]
-        
-        converted_features = {}
-        for key, value in input_data.items():
-            if isinstance(value, (np.integer, np.floating)):
-                converted_features[key] = value.item()
-            else:
-                converted_features[key] = value
-        
-        attack_prob = float(probabilities[1] * 100)
-        normal_prob = float(probabilities[0] * 100)
-        
-        return 1, manual_confidence, probabilities, converted_features, attack_reasons
+    if db:
+        db.version = data_version
     
-    # ============ ML PREDICTION ============
-    for input_feature, raw_value in input_data.items():
-        if input_feature in feature_mapping:
-            norm_value = normalize_value(input_feature, raw_value)
-            model_feature = feature_mapping[input_feature]
-            sample[model_feature] = norm_value
+    if db and INCIDENT_CONFIG['enabled']:
+        db.incidents = IncidentAggregator(
+            db,
+            window_seconds=INCIDENT_CONFIG['window_seconds'],
+            max_duration=INCIDENT_CONFIG['max_duration'],
+            flush_interval=INCIDENT_CONFIG['flush_interval']
+        ).start()
+        db.attack_rows = INCIDENT_CONFIG['attack_rows']
     
-    sample_df = pd.DataFrame([sample])[feature_columns]
-    scaled = scaler.transform(sample_df)
-    pca_transformed = pca_model.transform(scaled)
-    probabilities = rf_model.predict_proba(pca_transformed)[0]
+    if db and SAMPLING_CONFIG['normal_rate'] < 1:
+        db.sampling = SamplingPolicy(
+            rate=SAMPLING_CONFIG['normal_rate'],
+            keep_below=SAMPLING_CONFIG['keep_below'],
+            min_per_stratum=SAMPLING_CONFIG['min_per_source'],
+            window_seconds=SAMPLING_CONFIG['window_seconds']
+        )
     
-    attack_prob = float(probabilities[1])
-    normal_prob = float(probabilities[0])
+    shadow_scorer.start()
     
-    # AGGRESSIVE ATTACK DETECTION
-    if attack_prob > 0.15:
-        prediction = 1
-    elif attack_prob > 0.05 and normal_prob < 0.95:
-        prediction = 1
-    else:
-        prediction = 0
+    try:
+        batch_jobs = BatchJobManager(
+            process_job_chunk, JOBS_CONFIG['dir'],
+            workers=JOBS_CONFIG['workers'],
+            max_queued=JOBS_CONFIG['max_queued'],
+            chunk_size=JOBS_CONFIG['chunk_size'],
+            retention_hours=JOBS_CONFIG['retention_hours'],
+            validate_columns=validate_job_columns
+        ).start()
+    except OSError as e:
+        print(f"⚠ Batch jobs disabled: {e}")
+
+def shutdown_worker():
+    """Write what the background threads still hold in memory"""
+    if db and db.incidents:
+        db.incidents.stop()
+    if db and db.stats:
+        db.stats.stop()
+
+if os.getenv('NIDS_PREFORK') != '1':
+    init_worker()
+
+# ============ PREDICTION FUNCTION ============
+def predict_traffic(input_data):
+    """Predict if traffic is normal or attack"""
+    print("🔍 Running PREDICT_TRAFFIC function...")
+    for feature in REQUIRED_FEATURES:
+        if feature not in input_data:
+            input_data[feature] = 0.0
     
-    # Confidence calculation
-    if prediction == 1:
-        confidence = float(max(attack_prob * 100, 60.0))
-    else:
-        confidence = float(normal_prob * 100)
+    result = pipeline.score(pipeline.to_matrix([input_data]))
     
     converted_features = {}
     for key, value in input_data.items():
@@ -439,7 +679,27 @@ def predict_traffic(input_data):
         else:
             converted_features[key] = value
     
-    return int(prediction), confidence, probabilities, converted_features, []
+    return (int(result.prediction[0]), float(result.confidence[0]), result.probabilities(0),
+            converted_features, result.attack_reasons(0), category_fields(result, 0), result)
+
+# ============ READ-YOUR-WRITES ============
+# A client that just saved predictions reads them back from the primary
+# until the replica has caught up: the time of its last write travels in a
+# cookie (browsers) or the X-NIDS-Wrote-At header (API clients).
+@app.before_request
+def route_reads():
+    if db and db.router:
+        db.router.begin_request(request.headers.get(WROTE_AT_HEADER) or request.cookies.get(WROTE_AT_COOKIE))
+
+@app.after_request
+def remember_writes(response):
+    if db and db.router:
+        wrote_at = db.router.end_request()
+        if wrote_at:
+            window = int(db.router.max_lag + db.router.check_interval) + 1
+            response.set_cookie(WROTE_AT_COOKIE, f"{wrote_at:.3f}", max_age=window, samesite='Lax')
+            response.headers[WROTE_AT_HEADER] = f"{wrote_at:.3f}"
+    return response
 
 # ============ ALL API ENDPOINTS ============
 @app.route('/api/predict', methods=['POST', 'OPTIONS'])
@@ -464,11 +724,7 @@ def single_predict():
         print(f"📊 Input data: {data}")
         
         # Extract features
-        required_features = [
-            'duration', 'src_bytes', 'dst_bytes', 'count', 'srv_count',
-            'serror_rate', 'srv_serror_rate', 'dst_host_count',
-            'dst_host_srv_count', 'dst_host_serror_rate', 'dst_host_srv_serror_rate'
-        ]
+        required_features = REQUIRED_FEATURES
         
         # Check if all required features are present
         missing_features = [feat for feat in required_features if feat not in data]
@@ -489,7 +745,9 @@ def single_predict():
                 input_data[feature] = 0.0
         
         # Make prediction (using your existing predict_traffic function)
-        prediction, confidence, probabilities, features, attack_reasons = predict_traffic(input_data)
+        prediction, confidence, probabilities, features, attack_reasons, category, result = predict_traffic(input_data)
+        submit_shadow(input_data, probabilities, prediction)
+        record_scored(request.remote_addr, [[input_data[f] for f in REQUIRED_FEATURES]], [prediction])
         
         # Convert probabilities
         normal_prob = float(probabilities[0] * 100)
@@ -537,8 +795,15 @@ def single_predict():
                 'list': list(input_data.keys())
             },
             'detection_method': 'Manual Rules' if attack_reasons else 'ML Model',
+            **category,
             'timestamp': datetime.now().isoformat()
         }
+        if wants_model_probabilities():
+            response_data.update(model_probability_fields(result.model_probabilities(), 0))
+        # Attributions explain the forest, so only for attacks the forest decided
+        if prediction == 1 and not attack_reasons and ATTRIBUTION_CONFIG['enabled']:
+            response_data['attributions'] = pipeline.explain(
+                pipeline.to_matrix([input_data])).as_dict(0, ATTRIBUTION_CONFIG['top'])
         
         # Save to database if available
         if db:
@@ -551,7 +816,8 @@ def single_predict():
                     'probabilities': {
                         'normal': round(normal_prob, 2),
                         'attack': round(attack_prob, 2)
-                    }
+                    },
+                    **category
                 }
                 prediction_id = db.save_prediction(db_prediction_data, features, client_ip)
                 if prediction_id:
@@ -598,9 +864,7 @@ def batch_predict():
         print(f"📥 Batch processing {len(df)} records from {file.filename}")
         
         # Check for required columns
-        required_columns = ['duration', 'src_bytes', 'dst_bytes', 'count', 'srv_count', 
-                          'serror_rate', 'srv_serror_rate', 'dst_host_count', 
-                          'dst_host_srv_count', 'dst_host_serror_rate', 'dst_host_srv_serror_rate']
+        required_columns = REQUIRED_FEATURES
         
         # Check if all required columns are present
         missing_columns = [col for col in required_columns if col not in df.columns]
@@ -618,26 +882,39 @@ def batch_predict():
         # Get client IP (for database saving)
         client_ip = request.remote_addr
         
+        # Score every row in one vectorized pass; rows with non-numeric
+        # values are reported as errors below
+        X = df[required_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        valid_rows = ~np.isnan(X).any(axis=1)
+        result = pipeline.score(X[valid_rows])
+        result_rows = np.cumsum(valid_rows) - 1
+        record_scored(client_ip, X[valid_rows], result.prediction)
+        
+        # Attributions for every attack the forest decided (not rule matches), in one pass
+        explained = {}
+        if ATTRIBUTION_CONFIG['enabled']:
+            attack_rows = np.flatnonzero((result.prediction == 1) & ~result.rule_matched)
+            if len(attack_rows):
+                explanations = result.explain(attack_rows)
+                explained = {r: k for k, r in enumerate(attack_rows.tolist())}
+        model_proba = result.model_probabilities() if wants_model_probabilities() else None
+        
         # Process each row
-        for index, row in df.iterrows():
+        for index in range(len(df)):
             try:
-                # Prepare input data dictionary (same format as single prediction)
-                input_data = {
-                    'duration': float(row['duration']),
-                    'src_bytes': float(row['src_bytes']),
-                    'dst_bytes': float(row['dst_bytes']),
-                    'count': float(row['count']),
-                    'srv_count': float(row['srv_count']),
-                    'serror_rate': float(row['serror_rate']),
-                    'srv_serror_rate': float(row['srv_serror_rate']),
-                    'dst_host_count': float(row['dst_host_count']),
-                    'dst_host_srv_count': float(row['dst_host_srv_count']),
-                    'dst_host_serror_rate': float(row['dst_host_serror_rate']),
-                    'dst_host_srv_serror_rate': float(row['dst_host_srv_serror_rate'])
-                }
+                if not valid_rows[index]:
+                    bad_columns = [col for col, value in zip(required_columns, X[index]) if np.isnan(value)]
+                    raise ValueError(f"non-numeric values in {bad_columns}")
                 
-                # Use the same predict_traffic function as single prediction
-                prediction, confidence, probabilities, features, attack_reasons = predict_traffic(input_data)
+                r = result_rows[index]
+                input_data = dict(zip(required_columns, X[index].tolist()))
+                prediction = int(result.prediction[r])
+                confidence = float(result.confidence[r])
+                probabilities = result.probabilities(r)
+                features = input_data
+                attack_reasons = result.attack_reasons(r)
+                category = category_fields(result, r)
+                submit_shadow(input_data, probabilities, prediction)
                 
                 # Convert probabilities
                 normal_prob = float(probabilities[0] * 100)
@@ -682,12 +959,17 @@ def batch_predict():
                         'attack': round(attack_prob, 2)
                     },
                     'features_received': len(input_data),
-                    'detection_method': 'Manual Rules' if attack_reasons else 'ML Model'
+                    'detection_method': 'Manual Rules' if attack_reasons else 'ML Model',
+                    **category
                 }
                 
                 # Add attack reasons if any
                 if attack_reasons:
                     pred_result['attack_reasons'] = attack_reasons
+                if r in explained:
+                    pred_result['attributions'] = explanations.as_dict(explained[r], ATTRIBUTION_CONFIG['top'])
+                if model_proba is not None:
+                    pred_result.update(model_probability_fields(model_proba, r))
                 
                 # ============ SAVE TO DATABASE ============
                 # Same logic as single prediction endpoint
@@ -701,7 +983,8 @@ def batch_predict():
                             'probabilities': {
                                 'normal': round(normal_prob, 2),
                                 'attack': round(attack_prob, 2)
-                            }
+                            },
+                            **category
                         }
                         
                         # Save to database using your existing function
@@ -782,7 +1065,250 @@ def batch_predict():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)})
 
+MAX_BATCH_ROWS = int(os.getenv('NIDS_MAX_BATCH_ROWS', 100000))
+# Bodies are checked against the row cap before decoding: a JSON record of
+# the 11 features at full float precision is about 400 bytes (packed
+# MessagePack float32 columns take 44). Only this route is capped; the CSV
+# upload routes keep no limit.
+MAX_BATCH_BYTES = int(os.getenv('NIDS_MAX_BATCH_BYTES', MAX_BATCH_ROWS * 512))
+
+def batch_too_large():
+    return jsonify({
+        'success': False,
+        'error': f'Request body exceeds the limit of {MAX_BATCH_BYTES} bytes'
+    }), 413
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch_columns():
+    """Score a JSON or MessagePack batch without a multipart CSV upload
+    
+    Accepts a JSON array of feature objects, a JSON object of feature
+    columns, or a MessagePack object whose columns are packed float32
+    arrays. Results come back column-oriented as JSON or MessagePack, or
+    one row per line as NDJSON or CSV, as negotiated by utils/encoders.
+    """
+    if (request.content_length or 0) > MAX_BATCH_BYTES:
+        return batch_too_large()
+    # Chunked bodies carry no Content-Length, so read at most one byte past the limit
+    body = request.stream.read(MAX_BATCH_BYTES + 1)
+    if len(body) > MAX_BATCH_BYTES:
+        return batch_too_large()
+    
+    try:
+        X = decode_batch(body, request.content_type, REQUIRED_FEATURES)
+    except BatchDecodeError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'required_features': REQUIRED_FEATURES
+        }), 400
+    
+    if len(X) > MAX_BATCH_ROWS:
+        return jsonify({
+            'success': False,
+            'error': f'Batch of {len(X)} rows exceeds the limit of {MAX_BATCH_ROWS}'
+        }), 413
+    
+    try:
+        exact = True if request.args.get('exact', '').lower() in ('1', 'true', 'yes') else None
+        result = pipeline.score(X, exact=exact)
+        attack_pct = result.attack_prob * 100
+        normal_pct = result.normal_prob * 100
+        labels, levels = risk_levels(result.prediction, result.confidence, attack_pct, normal_pct)
+        if shadow_scorer.workers:
+            shadow_scorer.submit_batch(X, result.attack_prob, result.prediction)
+        record_scored(request.remote_addr, X, result.prediction)
+        
+        saved_count = 0
+        if db and request.args.get('persist', '').lower() in ('1', 'true', 'yes'):
+            client_ip = request.remote_addr
+            records = []
+            for i in range(len(X)):
+                db_prediction_data = {
+                    'prediction': int(result.prediction[i]),
+                    'prediction_label': str(labels[i]),
+                    'confidence': round(float(result.confidence[i]), 2),
+                    'probabilities': {
+                        'normal': round(float(normal_pct[i]), 2),
+                        'attack': round(float(attack_pct[i]), 2)
+                    },
+                    **category_fields(result, i)
+                }
+                features = dict(zip(REQUIRED_FEATURES, X[i].tolist()))
+                records.append((db_prediction_data, features, client_ip))
+            # One transaction and one multi-row INSERT for the whole batch
+            saved_ids = db.save_predictions(records)
+            saved_count = sum(prediction_id is not None for prediction_id in saved_ids or [])
+        
+        attack_count = int(result.prediction.sum())
+        meta = {
+            'success': True,
+            'count': len(X),
+            'summary': {
+                'attack_count': attack_count,
+                'normal_count': len(X) - attack_count,
+                'rule_matched_count': int(result.rule_matched.sum()),
+                'database_saved_count': saved_count
+            },
+            'rules': result.rules.names
+        }
+        columns = {
+            'prediction': result.prediction,
+            'confidence': np.round(result.confidence, 2),
+            'attack_probability': np.round(attack_pct, 2),
+            'normal_probability': np.round(normal_pct, 2),
+            'risk_level': levels,
+            'rule_index': result.rule_index,
+            'category': result.categories.category,
+            'attack_type': np.where(result.prediction == 1, result.categories.attack_type, '')
+        }
+        # Only a multiclass model (NIDS_CATEGORY_MODEL) produces category probabilities
+        for j, name in enumerate(result.categories.categories if result.categories.proba is not None else []):
+            columns[f'category_{name}_probability'] = np.round(result.categories.proba[:, j] * 100, 2)
+        if result.early_exit:
+            # Bounds of the exact forest probability; NaN for rule-matched rows
+            columns['attack_probability_low'] = np.round(result.attack_low * 100, 2)
+            columns['attack_probability_high'] = np.round(result.attack_high * 100, 2)
+            columns['trees_evaluated'] = result.trees_evaluated
+            meta['summary']['mean_trees_evaluated'] = round(float(
+                result.trees_evaluated[~result.rule_matched].mean()), 1) if (~result.rule_matched).any() else 0.0
+        if wants_model_probabilities():
+            # The forest's own probabilities, computed now for rule-matched rows
+            model_proba = result.model_probabilities()
+            columns['model_normal_probability'] = np.round(model_proba[:, 0] * 100, 2)
+            columns['model_attack_probability'] = np.round(model_proba[:, 1] * 100, 2)
+        if request.args.get('explain', '').lower() in ('1', 'true', 'yes') and len(X):
+            # Percentage points of the forest attack probability per feature
+            explanations = result.explain(np.arange(len(X)))
+            for j, feature in enumerate(REQUIRED_FEATURES):
+                columns[f'contribution_{feature}'] = np.round(explanations.contributions[:, j], 2)
+            columns['contribution_other'] = np.round(explanations.other, 2)
+            columns['model_attack_probability'] = np.round(explanations.model_attack_probability, 2)
+            meta['attribution_base'] = round(float(explanations.base), 2)
+        
+        # JSON, NDJSON, CSV or MessagePack per the Accept header (or ?format=)
+        encoder = negotiate(request)
+        return Response(encoder.encode_columns(columns, meta), mimetype=encoder.mimetype)
+    
+    except Exception as e:
+        print(f"❌ Batch prediction error: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def jobs_unavailable():
+    return jsonify({'success': False, 'error': 'Batch jobs are not available'}), 503
+
+def unknown_job(job_id):
+    return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a CSV file for background scoring; returns 202 and the job id
+    
+    Form fields: file (CSV), persist (default 1) to save rows to the database.
+    """
+    if batch_jobs is None:
+        return jobs_unavailable()
+    upload = request.files.get('file')
+    if upload is None or upload.filename == '':
+        return jsonify({'success': False, 'error': 'No file provided'}), 400
+    if not upload.filename.lower().endswith('.csv'):
+        return jsonify({'success': False, 'error': 'File must be a CSV'}), 400
+    
+    options = {
+        'persist': request.form.get('persist', '1').lower() in ('1', 'true', 'yes'),
+        'client_ip': request.remote_addr
+    }
+    try:
+        status = batch_jobs.submit(upload, upload.filename, options)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except JobQueueFull as e:
+        response = jsonify({'success': False, 'error': f'Job queue is full: {e}'})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    
+    print(f"📦 Batch job {status['id']} queued: {upload.filename} ({status['rows_total']:,} rows)")
+    return jsonify({
+        'success': True,
+        'job': status,
+        'status_url': f"/api/jobs/{status['id']}",
+        'results_url': f"/api/jobs/{status['id']}/results",
+        'download_url': f"/api/jobs/{status['id']}/download"
+    }), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Recent batch jobs, newest first"""
+    if batch_jobs is None:
+        return jobs_unavailable()
+    return jsonify({'success': True, 'jobs': batch_jobs.list_jobs(request.args.get('limit', 50, type=int))})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Rows processed, throughput and ETA of a batch job"""
+    if batch_jobs is None:
+        return jobs_unavailable()
+    try:
+        return jsonify({'success': True, 'job': batch_jobs.status(job_id)})
+    except JobNotFound:
+        return unknown_job(job_id)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Stop a batch job after its current chunk"""
+    if batch_jobs is None:
+        return jobs_unavailable()
+    try:
+        return jsonify({'success': True, 'job': batch_jobs.cancel(job_id)})
+    except JobNotFound:
+        return unknown_job(job_id)
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """One page of results (?offset=, ?limit= up to 10000) in the negotiated format"""
+    if batch_jobs is None:
+        return jobs_unavailable()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = max(1, min(request.args.get('limit', 1000, type=int), 10000))
+    try:
+        status = batch_jobs.status(job_id)
+        page = batch_jobs.page(job_id, offset, limit)
+    except JobNotFound:
+        return unknown_job(job_id)
+    
+    # No next page once a finished job's rows are exhausted
+    next_offset = offset + len(page)
+    if status['state'] in JOB_FINISHED and next_offset >= status['rows_done']:
+        next_offset = None
+    meta = {
+        'success': True,
+        'job_id': job_id,
+        'state': status['state'],
+        'offset': offset,
+        'count': len(page),
+        'rows_available': status['rows_done'],
+        'next_offset': next_offset
+    }
+    columns = {name: page[name].to_numpy() for name in page.columns}
+    encoder = negotiate(request)
+    return Response(encoder.encode_columns(columns, meta), mimetype=encoder.mimetype)
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_job(job_id):
+    """All results processed so far as one CSV file"""
+    if batch_jobs is None:
+        return jobs_unavailable()
+    try:
+        status = batch_jobs.status(job_id)
+    except JobNotFound:
+        return unknown_job(job_id)
+    filename = os.path.splitext(status['filename'])[0] + '_predictions.csv'
+    return Response(batch_jobs.iter_download(job_id), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @app.route('/api/stats', methods=['GET'])
+@cached_view
 def get_stats():
     """2. Get statistics"""
     try:
@@ -794,6 +1320,7 @@ def get_stats():
         return jsonify({
             'success': True,
             'statistics': stats,
+            'sampling': db.sampling.stats() if db and db.sampling else None,
             'database': 'connected' if db else 'disconnected',
             'timestamp': datetime.now().isoformat()
         })
@@ -840,8 +1367,7 @@ def test_endpoint():
     results = []
     for test in test_samples:
         try:
-            # FIXED: predict_traffic now returns 5 values, not 4
-            prediction, confidence, probabilities, _, _ = predict_traffic(test['data'])
+            prediction, confidence, probabilities, _, _, _, _ = predict_traffic(test['data'])
             
             # Get attack probability
             attack_prob = float(probabilities[1] * 100)
@@ -895,6 +1421,8 @@ def health_check():
         'model': 'loaded',
         'database': db_status,
         'mysql_config': MYSQL_CONFIG,
+        'read_routing': db.router.status() if db and db.router else None,
+        'drift': drift_monitor.report()['status'] if drift_monitor else None,
         'success': True
     })
 
@@ -922,66 +1450,256 @@ def db_test():
             'solution': 'Check MySQL is running: sudo systemctl start mysql (Linux) or brew services start mysql (Mac)'
         })
 
-@app.route('/api/attacks', methods=['GET'])
-def get_attacks():
-    try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='nids_user',
-            password='nids_password',
-            database='nids_database'
-        )
-        cursor = connection.cursor(dictionary=True)
+# ============ STREAMED QUERIES ============
+MAX_STREAM_ROWS = int(os.getenv('NIDS_MAX_STREAM_ROWS', 100000))
+STREAM_BATCH_SIZE = 1000
 
-        # Simple query first - just get attacks
-        query = "SELECT * FROM attacks ORDER BY timestamp DESC"
-        cursor.execute(query)
-        attacks = cursor.fetchall()
+def stream_limit(default=MAX_STREAM_ROWS):
+    """?limit=, capped at NIDS_MAX_STREAM_ROWS"""
+    return max(1, min(request.args.get('limit', default, type=int), MAX_STREAM_ROWS))
 
-        formatted_attacks = []
-        for attack in attacks:
-            # Simple IP simulation
-            source_ip = f"192.168.1.{attack['prediction_id'] % 255}"
-            
-            # Handle timestamp safely
-            timestamp = attack['timestamp']
-            if hasattr(timestamp, 'strftime'):
-                timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                timestamp_str = str(timestamp)
-            
-            # Calculate confidence based on severity
-            severity_confidence = {
-                'CRITICAL': 95,
-                'HIGH': 85,
-                'MEDIUM': 75,
-                'LOW': 65
+def stream_response(batches, key, format_row=None, summary=None):
+    """Chunked JSON object, or NDJSON when the client asks for it"""
+    batches = primed(batches)
+    if wants_ndjson(request):
+        return Response(ndjson_body(batches, format_row), mimetype='application/x-ndjson')
+    return Response(json_array_body(batches, key, format_row, summary), mimetype='application/json')
+
+def format_timestamp(timestamp):
+    if hasattr(timestamp, 'strftime'):
+        return timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    return str(timestamp)
+
+SEVERITY_CONFIDENCE = {
+    'CRITICAL': 95,
+    'HIGH': 85,
+    'MEDIUM': 75,
+    'LOW': 65
+}
+
+def format_attack(attack):
+    """Attack row -> /api/attacks record"""
+    return {
+        'id': attack['id'],
+        'timestamp': format_timestamp(attack['timestamp']),
+        'attackType': attack['attack_type'],
+        'severity': attack['severity'],
+        # Simple IP simulation
+        'sourceIp': f"192.168.1.{attack['prediction_id'] % 255}",
+        'destinationIp': '10.0.0.1',
+        # Confidence based on severity
+        'confidence': SEVERITY_CONFIDENCE.get(attack['severity'], 75),
+        'features': {
+            'count': 0,
+            'serror_rate': 0.0,
+            'src_bytes': 0
+        },
+        'status': 'Blocked' if attack['severity'] in ['CRITICAL', 'HIGH'] else 'Monitored'
+    }
+
+def format_attack_details(attack):
+    """Attack joined with its prediction -> /api/attacks/optimized record"""
+    # Use REAL confidence from your model
+    model_confidence = float(attack.get('model_confidence', 0.0) or 0.0)
+    attack_probability = float(attack.get('attack_probability', 0.0) or 0.0)
+    serror_rate = float(attack.get('serror_rate', 0.0) or 0.0)
+    srv_serror_rate = float(attack.get('srv_serror_rate', 0.0) or 0.0)
+    count = attack.get('count', 0) or 0
+    src_bytes = attack.get('src_bytes', 0) or 0
+    
+    # Calculate intelligent confidence score
+    # Use model confidence if available, otherwise calculate based on features
+    if model_confidence > 0:
+        confidence = model_confidence
+    else:
+        # Smart calculation using your actual features
+        confidence = 65.0  # Base
+        
+        # Increase based on error rates
+        if serror_rate >= 0.9 or srv_serror_rate >= 0.9:
+            confidence = 95.0
+        elif serror_rate >= 0.7 or srv_serror_rate >= 0.7:
+            confidence = 85.0
+        elif serror_rate >= 0.5 or srv_serror_rate >= 0.5:
+            confidence = 75.0
+        
+        # Adjust based on traffic patterns
+        if count > 100:
+            confidence += 10.0
+        elif count > 50:
+            confidence += 5.0
+        
+        # Zero source bytes is suspicious for attacks
+        if src_bytes == 0:
+            confidence += 8.0
+        
+        # Use attack probability if available
+        if attack_probability > 0:
+            confidence = max(confidence, attack_probability * 100)
+        
+        confidence = min(confidence, 99.9)
+    
+    # Use REAL client_ip if available
+    source_ip = attack.get('client_ip') or f"192.168.1.{attack['prediction_id'] % 255}"
+    
+    return {
+        'id': attack['attack_id'],
+        'prediction_id': attack['prediction_id'],
+        'timestamp': format_timestamp(attack['attack_timestamp']),
+        'attackType': attack['attack_type'],
+        'severity': attack['severity'],
+        'sourceIp': source_ip,
+        'destinationIp': f"10.0.0.{attack['attack_id'] % 10 + 1}",
+        'confidence': round(confidence, 1),
+        'model_confidence': float(model_confidence),
+        'attack_probability': float(attack_probability),
+        'normal_probability': float(attack.get('normal_probability', 0.0) or 0.0),
+        'features': {
+            'count': count,
+            'srv_count': attack.get('srv_count', 0) or 0,
+            'serror_rate': serror_rate,
+            'srv_serror_rate': srv_serror_rate,
+            'src_bytes': src_bytes,
+            'dst_bytes': attack.get('dst_bytes', 0) or 0
+        },
+        'prediction_label': attack.get('prediction_label', 'Unknown'),
+        'category': attack.get('attack_category'),
+        'category_probabilities': json.loads(attack['category_probabilities'])
+                                  if attack.get('category_probabilities') else None,
+        'status': 'Blocked' if attack['severity'] in ['CRITICAL', 'HIGH'] else 'Monitored',
+        'is_attack': bool(attack.get('is_attack', 1)),
+        'client_ip': attack.get('client_ip', 'N/A')
+    }
+
+class AttackSummary:
+    """Running statistics for /api/attacks/optimized, updated as rows stream out"""
+    
+    def __init__(self):
+        self.total = 0
+        self.blocked = 0
+        self.confidence_sum = 0.0
+        self.severity = {'CRITICAL': 0, 'HIGH': 0, 'LOW': 0}
+        self.attack_types = set()
+        self.has_real_confidence = False
+        self.has_client_ip = False
+    
+    def add(self, attack):
+        attack = format_attack_details(attack)
+        self.total += 1
+        self.blocked += attack['status'] == 'Blocked'
+        self.confidence_sum += attack['confidence']
+        if attack['severity'] in self.severity:
+            self.severity[attack['severity']] += 1
+        self.attack_types.add(attack['attackType'])
+        self.has_real_confidence |= attack['model_confidence'] > 0
+        self.has_client_ip |= attack['client_ip'] != 'N/A'
+        return attack
+    
+    def as_dict(self):
+        return {
+            'statistics': {
+                'total_attacks': self.total,
+                'blocked_count': self.blocked,
+                'monitored_count': self.total - self.blocked,
+                'avg_confidence': round(self.confidence_sum / self.total, 1) if self.total > 0 else 0,
+                'severity_distribution': self.severity,
+                'attack_types': list(self.attack_types)
+            },
+            'schema_info': {
+                'has_real_confidence': self.has_real_confidence,
+                'has_client_ip': self.has_client_ip,
+                'available_features': ['count', 'srv_count', 'serror_rate', 'srv_serror_rate', 'src_bytes', 'dst_bytes']
             }
-            
-            formatted_attacks.append({
-                'id': attack['id'],
-                'timestamp': timestamp_str,
-                'attackType': attack['attack_type'],
-                'severity': attack['severity'],
-                'sourceIp': source_ip,
-                'destinationIp': '10.0.0.1',
-                'confidence': severity_confidence.get(attack['severity'], 75),
-                'features': {
-                    'count': 0,
-                    'serror_rate': 0.0,
-                    'src_bytes': 0
-                },
-                'status': 'Blocked' if attack['severity'] in ['CRITICAL', 'HIGH'] else 'Monitored'
-            })
+        }
 
-        cursor.close()
-        connection.close()
+def format_incident(incident):
+    """Incident row (written or still open) -> /api/attacks?view=incidents record"""
+    return {
+        'id': incident['id'],
+        'status': incident.get('status', 'closed'),
+        'sourceIp': incident['client_ip'],
+        'attackType': incident['attack_type'],
+        'severity': incident['severity'],
+        'firstSeen': format_timestamp(incident['first_seen']),
+        'lastSeen': format_timestamp(incident['last_seen']),
+        'count': incident['attack_count'],
+        'confidence': {
+            'min': float(incident['min_confidence']),
+            'max': float(incident['max_confidence']),
+            'avg': float(incident['avg_confidence'])
+        },
+        'predictionIds': [incident['first_prediction_id'], incident['last_prediction_id']]
+    }
 
-        return jsonify({
-            'success': True,
-            'attacks': formatted_attacks,
-            'count': len(formatted_attacks)
-        })
+class IncidentSummary:
+    """Running statistics for /api/attacks/optimized?view=incidents, weighted by attack count"""
+
+    def __init__(self):
+        self.incidents = 0
+        self.attacks = 0
+        self.confidence_sum = 0.0
+        self.severity = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        self.attack_types = set()
+
+    def add(self, incident):
+        incident = format_incident(incident)
+        self.incidents += 1
+        self.attacks += incident['count']
+        self.confidence_sum += incident['confidence']['avg'] * incident['count']
+        if incident['severity'] in self.severity:
+            self.severity[incident['severity']] += incident['count']
+        self.attack_types.add(incident['attackType'])
+        return incident
+
+    def as_dict(self):
+        return {
+            'statistics': {
+                'total_incidents': self.incidents,
+                'total_attacks': self.attacks,
+                'avg_confidence': round(self.confidence_sum / self.attacks, 1) if self.attacks else 0,
+                'severity_distribution': self.severity,
+                'attack_types': list(self.attack_types)
+            }
+        }
+
+def incidents_view():
+    """True for ?view=incidents, and by default while attacks are kept as incidents only (NIDS_ATTACK_ROWS=0)"""
+    return request.args.get('view', 'attacks' if db.attack_rows else 'incidents') == 'incidents'
+
+def incident_batches():
+    """Incident batches for ?minutes=, ?client_ip= and ?limit="""
+    minutes = request.args.get('minutes', type=float)
+    since = datetime.now() - timedelta(minutes=minutes) if minutes else None
+    return iter_incidents(stream_limit(), since, request.args.get('client_ip'))
+
+def iter_incidents(limit, since=None, client_ip=None):
+    """Incidents this process still holds in memory, then the written ones"""
+    held = []
+    if db.incidents:
+        held = [incident for incident in db.incidents.snapshot()
+                if (since is None or incident['last_seen'] >= since) and
+                (not client_ip or incident['client_ip'] == client_ip)][:limit]
+        if held:
+            yield held
+    if limit > len(held):
+        yield from db.iter_incidents(limit - len(held), since, client_ip, STREAM_BATCH_SIZE)
+
+@app.route('/api/attacks', methods=['GET'])
+@cached_view
+def get_attacks():
+    """Attacks newest first, streamed; ?limit= caps the rows, ?format=ndjson for NDJSON
+
+    ?view=incidents returns merged incidents instead of one row per attack,
+    optionally filtered with ?minutes= and ?client_ip=. It is the default
+    view while NIDS_ATTACK_ROWS=0.
+    """
+    try:
+        if not db:
+            raise ConnectionError('Database not available')
+        if incidents_view():
+            return stream_response(incident_batches(), 'incidents', format_incident)
+        batches = db.iter_attacks(stream_limit(), STREAM_BATCH_SIZE)
+        return stream_response(batches, 'attacks', format_attack)
 
     except Exception as e:
         return jsonify({
@@ -990,147 +1708,22 @@ def get_attacks():
         }), 500
 
 @app.route('/api/attacks/optimized', methods=['GET'])
+@cached_view
 def get_attacks_optimized():
-    try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='nids_user',
-            password='nids_password',
-            database='nids_database'
-        )
-        cursor = connection.cursor(dictionary=True)
-
-        # Optimized query using ALL your available features
-        query = """
-        SELECT 
-            a.id as attack_id,
-            a.prediction_id,
-            a.timestamp as attack_timestamp,
-            a.attack_type,
-            a.severity,
-            p.timestamp as prediction_timestamp,
-            p.prediction,
-            p.prediction_label,
-            p.confidence as model_confidence,
-            p.attack_probability,
-            p.normal_probability,
-            p.src_bytes,
-            p.dst_bytes,
-            p.count,
-            p.srv_count,
-            p.serror_rate,
-            p.srv_serror_rate,
-            p.is_attack,
-            p.client_ip
-        FROM attacks a
-        JOIN predictions p ON a.prediction_id = p.id
-        ORDER BY a.timestamp DESC
-        """
-        
-        cursor.execute(query)
-        attacks = cursor.fetchall()
-
-        formatted_attacks = []
-        for attack in attacks:
-            # Use REAL confidence from your model
-            model_confidence = float(attack.get('model_confidence', 0.0) or 0.0)
-            attack_probability = float(attack.get('attack_probability', 0.0) or 0.0)
-            serror_rate = float(attack.get('serror_rate', 0.0) or 0.0)
-            srv_serror_rate = float(attack.get('srv_serror_rate', 0.0) or 0.0)
-            count = attack.get('count', 0) or 0
-            src_bytes = attack.get('src_bytes', 0) or 0
-            
-            # Calculate intelligent confidence score
-            # Use model confidence if available, otherwise calculate based on features
-            if model_confidence > 0:
-                confidence = model_confidence
-            else:
-                # Smart calculation using your actual features
-                confidence = 65.0  # Base
-                
-                # Increase based on error rates
-                if serror_rate >= 0.9 or srv_serror_rate >= 0.9:
-                    confidence = 95.0
-                elif serror_rate >= 0.7 or srv_serror_rate >= 0.7:
-                    confidence = 85.0
-                elif serror_rate >= 0.5 or srv_serror_rate >= 0.5:
-                    confidence = 75.0
-                
-                # Adjust based on traffic patterns
-                if count > 100:
-                    confidence += 10.0
-                elif count > 50:
-                    confidence += 5.0
-                
-                # Zero source bytes is suspicious for attacks
-                if src_bytes == 0:
-                    confidence += 8.0
-                
-                # Use attack probability if available
-                if attack_probability > 0:
-                    confidence = max(confidence, attack_probability * 100)
-                
-                confidence = min(confidence, 99.9)
-            
-            # Use REAL client_ip if available
-            source_ip = attack.get('client_ip') or f"192.168.1.{attack['prediction_id'] % 255}"
-            
-            formatted_attacks.append({
-                'id': attack['attack_id'],
-                'prediction_id': attack['prediction_id'],
-                'timestamp': attack['attack_timestamp'].strftime('%Y-%m-d %H:%M:%S') if hasattr(attack['attack_timestamp'], 'strftime') else str(attack['attack_timestamp']),
-                'attackType': attack['attack_type'],
-                'severity': attack['severity'],
-                'sourceIp': source_ip,
-                'destinationIp': f"10.0.0.{attack['attack_id'] % 10 + 1}",
-                'confidence': round(confidence, 1),
-                'model_confidence': float(model_confidence),
-                'attack_probability': float(attack_probability),
-                'normal_probability': float(attack.get('normal_probability', 0.0) or 0.0),
-                'features': {
-                    'count': count,
-                    'srv_count': attack.get('srv_count', 0) or 0,
-                    'serror_rate': serror_rate,
-                    'srv_serror_rate': srv_serror_rate,
-                    'src_bytes': src_bytes,
-                    'dst_bytes': attack.get('dst_bytes', 0) or 0
-                },
-                'prediction_label': attack.get('prediction_label', 'Unknown'),
-                'status': 'Blocked' if attack['severity'] in ['CRITICAL', 'HIGH'] else 'Monitored',
-                'is_attack': bool(attack.get('is_attack', 1)),
-                'client_ip': attack.get('client_ip', 'N/A')
-            })
+    """Attacks with their model scores, streamed; statistics follow the rows
 
-        cursor.close()
-        connection.close()
-
-        # Calculate statistics
-        total_attacks = len(formatted_attacks)
-        blocked_count = len([a for a in formatted_attacks if a['status'] == 'Blocked'])
-        avg_confidence = round(sum(a['confidence'] for a in formatted_attacks) / total_attacks, 1) if total_attacks > 0 else 0
-        
-        return jsonify({
-            'success': True,
-            'attacks': formatted_attacks,
-            'count': total_attacks,
-            'statistics': {
-                'total_attacks': total_attacks,
-                'blocked_count': blocked_count,
-                'monitored_count': total_attacks - blocked_count,
-                'avg_confidence': avg_confidence,
-                'severity_distribution': {
-                    'CRITICAL': len([a for a in formatted_attacks if a['severity'] == 'CRITICAL']),
-                    'HIGH': len([a for a in formatted_attacks if a['severity'] == 'HIGH']),
-                    'LOW': len([a for a in formatted_attacks if a['severity'] == 'LOW'])
-                },
-                'attack_types': list(set(a['attackType'] for a in formatted_attacks))
-            },
-            'schema_info': {
-                'has_real_confidence': any(a['model_confidence'] > 0 for a in formatted_attacks),
-                'has_client_ip': any(a['client_ip'] != 'N/A' for a in formatted_attacks),
-                'available_features': ['count', 'srv_count', 'serror_rate', 'srv_serror_rate', 'src_bytes', 'dst_bytes']
-            }
-        })
+    ?view=incidents (the default while NIDS_ATTACK_ROWS=0) streams incidents
+    with count-weighted statistics instead.
+    """
+    try:
+        if not db:
+            raise ConnectionError('Database not available')
+        if incidents_view():
+            summary = IncidentSummary()
+            return stream_response(incident_batches(), 'incidents', summary.add, summary.as_dict)
+        summary = AttackSummary()
+        batches = db.iter_attack_details(stream_limit(), STREAM_BATCH_SIZE)
+        return stream_response(batches, 'attacks', summary.add, summary.as_dict)
 
     except Exception as e:
         return jsonify({
@@ -1139,6 +1732,113 @@ def get_attacks_optimized():
             'schema': 'Make sure your attacks table has columns: id, prediction_id, timestamp, attack_type, severity'
         }), 500
 
+@app.route('/api/predictions/search', methods=['GET'])
+def search_predictions():
+    """Predictions between ?start= and ?end= (ISO dates), newest first, streamed
+    
+    Optional filters: ?is_attack=0|1, ?min_confidence=, ?limit= (default 1000).
+    """
+    try:
+        if not db:
+            raise ConnectionError('Database not available')
+        end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else datetime.now()
+        start = (datetime.fromisoformat(request.args['start']) if 'start' in request.args
+                 else end - pd.Timedelta(days=1))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'invalid date: {e}'}), 400
+    except ConnectionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    is_attack = request.args.get('is_attack', type=int)
+    min_confidence = request.args.get('min_confidence', type=float)
+    try:
+        batches = db.iter_predictions(db._timestamp(start), db._timestamp(end), is_attack, min_confidence,
+                                      stream_limit(1000), STREAM_BATCH_SIZE)
+        return stream_response(batches, 'predictions')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/shadow/stats', methods=['GET'])
+def shadow_stats():
+    """Shadow scoring agreement, score deltas and latency per alternate model"""
+    return jsonify({
+        'success': True,
+        'shadow': shadow_scorer.summary(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Response cache hit rate, size and recompute latency for this worker"""
+    return jsonify({
+        'success': True,
+        'enabled': CACHE_CONFIG['enabled'],
+        'cache': response_cache.stats()
+    })
+
+@app.route('/api/top-talkers', methods=['GET'])
+def get_top_talkers():
+    """Busiest sources, attack sources and attack types over the last ?minutes=
+    
+    Counts are Space-Saving estimates: each entry's true count lies between
+    `guaranteed` and `count`, and no source missing from the list has more
+    than `untracked_max`.
+    """
+    k = max(1, min(request.args.get('k', 10, type=int), TOP_TALKERS_CONFIG['capacity']))
+    minutes = request.args.get('minutes', type=float)
+    result = top_talkers.top(k, seconds=minutes * 60 if minutes else None)
+    result['since'] = datetime.fromtimestamp(result['since']).isoformat()
+    return jsonify({'success': True, **result})
+
+@app.route('/api/drift', methods=['GET'])
+def get_drift():
+    """Feature drift of scored traffic against the training baseline
+    
+    ?format=prometheus returns the scores in Prometheus text format.
+    """
+    if not drift_monitor:
+        return jsonify({'success': False, 'error': 'Drift monitor is not enabled'}), 503
+    if request.args.get('format') == 'prometheus':
+        return Response(drift_monitor.metrics_text(), mimetype='text/plain; version=0.0.4')
+    return jsonify({'success': True, **drift_monitor.report()})
+
+@app.route('/api/rules', methods=['GET'])
+def get_rules():
+    """Active detection rule table"""
+    table = detection_rules.current()
+    return jsonify({
+        'success': True,
+        'rules': table.describe(),
+        'path': detection_rules.path,
+        'loaded_at': datetime.fromtimestamp(detection_rules.loaded_at).isoformat(),
+        'last_error': detection_rules.last_error,
+        'probability_mode': pipeline.rule_probabilities
+    })
+
+MAX_EXPORT_ROWS = int(os.getenv('NIDS_MAX_EXPORT_ROWS', 1000000))
+
+@app.route('/api/export/<table>.parquet', methods=['GET'])
+def export_parquet(table):
+    """Stream predictions or attacks with id > ?after_id= as one Parquet file
+    
+    Rows come from an unbuffered cursor a batch at a time and leave as one
+    row group per batch, so the response never sits in memory. Clients
+    export incrementally by passing the largest id of their last file.
+    """
+    if table not in EXPORT_COLUMNS:
+        return jsonify({'success': False, 'error': f'unknown table: {table}',
+                        'tables': list(EXPORT_COLUMNS)}), 404
+    if pa is None:
+        return jsonify({'success': False, 'error': 'Parquet export needs pyarrow (pip install pyarrow)'}), 501
+    if not db:
+        return jsonify({'success': False, 'error': 'Database not available'}), 503
+    
+    after_id = request.args.get('after_id', 0, type=int)
+    limit = min(request.args.get('limit', MAX_EXPORT_ROWS, type=int), MAX_EXPORT_ROWS)
+    filename = f"{table}-after-{after_id}.parquet"
+    return Response(stream_parquet(db, table, after_id, limit), mimetype=PARQUET_MIME,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @app.route('/api/debug_db', methods=['GET'])
 def debug_database():
     """6. Debug database"""
@@ -1194,7 +1894,10 @@ def debug_model():
             'feature_columns_count': len(feature_columns),
             'feature_mapping_count': len(feature_mapping),
             'scaler_type': str(type(scaler)),
-            'pca_type': str(type(pca_model))
+            'pca_type': str(type(pca_model)),
+            'model_file': MODEL_FILE,
+            'n_estimators': len(rf_model.estimators_),
+            'forest_eval': pipeline.forest_eval
         }
         
         return jsonify({
@@ -1212,20 +1915,38 @@ def debug_model():
 # ============ STATIC FILE ROUTES FOR REACT ============
 # These are the CRITICAL routes that fix the reload issue
 
+STATIC_RELOAD = os.getenv('NIDS_STATIC_RELOAD') == '1'
+static_assets = StaticAssetIndex(STATIC_FOLDER, reload=STATIC_RELOAD,
+                                 check_interval=float(os.getenv('NIDS_STATIC_CHECK_INTERVAL', 1.0)))
+
+def serve_asset(key):
+    """Serve an indexed static file from memory, or 404"""
+    asset = static_assets.get(key)
+    if asset is None:
+        abort(404)
+    return static_assets.response(asset, request)
+
+def serve_index_html():
+    """Serve index.html from memory (React Router handles the path)"""
+    asset = static_assets.get_index()
+    if asset is None:
+        return jsonify({'error': 'index.html not found in static folder'}), 404
+    return static_assets.response(asset, request)
+
 @app.route('/static/css/<path:filename>')
 def serve_static_css(filename):
     """Serve CSS files from static/css folder"""
-    return send_from_directory(os.path.join(STATIC_FOLDER, 'css'), filename)
+    return serve_asset(f'css/{filename}')
 
 @app.route('/static/js/<path:filename>')
 def serve_static_js(filename):
     """Serve JS files from static/js folder"""
-    return send_from_directory(os.path.join(STATIC_FOLDER, 'js'), filename)
+    return serve_asset(f'js/{filename}')
 
 @app.route('/static/media/<path:filename>')
 def serve_static_media(filename):
     """Serve media files from static/media folder"""
-    return send_from_directory(os.path.join(STATIC_FOLDER, 'media'), filename)
+    return serve_asset(f'media/{filename}')
 
 # Serve other static files (favicon, images, etc.)
 @app.route('/<path:filename>')
@@ -1235,20 +1956,19 @@ def serve_other_static(filename):
     if filename.startswith('api/'):
         return jsonify({'error': 'API route not found'}), 404
     
-    file_path = os.path.join(STATIC_FOLDER, filename)
-    
-    # If it's a file that exists, serve it
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return send_from_directory(STATIC_FOLDER, filename)
+    # If it's an indexed file, serve it
+    asset = static_assets.get(filename)
+    if asset is not None:
+        return static_assets.response(asset, request)
     
     # For all other routes, serve index.html (React Router will handle it)
-    return send_file(os.path.join(STATIC_FOLDER, 'index.html'))
+    return serve_index_html()
 
 # Serve index.html for root path
 @app.route('/')
 def serve_index():
     """Serve React's index.html for root path"""
-    return send_file(os.path.join(STATIC_FOLDER, 'index.html'))
+    return serve_index_html()
 
 # ============ DEBUG ENDPOINT ============
 @app.route('/debug/paths', methods=['GET'])
@@ -1259,13 +1979,15 @@ def debug_paths():
         'static_folder': STATIC_FOLDER,
         'static_folder_exists': os.path.exists(STATIC_FOLDER),
         'index_html_exists': os.path.exists(os.path.join(STATIC_FOLDER, 'index.html')),
+        'static_files_indexed': len(static_assets.assets),
+        'static_reload': STATIC_RELOAD,
         'current_working_dir': os.getcwd()
     })
 
 # ============ MAIN ============
 if __name__ == '__main__':
     print("\n" + "="*60)
-    print("📡 ALL 10 API ENDPOINTS:")
+    print("📡 ALL 19 API ENDPOINTS:")
     print("="*60)
     print("  1. POST /api/predict    - Classify network traffic")
     print("  2. POST /api/batch-predict - Batch predict from CSV")
@@ -1277,6 +1999,15 @@ if __name__ == '__main__':
     print("  8. GET  /api/debug_model - Debug model info")
     print("  9. GET  /api/attacks    - Get recent attacks")
     print(" 10. GET  /api/attacks/optimized - Get recent attacks (optimized)")
+    print(" 11. GET  /api/shadow/stats - Shadow model agreement and latency")
+    print(" 12. GET  /api/rules      - Active detection rules")
+    print(" 13. POST /api/predict/batch - Batch predict from JSON/MessagePack arrays")
+    print(" 14. GET  /api/export/<table>.parquet - Stream predictions/attacks as Parquet")
+    print(" 15. GET  /api/predictions/search - Stream predictions in a date range")
+    print(" 16. POST /api/jobs       - Queue a CSV batch job (status, results, download, cancel)")
+    print(" 17. GET  /api/top-talkers - Busiest sources and attack types per time window")
+    print(" 18. GET  /api/cache/stats - Response cache hit rate and recompute latency")
+    print(" 19. GET  /api/drift - Feature drift against the training baseline (PSI/KS)")
     print("="*60)
     print("🌐 REACT APP SERVING ENABLED")
     print(f"📁 Serving from: {STATIC_FOLDER}")
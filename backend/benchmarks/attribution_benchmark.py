@@ -0,0 +1,117 @@
+# benchmarks/attribution_benchmark.py - cost and checks of forest attributions
+#
+#   python benchmarks/attribution_benchmark.py --rows 20000
+#
+# Explains synthetic KDD-like traffic (compress_model.kdd_like_traffic) with
+# utils/attributions. Checks that base + contributions equals the forest's
+# attack probability, before and after the mapping through PCA, and matches
+# a per-row reference walk of decision_path() on a sample. Reports timings
+# next to the scoring they are attached to, and the features that drive
+# each traffic class.
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+import compress_model  # noqa: E402  (loads the app models without a database)
+
+nids = compress_model.nids
+
+
+def reference_saabas(forest, Z):
+    """Per-row, per-node Saabas contributions straight from decision_path()"""
+    total = np.zeros(Z.shape)
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        values = tree.value[:, 0, :]
+        proba = values[:, 1] / values.sum(axis=1)
+        paths = estimator.decision_path(Z)
+        for i in range(len(Z)):
+            nodes = paths.indices[paths.indptr[i]:paths.indptr[i + 1]]
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                total[i, tree.feature[parent]] += proba[child] - proba[parent]
+    return total / len(forest.estimators_)
+
+
+def single_row_ms(fn, X, repeat):
+    times = []
+    for i in range(repeat):
+        row = X[i % len(X):i % len(X) + 1]
+        started = time.perf_counter()
+        fn(row)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def batch_ms(fn, X, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Forest attribution benchmark')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=1000, help='single-row calls per mode')
+    parser.add_argument('--reference', type=int, default=200, help='rows checked against decision_path()')
+    args = parser.parse_args()
+
+    pipeline = nids.pipeline
+    forest = pipeline.forest
+    forest.n_jobs = 1  # As a pre-fork worker scores (NIDS_MODEL_JOBS=1)
+    explainer = pipeline.explainer
+    started = time.perf_counter()
+    type(explainer)(forest)
+    print(f"\n📊 Explainer for {explainer.n_trees} trees x {explainer.n_features} PCA components: "
+          f"built in {(time.perf_counter() - started) * 1000:.0f} ms, {explainer.nbytes / 1e6:.1f} MB")
+
+    X, _ = compress_model.kdd_like_traffic(args.rows, seed=5)
+    Z = pipeline.transform(X)
+    exact = pipeline.forest_walk.predict_proba(Z)[:, 1]
+    components = explainer.explain(Z)
+    explanations = pipeline.explain(X)
+    print(f"  max |base + PCA contributions - forest probability|: "
+          f"{np.abs(explainer.base + components.sum(axis=1) - exact).max():.2e}")
+    print(f"  max |base + input contributions + other - forest probability|: "
+          f"{np.abs(explanations.model_attack_probability / 100 - exact).max():.2e}")
+    sample = min(args.reference, len(Z))
+    print(f"  max |Δ| vs decision_path() reference on {sample} rows: "
+          f"{np.abs(reference_saabas(forest, Z[:sample]) - components[:sample]).max():.2e}")
+    print(f"  mean |other| (model columns serving leaves at zero): {np.abs(explanations.other).mean():.3f} pp")
+
+    single = min(args.single, len(X))
+    print(f"\n| step | 1-row ms (median of {single}) | {len(X):,}-row batch ms | rows/s |")
+    print("|---|---|---|---|")
+    modes = [
+        ('pipeline.score', pipeline.score),
+        ('pipeline.explain', pipeline.explain),
+        ('decision_path() reference', lambda rows: reference_saabas(forest, pipeline.transform(rows))),
+    ]
+    for label, fn in modes:
+        one = single_row_ms(fn, X, min(single, 50) if 'reference' in label else single)
+        many = batch_ms(fn, X[:sample] if 'reference' in label else X, repeat=1 if 'reference' in label else 3)
+        rows = sample if 'reference' in label else len(X)
+        print(f"| {label} | {one:.3f} | {many:.1f}{' (' + str(rows) + ' rows)' if rows != len(X) else ''} "
+              f"| {rows / many * 1000:,.0f} |")
+
+    # Which features push each traffic class towards attack
+    kinds = np.random.default_rng(5).choice(list(compress_model.TRAFFIC_MIX), size=args.rows,
+                                            p=list(compress_model.TRAFFIC_MIX.values()))
+    print("\n| traffic | mean attack % | top contributions (pp) |")
+    print("|---|---|---|")
+    for kind in compress_model.TRAFFIC_MIX:
+        mask = kinds == kind
+        mean = explanations.contributions[mask].mean(axis=0)
+        top = np.argsort(-np.abs(mean))[:3]
+        listed = ', '.join(f"{explanations.features[j]} {mean[j]:+.1f}" for j in top)
+        print(f"| {kind} | {explanations.model_attack_probability[mask].mean():.1f} | {listed} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/early_exit_benchmark.py - early-exit vs full forest evaluation
+#
+#   python benchmarks/early_exit_benchmark.py --rows 50000
+#
+# Scores synthetic KDD-like traffic (compress_model.kdd_like_traffic) with
+# the served forest three ways: RandomForestClassifier.predict_proba, the
+# exact tree walk of utils/early_exit, and early-exit decisions. Checks that
+# every early decision matches decide_attack on the exact probabilities and
+# that the bounds contain them, then reports trees evaluated and timings.
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+import compress_model  # noqa: E402  (loads the app models without a database)
+from utils.early_exit import EarlyExitForest  # noqa: E402
+from utils.scoring import ATTACK_THRESHOLD, decide_attack  # noqa: E402
+
+nids = compress_model.nids
+
+
+def single_row_ms(fn, Z, repeat):
+    times = []
+    for i in range(repeat):
+        row = Z[i % len(Z):i % len(Z) + 1]
+        started = time.perf_counter()
+        fn(row)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def batch_ms(fn, Z, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(Z)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Early-exit forest benchmark')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--single', type=int, default=2000, help='single-row calls per mode')
+    parser.add_argument('--batch', type=int, default=10000, help='rows per batch call')
+    args = parser.parse_args()
+
+    forest = nids.pipeline.forest
+    forest.n_jobs = 1  # As a pre-fork worker scores (NIDS_MODEL_JOBS=1)
+    early = EarlyExitForest(forest, ATTACK_THRESHOLD)
+
+    X, _ = compress_model.kdd_like_traffic(args.rows, seed=3)
+    # Rows a detection rule matches never reach the forest
+    X = X[nids.detection_rules.current().evaluate(X) == -1]
+    Z = nids.pipeline.transform(X)
+
+    exact = forest.predict_proba(Z)[:, 1]
+    walked = early.predict_proba(Z)[:, 1]
+    result = early.decide(Z)
+    expected = decide_attack(exact, 1 - exact)
+    print(f"\n📊 {len(Z):,} KDD-like rows that reach the forest ({int(expected.sum()):,} attack decisions)")
+    print(f"  exact walk max |Δp| vs predict_proba: {np.abs(walked - exact).max():.2e}")
+    print(f"  early decisions matching decide_attack: {np.mean(result.decision == expected) * 100:.3f}%")
+    inside = (result.attack_low - 1e-9 <= exact) & (exact <= result.attack_high + 1e-9)
+    print(f"  exact probability inside bounds: {inside.mean() * 100:.3f}%")
+    print(f"  mean |estimate - exact|: {np.abs(result.estimate - exact).mean():.4f}")
+
+    trees = result.trees_evaluated
+    print(f"\n| rows | share | mean trees evaluated (of {early.n_trees}) | median |")
+    print("|---|---|---|---|")
+    for label, mask in (('all', np.ones(len(Z), dtype=bool)), ('attack decisions', expected == 1),
+                        ('normal decisions', expected == 0)):
+        if mask.any():
+            print(f"| {label} | {mask.mean() * 100:.1f}% | {trees[mask].mean():.1f} | {np.median(trees[mask]):.0f} |")
+
+    single = min(args.single, len(Z))
+    batch = Z[:args.batch]
+    modes = [
+        ('RandomForestClassifier.predict_proba', forest.predict_proba),
+        ('exact tree walk', early.predict_proba),
+        ('early exit', early.decide),
+    ]
+    print(f"\n| mode | 1-row ms (median of {single}) | {len(batch):,}-row batch ms | rows/s |")
+    print("|---|---|---|---|")
+    for label, fn in modes:
+        one = single_row_ms(fn, Z, single)
+        many = batch_ms(fn, batch)
+        print(f"| {label} | {one:.3f} | {many:.1f} | {len(batch) / many * 1000:,.0f} |")
+
+    # End to end through ScoringPipeline.score (rules, transform, forest)
+    raw = X[:single]
+    for label, exact_mode in (('pipeline.score exact', True), ('pipeline.score early', False)):
+        one = single_row_ms(lambda row: nids.pipeline.score(row, exact=exact_mode), raw, single)
+        print(f"  {label}: {one:.3f} ms per row")
+
+
+if __name__ == '__main__':
+    main()
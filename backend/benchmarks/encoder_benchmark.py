@@ -0,0 +1,81 @@
+# benchmarks/encoder_benchmark.py - response encoding cost per format
+#
+#   python benchmarks/encoder_benchmark.py --rows 100000
+#
+# Encodes one column-oriented batch result (the /api/predict/batch response
+# body) with every encoder in utils/encoders, next to the two ways it was
+# encoded before: per-row dicts through json.dumps (as /api/batch-predict
+# builds them) and columns converted with tolist() then json.dumps.
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+from utils.encoders import ENCODERS, available, orjson  # noqa: E402
+from utils.scoring import risk_levels  # noqa: E402
+
+
+def batch_result(n):
+    rng = np.random.default_rng(11)
+    attack_prob = rng.beta(0.5, 0.5, n)
+    prediction = (attack_prob > 0.5).astype(np.int64)
+    confidence = np.maximum(attack_prob, 1 - attack_prob) * 100
+    attack_pct, normal_pct = attack_prob * 100, (1 - attack_prob) * 100
+    _, levels = risk_levels(prediction, confidence, attack_pct, normal_pct)
+    columns = {
+        'prediction': prediction,
+        'confidence': np.round(confidence, 2),
+        'attack_probability': np.round(attack_pct, 2),
+        'normal_probability': np.round(normal_pct, 2),
+        'risk_level': levels,
+        'rule_index': np.where(rng.random(n) < 0.05, rng.integers(0, 4, n), -1),
+    }
+    meta = {'success': True, 'count': n, 'summary': {'attack_count': int(prediction.sum())}}
+    return columns, meta
+
+
+def row_dicts_json(columns, meta):
+    names = list(columns)
+    rows = [dict(zip(names, row)) for row in zip(*(v.tolist() for v in columns.values()))]
+    return json.dumps({**meta, 'predictions': rows}, separators=(',', ':')).encode()
+
+
+def tolist_json(columns, meta):
+    body = {**meta, 'columns': {name: values.tolist() for name, values in columns.items()}}
+    return json.dumps(body, separators=(',', ':')).encode()
+
+
+def best_of(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - began)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Response encoder benchmark')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    columns, meta = batch_result(args.rows)
+    cases = [
+        ('row dicts + json.dumps (before)', row_dicts_json),
+        ('columns tolist + json.dumps (before)', tolist_json),
+    ] + [(f'{name}' + (' (orjson)' if name == 'json' and orjson else ''), ENCODERS[name].encode_columns)
+         for name in available(ENCODERS)]
+
+    print(f"\n| encoder, {args.rows:,} rows | ms (best of {args.repeat}) | body bytes | ns/row |")
+    print("|---|---|---|---|")
+    for label, encode in cases:
+        seconds, body = best_of(lambda: encode(columns, meta), args.repeat)
+        print(f"| {label} | {seconds * 1000:.1f} | {len(body):,} | {seconds / args.rows * 1e9:.0f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/feature_codec_benchmark.py - JSON text vs binary feature blobs
+#
+#   python benchmarks/feature_codec_benchmark.py --rows 200000
+#   python benchmarks/feature_codec_benchmark.py --rows 200000 --mysql
+#
+# Compares the legacy raw_features JSON text with utils/feature_codec blobs:
+# bytes per row, encode and bulk-decode cost, and insert throughput into a
+# table holding only the feature column. Inserts go to an in-memory SQLite
+# table by default; --mysql uses DatabaseConfig.DEV and a scratch table.
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+from utils.feature_codec import FEATURE_LAYOUTS, decode_many, encode_features  # noqa: E402
+
+FEATURES = FEATURE_LAYOUTS[1]
+
+
+def sample_rows(n):
+    """Feature dicts with KDD-like magnitudes, as the API would receive them"""
+    rng = np.random.default_rng(3)
+    counts = rng.integers(0, 512, (n, 2)).astype(float)
+    hosts = rng.integers(0, 256, (n, 2)).astype(float)
+    rates = rng.choice([0.0, 0.0, 0.0, 0.01, 0.5, 1.0], (n, 4))
+    columns = np.column_stack([
+        rng.integers(0, 60, n).astype(float),
+        rng.integers(0, 60000, n).astype(float),
+        rng.integers(0, 20000, n).astype(float),
+        counts, rates[:, :2], hosts, rates[:, 2:],
+    ])
+    return [dict(zip(FEATURES, row)) for row in columns.tolist()]
+
+
+def timed(fn):
+    began = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - began
+
+
+def insert_rate(connect, placeholder, values, column_type, chunk=1000):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE IF EXISTS nids_codec_bench')
+    cursor.execute(f'CREATE TABLE nids_codec_bench (id INTEGER PRIMARY KEY, features {column_type})')
+    sql = f'INSERT INTO nids_codec_bench (features) VALUES ({placeholder})'
+    began = time.perf_counter()
+    for i in range(0, len(values), chunk):
+        cursor.executemany(sql, [(v,) for v in values[i:i + chunk]])
+        conn.commit()
+    elapsed = time.perf_counter() - began
+    cursor.execute('DROP TABLE nids_codec_bench')
+    conn.commit()
+    conn.close()
+    return len(values) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature storage encoding benchmark')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--mysql', action='store_true', help='measure inserts against MySQL instead of SQLite')
+    args = parser.parse_args()
+
+    rows = sample_rows(args.rows)
+    texts, json_encode = timed(lambda: [json.dumps(r) for r in rows])
+    blobs, blob_encode = timed(lambda: [encode_features(r) for r in rows])
+    _, json_decode = timed(lambda: np.array([[json.loads(t)[f] for f in FEATURES] for t in texts]))
+    X, blob_decode = timed(lambda: decode_many(blobs))
+
+    truth = np.array([[r[f] for f in FEATURES] for r in rows])
+    rel_err = np.max(np.abs(X - truth) / np.maximum(np.abs(truth), 1.0))
+
+    if args.mysql:
+        import mysql.connector
+        from config.database_config import DatabaseConfig
+        config = {k: DatabaseConfig.DEV[k] for k in ('host', 'port', 'user', 'password', 'database')}
+        connect, placeholder, types = lambda: mysql.connector.connect(**config), '%s', ('TEXT', 'VARBINARY(255)')
+    else:
+        connect, placeholder, types = lambda: sqlite3.connect(':memory:'), '?', ('TEXT', 'BLOB')
+    text_rate = insert_rate(connect, placeholder, texts, types[0])
+    blob_rate = insert_rate(connect, placeholder, blobs, types[1])
+
+    n = len(rows)
+    print(f"\n| {n:,} rows | JSON text | float32 blob |")
+    print("|---|---|---|")
+    print(f"| bytes per row (mean) | {np.mean([len(t) for t in texts]):.0f} | {np.mean([len(b) for b in blobs]):.0f} |")
+    print(f"| encode µs/row | {json_encode / n * 1e6:.2f} | {blob_encode / n * 1e6:.2f} |")
+    print(f"| decode to matrix µs/row | {json_decode / n * 1e6:.2f} | {blob_decode / n * 1e6:.3f} |")
+    print(f"| inserts/s ({'MySQL' if args.mysql else 'SQLite'}, batches of 1000) | {text_rate:,.0f} | {blob_rate:,.0f} |")
+    print(f"\nmax relative float32 error: {rel_err:.2e}")
+
+
+if __name__ == '__main__':
+    main()
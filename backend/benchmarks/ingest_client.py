@@ -0,0 +1,89 @@
+# benchmarks/ingest_client.py - throughput test for ingest_server.py
+#
+#   python benchmarks/ingest_client.py --tcp 127.0.0.1:9000 --sensors 8 --records 50000
+#
+# Each simulated sensor streams --records newline-delimited JSON records as
+# fast as the server accepts them while a reader task consumes verdicts.
+import argparse
+import asyncio
+import json
+import random
+import time
+
+FEATURES = [
+    'duration', 'src_bytes', 'dst_bytes', 'count', 'srv_count',
+    'serror_rate', 'srv_serror_rate', 'dst_host_count',
+    'dst_host_srv_count', 'dst_host_serror_rate', 'dst_host_srv_serror_rate'
+]
+
+
+def make_lines(n, attack_ratio, compact):
+    lines = []
+    for i in range(n):
+        if random.random() < attack_ratio:
+            values = [0, 0, 0, random.randint(101, 600), 500, 1.0, 1.0, 255, 255, 1.0, 1.0]
+        else:
+            values = [random.uniform(0, 5), random.randint(100, 2000), random.randint(100, 5000),
+                      random.randint(1, 20), random.randint(1, 20), 0.0, 0.0,
+                      random.randint(1, 255), random.randint(1, 30), 0.0, 0.0]
+        record = values if compact else {'id': i, **dict(zip(FEATURES, values))}
+        lines.append(json.dumps(record))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+async def sensor(args, payload, n):
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        host, port = args.tcp.rsplit(':', 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+
+    async def send():
+        view = memoryview(payload)
+        for start in range(0, len(payload), 65536):
+            writer.write(view[start:start + 65536])
+            await writer.drain()
+        writer.write_eof()
+
+    async def receive():
+        received = 0
+        while received < n:
+            line = await reader.readline()
+            if not line:
+                break
+            received += 1
+        return received
+
+    _, received = await asyncio.gather(send(), receive())
+    writer.close()
+    return received
+
+
+async def run(args):
+    payload = make_lines(args.records, args.attack_ratio, args.compact)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(sensor(args, payload, args.records) for _ in range(args.sensors)))
+    elapsed = time.perf_counter() - started
+    total = sum(results)
+    print(json.dumps({
+        'sensors': args.sensors,
+        'records': total,
+        'seconds': round(elapsed, 2),
+        'records_per_sec': round(total / elapsed)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest server throughput test')
+    parser.add_argument('--tcp', default='127.0.0.1:9000')
+    parser.add_argument('--unix')
+    parser.add_argument('--sensors', type=int, default=8)
+    parser.add_argument('--records', type=int, default=50000, help='records per sensor')
+    parser.add_argument('--attack-ratio', type=float, default=0.2)
+    parser.add_argument('--compact', action='store_true', help='send JSON arrays instead of objects')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/load_test.py - closed-loop HTTP load generator for /api/predict
+#
+#   python benchmarks/load_test.py --url http://127.0.0.1:8000 --clients 8 --requests 2000
+#
+# Each client thread keeps one HTTP/1.1 connection open and sends requests
+# back to back. --attack-ratio controls how many payloads match a manual
+# detection rule (and so skip model inference).
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+NORMAL_SAMPLE = {
+    'duration': 2, 'src_bytes': 180, 'dst_bytes': 420, 'count': 8, 'srv_count': 8,
+    'serror_rate': 0.0, 'srv_serror_rate': 0.0, 'dst_host_count': 110,
+    'dst_host_srv_count': 14, 'dst_host_serror_rate': 0.0, 'dst_host_srv_serror_rate': 0.0
+}
+
+ATTACK_SAMPLE = {
+    'duration': 0, 'src_bytes': 0, 'dst_bytes': 0, 'count': 511, 'srv_count': 511,
+    'serror_rate': 1.0, 'srv_serror_rate': 1.0, 'dst_host_count': 255,
+    'dst_host_srv_count': 255, 'dst_host_serror_rate': 1.0, 'dst_host_srv_serror_rate': 1.0
+}
+
+
+def payload(attack_ratio):
+    base = ATTACK_SAMPLE if random.random() < attack_ratio else NORMAL_SAMPLE
+    sample = dict(base)
+    sample['src_bytes'] = base['src_bytes'] * random.uniform(0.5, 1.5)
+    sample['dst_host_count'] = random.randint(1, 255)
+    return json.dumps(sample)
+
+
+def client(url, path, count, attack_ratio, latencies, errors):
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    for _ in range(count):
+        body = payload(attack_ratio)
+        started = time.perf_counter()
+        try:
+            conn.request('POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the NIDS prediction endpoint')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/api/predict')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help='total requests')
+    parser.add_argument('--attack-ratio', type=float, default=0.2)
+    parser.add_argument('--warmup', type=int, default=50)
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    client(url, args.path, args.warmup, args.attack_ratio, [], [])
+
+    latencies, errors = [], []
+    per_client = max(1, args.requests // args.clients)
+    threads = [
+        threading.Thread(target=client, args=(url, args.path, per_client, args.attack_ratio, latencies, errors))
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    print(json.dumps({
+        'clients': args.clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(float(np.percentile(lat, 50)), 2),
+            'p95': round(float(np.percentile(lat, 95)), 2),
+            'p99': round(float(np.percentile(lat, 99)), 2)
+        }
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# benchmarks/partition_benchmark.py - partitioned vs unpartitioned predictions
+#
+#   python benchmarks/partition_benchmark.py --rows 50000000 --days 90
+#   python benchmarks/partition_benchmark.py --rows 2000000 --days 30 --json partitions.json
+#   python benchmarks/partition_benchmark.py --skip-load     # reuse loaded tables
+#
+# Loads the same synthetic rows into two copies of the predictions table,
+# one plain and one day-partitioned by config.partition_manager, then
+# measures single-row insert latency at the head of the table, typical
+# dashboard range queries, and purging the oldest day (DELETE vs DROP
+# PARTITION). Run from backend/ against a scratch database: the tables are
+# dropped and recreated unless --skip-load is given.
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+sys.path.insert(0, '.')
+from config.database_config import DatabaseConfig  # noqa: E402
+from config.partition_manager import PartitionManager  # noqa: E402
+
+PLAIN = 'nids_bench_plain'
+PARTITIONED = 'nids_bench_part'
+
+SCHEMA = '''
+    CREATE TABLE {table} (
+        id INT AUTO_INCREMENT,
+        timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        prediction INT,
+        prediction_label VARCHAR(20),
+        confidence DECIMAL(5,2),
+        attack_probability DECIMAL(5,2),
+        normal_probability DECIMAL(5,2),
+        src_bytes BIGINT,
+        dst_bytes BIGINT,
+        count INT,
+        srv_count INT,
+        serror_rate DECIMAL(5,4),
+        srv_serror_rate DECIMAL(5,4),
+        is_attack BOOLEAN,
+        client_ip VARCHAR(45),
+        raw_features TEXT,
+        PRIMARY KEY ({primary_key}),
+        INDEX idx_timestamp (timestamp),
+        INDEX idx_is_attack (is_attack)
+    ) ENGINE=InnoDB
+'''
+
+INSERT = '''
+    INSERT INTO {table} (timestamp, prediction, prediction_label, confidence,
+        attack_probability, normal_probability, src_bytes, dst_bytes, count, srv_count,
+        serror_rate, srv_serror_rate, is_attack, client_ip, raw_features)
+    VALUES {values}
+'''
+
+ROW = '(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+
+
+def make_row(ts, rng):
+    attack = rng.random() < 0.2
+    return (ts, int(attack), 'HIGH Attack' if attack else 'Normal', round(rng.uniform(60, 100), 2),
+            round(rng.uniform(0, 100), 2), round(rng.uniform(0, 100), 2),
+            rng.randint(0, 100000), rng.randint(0, 10000), rng.randint(0, 511), rng.randint(0, 511),
+            0.0, 0.0, attack, f"10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)}", '{}')
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return pick(0.50), pick(0.95), pick(0.99)
+
+
+def create_tables(connect, days, start):
+    conn = connect()
+    cursor = conn.cursor()
+    for table in (PLAIN, PARTITIONED):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(SCHEMA.format(table=PLAIN, primary_key='id'))
+    cursor.execute(SCHEMA.format(table=PARTITIONED, primary_key='id, timestamp'))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    # Same DDL path the application uses, with history covering every loaded day
+    manager = PartitionManager(connect, granularity='day', retention_days=days + 1,
+                               ahead=days + 2, tables=(PARTITIONED,))
+    manager.convert(today=start.date())
+
+
+def load(connect, rows, days, chunk, start):
+    rng = random.Random(7)
+    step = timedelta(days=days) / rows
+    conn = connect()
+    cursor = conn.cursor()
+    began = time.perf_counter()
+    for table in (PLAIN, PARTITIONED):
+        table_began = time.perf_counter()
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            batch = [make_row(start + step * (offset + i), rng) for i in range(n)]
+            sql = INSERT.format(table=table, values=', '.join([ROW] * n))
+            cursor.execute(sql, [value for row in batch for value in row])
+            conn.commit()
+            if offset and offset % (chunk * 200) == 0:
+                rate = offset / (time.perf_counter() - table_began)
+                print(f"  {table}: {offset:,} rows ({rate:,.0f} rows/s)", flush=True)
+        print(f"✅ Loaded {rows:,} rows into {table} in {time.perf_counter() - table_began:.0f} s")
+    cursor.close()
+    conn.close()
+    return time.perf_counter() - began
+
+
+def time_inserts(connect, table, n, now):
+    rng = random.Random(11)
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    samples = []
+    sql = INSERT.format(table=table, values=ROW)
+    for _ in range(n):
+        row = make_row(now, rng)
+        began = time.perf_counter()
+        cursor.execute(sql, row)
+        samples.append(time.perf_counter() - began)
+    cursor.close()
+    conn.close()
+    return percentiles(samples)
+
+
+def time_query(connect, sql, params, repeat):
+    conn = connect()
+    cursor = conn.cursor()
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append(time.perf_counter() - began)
+    cursor.close()
+    conn.close()
+    return statistics.median(samples) * 1000
+
+
+def time_purge(connect, start):
+    """Remove the oldest loaded day from each table"""
+    conn = connect()
+    cursor = conn.cursor()
+    cutoff = (start + timedelta(days=1)).date()
+
+    began = time.perf_counter()
+    cursor.execute(f"DELETE FROM {PLAIN} WHERE timestamp < %s", (cutoff,))
+    deleted = cursor.rowcount
+    conn.commit()
+    plain = time.perf_counter() - began
+
+    cursor.execute('''
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY PARTITION_ORDINAL_POSITION LIMIT 2
+    ''', (PARTITIONED,))
+    names = [name for (name,) in cursor.fetchall()]
+    began = time.perf_counter()
+    cursor.execute(f"ALTER TABLE {PARTITIONED} DROP PARTITION {', '.join(names)}")
+    partitioned = time.perf_counter() - began
+    cursor.close()
+    conn.close()
+    return deleted, plain * 1000, partitioned * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Partitioned vs unpartitioned predictions benchmark')
+    parser.add_argument('--env', default='DEV', choices=['DEV', 'PROD'])
+    parser.add_argument('--rows', type=int, default=50_000_000)
+    parser.add_argument('--days', type=int, default=90, help='days of history the rows span')
+    parser.add_argument('--chunk', type=int, default=5000, help='rows per bulk INSERT')
+    parser.add_argument('--inserts', type=int, default=2000, help='single-row inserts to time')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per range query')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--skip-purge', action='store_true')
+    parser.add_argument('--json', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    config = DatabaseConfig.DEV if args.env == 'DEV' else DatabaseConfig.PROD
+    connect_args = {k: config[k] for k in ('host', 'port', 'user', 'password', 'database', 'charset')}
+    connect = lambda: mysql.connector.connect(**connect_args)
+
+    now = datetime.now().replace(microsecond=0)
+    start = (now - timedelta(days=args.days)).replace(hour=0, minute=0, second=0)
+    if not args.skip_load:
+        create_tables(connect, args.days, start)
+        load(connect, args.rows, args.days, args.chunk, start)
+
+    queries = [
+        ('attacks, last 24h',
+         "SELECT COUNT(*) FROM {t} WHERE is_attack = 1 AND timestamp >= %s", (now - timedelta(days=1),)),
+        ('rows, last 7 days',
+         "SELECT COUNT(*) FROM {t} WHERE timestamp >= %s", (now - timedelta(days=7),)),
+        ('latest 50 of a day 30 days ago',
+         "SELECT * FROM {t} WHERE timestamp >= %s AND timestamp < %s ORDER BY timestamp DESC LIMIT 50",
+         (now - timedelta(days=30), now - timedelta(days=29))),
+    ]
+
+    results = {'rows': args.rows, 'days': args.days, 'server': server_version(connect)}
+    print("\n| measurement | unpartitioned | day-partitioned |")
+    print("|---|---|---|")
+    plain = time_inserts(connect, PLAIN, args.inserts, now)
+    part = time_inserts(connect, PARTITIONED, args.inserts, now)
+    results['insert_ms_p50_p95_p99'] = {'unpartitioned': plain, 'partitioned': part}
+    print(f"| insert p50/p95/p99 ms | {'/'.join(f'{v:.2f}' for v in plain)} | "
+          f"{'/'.join(f'{v:.2f}' for v in part)} |")
+    results['query_median_ms'] = {}
+    for label, sql, params in queries:
+        plain = time_query(connect, sql.format(t=PLAIN), params, args.repeat)
+        part = time_query(connect, sql.format(t=PARTITIONED), params, args.repeat)
+        results['query_median_ms'][label] = {'unpartitioned': plain, 'partitioned': part}
+        print(f"| {label} (median ms) | {plain:.1f} | {part:.1f} |")
+    if not args.skip_purge:
+        deleted, plain, part = time_purge(connect, start)
+        results['purge_oldest_day'] = {'rows': deleted, 'delete_ms': plain, 'drop_partition_ms': part}
+        print(f"| purge oldest day ({deleted:,} rows) ms | {plain:.0f} (DELETE) | {part:.0f} (DROP PARTITION) |")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.json}")
+
+
+def server_version(connect):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute('SELECT VERSION()')
+    version = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return version
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/storage_benchmark.py - append and query cost per storage backend
+#
+#   python benchmarks/storage_benchmark.py --rows 20000
+#   python benchmarks/storage_benchmark.py --rows 20000 --backends sqlite mysql --json storage.json
+#
+# Appends predictions through PredictionStore.save_predictions one row at a
+# time (as /api/predict does) and in batches of 100 and 1000 (as
+# /api/predict/batch?persist=1 does), then times the queries behind
+# /api/stats, /api/attacks and /api/attacks/optimized. SQLite runs against a
+# fresh file in a temporary directory; mysql uses SimpleDatabase and
+# app.py's MYSQL_CONFIG, so point it at a scratch schema. The backends are
+# printed side by side; one that cannot connect is reported as not run.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+from config.storage import SQLiteStorage  # noqa: E402
+from utils.feature_codec import FEATURE_LAYOUTS  # noqa: E402
+
+FEATURES = FEATURE_LAYOUTS[1]
+
+
+def sample_records(n, attack_rate=0.3):
+    rng = np.random.default_rng(5)
+    X = rng.integers(0, 1000, (n, len(FEATURES))).astype(float)
+    attack = rng.random(n) < attack_rate
+    records = []
+    for i in range(n):
+        p_attack = 85.0 if attack[i] else 10.0
+        records.append(({
+            'prediction': int(attack[i]),
+            'prediction_label': 'HIGH Attack' if attack[i] else 'Normal',
+            'confidence': max(p_attack, 100 - p_attack),
+            'probabilities': {'attack': p_attack, 'normal': 100 - p_attack},
+        }, dict(zip(FEATURES, X[i].tolist())), '10.0.0.%d' % (i % 250)))
+    return records
+
+
+def append_rate(store, records, batch):
+    began = time.perf_counter()
+    for i in range(0, len(records), batch):
+        store.save_predictions(records[i:i + batch])
+    return len(records) / (time.perf_counter() - began)
+
+
+def query_ms(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best * 1000
+
+
+def open_store(backend):
+    if backend == 'mysql':
+        # Load app.py without starting its background threads
+        os.environ.setdefault('NIDS_PREFORK', '1')
+        from app import SimpleDatabase
+        store = SimpleDatabase()
+        conn = store.get_connection()
+        if not conn:
+            raise ConnectionError('no MySQL server reachable')
+        conn.close()
+        return store
+    return SQLiteStorage(os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+
+
+def run(store, rows):
+    # Single-row appends are slow enough that a fraction of the rows suffices
+    single = sample_records(min(rows, 2000))
+    records = sample_records(rows)
+    results = {
+        '1 row per transaction': append_rate(store, single, 1),
+        '100 rows per transaction': append_rate(store, records, 100),
+        '1000 rows per transaction': append_rate(store, records, 1000),
+    }
+    queries = {
+        '/api/stats counts': store.get_statistics,
+        '/api/attacks': store.get_attacks,
+        '/api/attacks/optimized join': store.get_attack_details,
+        'latest 1000 feature vectors': lambda: store.get_recent_features(1000),
+    }
+    results.update((label, query_ms(fn)) for label, fn in queries.items())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Storage backend benchmark')
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--backends', nargs='+', choices=['sqlite', 'mysql'], default=['sqlite'])
+    parser.add_argument('--json', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = run(open_store(backend), args.rows)
+        except Exception as e:
+            print(f"⚠ {backend} not run: {e}")
+            results[backend] = {'error': str(e)}
+
+    total = min(args.rows, 2000) + 2 * args.rows
+    appends = ['1 row per transaction', '100 rows per transaction', '1000 rows per transaction']
+    print(f"\n| appends/s | {' | '.join(args.backends)} |")
+    print('|---' * (len(args.backends) + 1) + '|')
+    for label in appends:
+        print(f"| {label} | " + ' | '.join(f"{results[b][label]:,.0f}" if label in results[b] else 'not run'
+                                          for b in args.backends) + ' |')
+    print(f"\n| {total:,} rows, best of 5 (ms) | {' | '.join(args.backends)} |")
+    print('|---' * (len(args.backends) + 1) + '|')
+    for label in next((r for r in results.values() if 'error' not in r), {}):
+        if label not in appends:
+            print(f"| {label} | " + ' | '.join(f"{results[b][label]:.1f}" if label in results[b] else 'not run'
+                                              for b in args.backends) + ' |')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+# compress_model.py - smaller variants of the served forest
+#
+#   python compress_model.py report
+#   python compress_model.py report --data labeled.csv --candidates trees:25 depth:8 distill:20x8
+#   python compress_model.py export trees:25 --out models/improved_model/rf_trees25.pkl
+#
+# Candidates are derived from models/improved_model/rf_improved.pkl and
+# score the same PCA inputs, so an exported candidate is a drop-in
+# replacement (serve it with NIDS_MODEL_FILE=rf_trees25.pkl):
+#
+#   trees:N      the first N trees of the forest
+#   depth:D      every tree cut back to depth D (internal nodes become leaves)
+#   distill:NxD  a new forest of N trees of depth D trained on the served
+#                forest's attack probabilities (soft labels)
+#
+# The report compares each candidate with the served forest: accuracy,
+# agreement of the predict_traffic attack decision (decide_attack
+# thresholds), mean probability difference, single-row latency, batch
+# throughput and size. Accuracy is measured against --data (the 11
+# REQUIRED_FEATURES plus a `label` column, KDD names or 0/1) when given,
+# otherwise against the labels of the synthetic KDD-like traffic below.
+import argparse
+import copy
+import gc
+import io
+import json
+import os
+import statistics
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree._tree import Tree
+
+# Load the models without opening database connections or starting the
+# Flask app's background threads
+os.environ.setdefault('NIDS_PREFORK', '1')
+import app as nids  # noqa: E402
+from utils.scoring import decide_attack  # noqa: E402
+
+DEFAULT_CANDIDATES = ['trees:50', 'trees:25', 'trees:10', 'depth:12', 'depth:8',
+                      'distill:25x10', 'distill:10x8']
+
+# Share of each traffic class in the KDD Cup 99 10% training set
+TRAFFIC_MIX = {'normal': 0.20, 'smurf': 0.57, 'neptune': 0.22, 'probe': 0.01}
+
+
+# ============ KDD-LIKE TRAFFIC ============
+def kdd_like_traffic(n, seed=0):
+    """Synthetic raw feature rows (REQUIRED_FEATURES order) and 0/1 labels
+
+    Normal sessions have varied byte counts and low error rates; smurf is
+    ICMP echo floods (fixed 520/1032 byte payloads at count 511), neptune
+    SYN floods (every error rate at 1.0) and probes scan many hosts with
+    few connections each.
+    """
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(list(TRAFFIC_MIX), size=n, p=list(TRAFFIC_MIX.values()))
+    X = np.zeros((n, len(nids.REQUIRED_FEATURES)))
+    col = {name: i for i, name in enumerate(nids.REQUIRED_FEATURES)}
+
+    def fill(mask, name, values):
+        X[mask, col[name]] = values[mask] if isinstance(values, np.ndarray) else values
+
+    normal = kinds == 'normal'
+    fill(normal, 'duration', np.where(rng.random(n) < 0.9, 0, rng.exponential(200, n)).round())
+    fill(normal, 'src_bytes', rng.lognormal(5.5, 1.5, n).round())
+    fill(normal, 'dst_bytes', np.where(rng.random(n) < 0.3, 0, rng.lognormal(7, 2, n)).round())
+    count = rng.poisson(8, n) + 1
+    fill(normal, 'count', count)
+    fill(normal, 'srv_count', np.maximum(1, (count * rng.random(n)).round()))
+    serror = np.where(rng.random(n) < 0.95, 0.0, rng.random(n)).round(2)
+    fill(normal, 'serror_rate', serror)
+    fill(normal, 'srv_serror_rate', serror)
+    fill(normal, 'dst_host_count', rng.integers(1, 256, n))
+    fill(normal, 'dst_host_srv_count', rng.integers(1, 256, n))
+    fill(normal, 'dst_host_serror_rate', np.where(rng.random(n) < 0.95, 0.0, rng.random(n)).round(2))
+    fill(normal, 'dst_host_srv_serror_rate', np.where(rng.random(n) < 0.95, 0.0, rng.random(n)).round(2))
+
+    smurf = kinds == 'smurf'
+    fill(smurf, 'src_bytes', rng.choice([520.0, 1032.0], n))
+    fill(smurf, 'count', np.minimum(511, rng.integers(480, 600, n)))
+    fill(smurf, 'srv_count', np.minimum(511, rng.integers(480, 600, n)))
+    fill(smurf, 'dst_host_count', 255)
+    fill(smurf, 'dst_host_srv_count', 255)
+
+    neptune = kinds == 'neptune'
+    fill(neptune, 'count', rng.integers(100, 512, n))
+    fill(neptune, 'srv_count', rng.integers(1, 30, n))
+    for name in ('serror_rate', 'srv_serror_rate', 'dst_host_serror_rate', 'dst_host_srv_serror_rate'):
+        fill(neptune, name, 1.0)
+    fill(neptune, 'dst_host_count', 255)
+    fill(neptune, 'dst_host_srv_count', rng.integers(1, 30, n))
+
+    probe = kinds == 'probe'
+    fill(probe, 'src_bytes', rng.integers(0, 20, n))
+    fill(probe, 'count', rng.integers(1, 6, n))
+    fill(probe, 'srv_count', 1)
+    fill(probe, 'dst_host_count', rng.integers(1, 256, n))
+    fill(probe, 'dst_host_srv_count', rng.integers(1, 5, n))
+
+    return X, (~normal).astype(int)
+
+
+def load_labeled(path):
+    """Raw feature matrix and 0/1 labels from a CSV with a `label` column"""
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    X = df[nids.REQUIRED_FEATURES].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
+    label = df['label']
+    if label.dtype == object:
+        y = (~label.astype(str).str.strip().str.rstrip('.').str.lower().eq('normal')).astype(int)
+    else:
+        y = (label.to_numpy() != 0).astype(int)
+    return X, np.asarray(y)
+
+
+# ============ CANDIDATES ============
+def subset_trees(forest, n_trees):
+    """Forest made of the first n_trees estimators"""
+    model = copy.copy(forest)
+    model.estimators_ = forest.estimators_[:n_trees]
+    model.n_estimators = len(model.estimators_)
+    return model
+
+
+def truncate_tree(estimator, max_depth):
+    """Copy of a fitted tree whose nodes at max_depth become leaves
+
+    Every node already stores the class distribution of the samples that
+    reached it, so a cut node predicts what its subtree averaged. Nodes
+    below the cut are dropped and the rest renumbered, so the copy is
+    also smaller in memory.
+    """
+    state = estimator.tree_.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    keep, depth, order = [0], {0: 0}, {0: 0}
+    for node in keep:
+        if depth[node] < max_depth and nodes['left_child'][node] != -1:
+            for child in (nodes['left_child'][node], nodes['right_child'][node]):
+                depth[child] = depth[node] + 1
+                order[child] = len(keep)
+                keep.append(child)
+
+    new_nodes = nodes[keep].copy()
+    for i, node in enumerate(keep):
+        if depth[node] >= max_depth or nodes['left_child'][node] == -1:
+            new_nodes['left_child'][i] = new_nodes['right_child'][i] = -1
+            new_nodes['feature'][i] = new_nodes['threshold'][i] = -2
+        else:
+            new_nodes['left_child'][i] = order[nodes['left_child'][node]]
+            new_nodes['right_child'][i] = order[nodes['right_child'][node]]
+
+    tree = Tree(estimator.tree_.n_features, np.atleast_1d(estimator.n_classes_).astype(np.intp),
+                estimator.n_outputs_)
+    tree.__setstate__({
+        'max_depth': min(state['max_depth'], max_depth),
+        'node_count': len(keep),
+        'nodes': new_nodes,
+        'values': np.ascontiguousarray(values[keep]),
+    })
+    model = copy.copy(estimator)
+    model.tree_ = tree
+    model.max_depth = max_depth
+    return model
+
+
+def limit_depth(forest, max_depth):
+    model = copy.copy(forest)
+    model.estimators_ = [truncate_tree(e, max_depth) for e in forest.estimators_]
+    model.max_depth = max_depth
+    return model
+
+
+def distill(forest, Z, n_trees, max_depth, seed=42):
+    """Shallow forest trained on the served forest's attack probabilities
+
+    Each transfer row appears twice, as class 0 weighted by the teacher's
+    normal probability and as class 1 weighted by its attack probability,
+    so every student leaf learns the teacher's average probability rather
+    than a hard label and the predict_traffic thresholds keep working.
+    """
+    p_attack = forest.predict_proba(Z)[:, list(forest.classes_).index(1)]
+    student = RandomForestClassifier(n_estimators=n_trees, max_depth=max_depth, min_samples_leaf=2,
+                                     random_state=seed, n_jobs=1)
+    student.fit(np.vstack([Z, Z]), np.repeat([0, 1], len(Z)),
+                sample_weight=np.concatenate([1 - p_attack, p_attack]) + 1e-6)
+    student.n_jobs = forest.n_jobs
+    return student
+
+
+def build_candidate(spec, forest, transfer_Z):
+    """Candidate forest for a 'trees:N', 'depth:D' or 'distill:NxD' spec"""
+    kind, _, arg = spec.partition(':')
+    if kind == 'trees':
+        return subset_trees(forest, int(arg))
+    if kind == 'depth':
+        return limit_depth(forest, int(arg))
+    if kind == 'distill':
+        n_trees, _, depth = arg.partition('x')
+        return distill(forest, transfer_Z, int(n_trees), int(depth or 8))
+    raise ValueError(f'Unknown candidate {spec!r} (use trees:N, depth:D or distill:NxD)')
+
+
+# ============ MEASUREMENTS ============
+def attack_proba(model, Z):
+    return model.predict_proba(Z)[:, list(model.classes_).index(1)]
+
+
+def model_size(model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    nodes = sum(e.tree_.node_count for e in model.estimators_)
+    return len(buffer.getvalue()), nodes
+
+
+def single_row_ms(model, Z, repeat=1000):
+    """Median predict_proba latency for one row, in milliseconds"""
+    times = []
+    for i in range(repeat):
+        row = Z[i % len(Z):i % len(Z) + 1]
+        started = time.perf_counter()
+        model.predict_proba(row)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def batch_rows_per_second(model, Z, repeat=3):
+    best = min(_timed(model.predict_proba, Z) for _ in range(repeat))
+    return len(Z) / best
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def evaluate(name, model, Z, y, served_decision, served_proba):
+    # Measured as a pre-fork worker scores: one thread per process
+    model = copy.copy(model)
+    model.n_jobs = 1
+    proba = attack_proba(model, Z)
+    decision = decide_attack(proba, 1 - proba)
+    size, nodes = model_size(model)
+    gc.collect()  # Keep garbage from earlier candidates out of the timings
+    return {
+        'candidate': name,
+        'trees': len(model.estimators_),
+        'nodes': nodes,
+        'size_kb': round(size / 1024, 1),
+        'accuracy': round(float(np.mean(decision == y)), 4),
+        'agreement': round(float(np.mean(decision == served_decision)), 4),
+        'mean_abs_prob_delta': round(float(np.mean(np.abs(proba - served_proba))), 4),
+        'single_row_ms': round(single_row_ms(model, Z), 3),
+        'batch_rows_per_s': round(batch_rows_per_second(model, Z[:10000])),
+    }
+
+
+def report(args):
+    forest = nids.pipeline.forest
+    if args.data:
+        X, y = load_labeled(args.data)
+        source = args.data
+    else:
+        X, y = kdd_like_traffic(args.rows, seed=2)
+        source = f'{args.rows:,} synthetic KDD-like rows'
+    Z = nids.pipeline.transform(X)
+    transfer_Z = nids.pipeline.transform(kdd_like_traffic(args.transfer_rows, seed=1)[0])
+
+    served_proba = attack_proba(forest, Z)
+    served_decision = decide_attack(served_proba, 1 - served_proba)
+    rows = [evaluate('served (rf_improved.pkl)', forest, Z, y, served_decision, served_proba)]
+    for spec in args.candidates:
+        started = time.perf_counter()
+        candidate = build_candidate(spec, forest, transfer_Z)
+        print(f"🔧 Built {spec} in {time.perf_counter() - started:.1f}s")
+        rows.append(evaluate(spec, candidate, Z, y, served_decision, served_proba))
+
+    print(f"\n📊 Forest compression report ({source}, {int(y.sum()):,} attacks)\n")
+    print("| candidate | trees | nodes | size KB | accuracy | agreement | mean abs Δp | 1-row ms | batch rows/s |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for r in rows:
+        print(f"| {r['candidate']} | {r['trees']} | {r['nodes']:,} | {r['size_kb']:,} | {r['accuracy']:.4f} | "
+              f"{r['agreement']:.4f} | {r['mean_abs_prob_delta']:.4f} | {r['single_row_ms']:.3f} | "
+              f"{r['batch_rows_per_s']:,} |")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': source, 'candidates': rows}, f, indent=2)
+        print(f"\n💾 Report saved to {args.json}")
+
+
+def export(args):
+    forest = nids.pipeline.forest
+    transfer_Z = None
+    if args.candidate.startswith('distill'):
+        transfer_Z = nids.pipeline.transform(kdd_like_traffic(args.transfer_rows, seed=1)[0])
+    candidate = build_candidate(args.candidate, forest, transfer_Z)
+    joblib.dump(candidate, args.out)
+    size, nodes = model_size(candidate)
+    print(f"✅ {args.candidate} saved to {args.out} ({len(candidate.estimators_)} trees, "
+          f"{nodes:,} nodes, {size / 1024:,.0f} KB)")
+    print(f"💡 Serve it with NIDS_MODEL_FILE={os.path.basename(args.out)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Derive and compare smaller variants of the served forest')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rep = sub.add_parser('report', help='compare candidates with the served forest')
+    rep.add_argument('--candidates', nargs='+', default=DEFAULT_CANDIDATES)
+    rep.add_argument('--data', help='labeled CSV (REQUIRED_FEATURES + label) to measure accuracy on')
+    rep.add_argument('--rows', type=int, default=50000, help='synthetic evaluation rows without --data')
+    rep.add_argument('--transfer-rows', type=int, default=50000, help='synthetic rows to distill on')
+    rep.add_argument('--json', help='also write the report as JSON')
+
+    exp = sub.add_parser('export', help='save one candidate in the served artifact format')
+    exp.add_argument('candidate')
+    exp.add_argument('--out', required=True)
+    exp.add_argument('--transfer-rows', type=int, default=50000)
+
+    args = parser.parse_args()
+    if args.command == 'report':
+        report(args)
+    else:
+        export(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -29,4 +29,18 @@ class DatabaseConfig:
         'charset': 'utf8mb4',
         'pool_size': 10,
         'pool_name': 'nids_prod_pool'
-    }
\ No newline at end of file
+    }
+    
+    # Read replica for dashboard queries (config/db_router.py); unused while
+    # the host is empty. Same NIDS_REPLICA_* variables as app.py, so one
+    # setting configures SimpleDatabase and MySQLDatabase alike.
+    REPLICA = {
+        'host': os.getenv('NIDS_REPLICA_HOST', ''),
+        'port': int(os.getenv('NIDS_REPLICA_PORT', 3306)),
+        'pool_size': int(os.getenv('NIDS_READ_POOL_SIZE', 4))
+    }
+    DEV_REPLICA = dict(DEV, **REPLICA, pool_name='nids_read_pool')
+    PROD_REPLICA = dict(PROD, **REPLICA, pool_name='nids_prod_read_pool')
+    REPLICA_MAX_LAG = float(os.getenv('NIDS_REPLICA_MAX_LAG', 5.0))
+    REPLICA_CHECK_INTERVAL = float(os.getenv('NIDS_REPLICA_CHECK_INTERVAL', 2.0))
+    REPLICA_ALLOW_STANDALONE = os.getenv('NIDS_REPLICA_ALLOW_STANDALONE', '0') == '1'  # test mode
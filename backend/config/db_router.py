@@ -0,0 +1,230 @@
+# config/db_router.py
+#
+# Read/write split between a MySQL primary and a read replica.
+#
+# Inserts from the detection path always use the writer pool. Dashboard and
+# analyst queries (PredictionStore.get_read_connection) use a separate
+# reader pool on the replica, so a heavy query cannot take connections or
+# server time from detection writes. A read goes to the primary instead when
+#
+#   - the replica is behind by more than max_lag seconds, or its replication
+#     threads are stopped (lag is checked every check_interval seconds);
+#   - the replica cannot be reached (health-based failover; it is used again
+#     after the next successful check);
+#   - the request comes from a client that wrote less than max_lag +
+#     check_interval seconds ago (read-your-writes). The client carries the
+#     time of its last write in a cookie / header that app.py sets.
+#
+# SimpleDatabase (app.py) and MySQLDatabase (config/database_config.py) read
+# the same settings: NIDS_REPLICA_HOST/PORT, NIDS_READ_POOL_SIZE,
+# NIDS_REPLICA_MAX_LAG and NIDS_REPLICA_CHECK_INTERVAL. Two local instances
+# are enough to try it: point NIDS_REPLICA_HOST/PORT at a second mysqld
+# replicating from the first. A server with no replication source (empty
+# SHOW REPLICA STATUS) counts as unhealthy, so a misconfigured host never
+# serves reads; allow_standalone=True (NIDS_REPLICA_ALLOW_STANDALONE) accepts
+# one as a replica with no lag, for testing with two standalone servers.
+import logging
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+LAG_COLUMNS = ('Seconds_Behind_Source', 'Seconds_Behind_Master')
+
+
+class NotAReplica(Exception):
+    """The reader server has no replication source configured"""
+
+
+def replica_lag(conn):
+    """Seconds the server is behind its source, None if replication is broken
+
+    Raises NotAReplica when SHOW REPLICA STATUS is empty.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except mysql.connector.Error:
+            cursor.execute('SHOW SLAVE STATUS')  # MySQL before 8.0.22
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not rows:
+        raise NotAReplica('server is not a replica (SHOW REPLICA STATUS is empty)')
+    for column in LAG_COLUMNS:
+        if column in rows[0]:
+            lag = rows[0][column]
+            return None if lag is None else float(lag)
+    return None
+
+
+class DatabaseRouter:
+    """Writer and reader connection pools with lag- and health-aware read routing
+
+    writer: an existing callable returning primary connections, used instead
+    of a writer pool built from writer_config (MySQLDatabase has its own).
+    """
+
+    def __init__(self, writer_config, reader_config, pool_size=5, read_pool_size=5,
+                 max_lag=5.0, check_interval=2.0, connect=None, writer=None, allow_standalone=False):
+        self.writer_config = writer_config
+        self.reader_config = reader_config
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.allow_standalone = allow_standalone
+        self.connect = connect or mysql.connector.connect
+        self._writer = writer
+        self.writer_pool = None if writer else self._make_pool('w', writer_config, pool_size)
+        self.reader_pool = self._make_pool('r', reader_config, read_pool_size)
+        self.replica_ok = False
+        self.lag = None
+        self.last_error = None
+        self.last_check = None
+        self.routed = {'replica': 0, 'primary_lag': 0, 'primary_failover': 0, 'primary_read_your_writes': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.check()
+
+    def _make_pool(self, role, config, size):
+        if not size:
+            return None
+        try:
+            return pooling.MySQLConnectionPool(pool_name=f'nids_{role}_{id(self)}', pool_size=size, **config)
+        except mysql.connector.Error as e:
+            logger.warning(f"⚠ {'Reader' if role == 'r' else 'Writer'} pool unavailable, "
+                           f"using direct connections: {e}")
+            return None
+
+    def _get(self, pool, config):
+        if pool:
+            try:
+                return pool.get_connection()
+            except PoolError:
+                pass  # Pool exhausted, fall back to a direct connection
+        return self.connect(**config)
+
+    # ---------- connections ----------
+    def writer(self):
+        if self._writer:
+            return self._writer()
+        return self._get(self.writer_pool, self.writer_config)
+
+    def reader(self):
+        """A connection for a read, from the replica unless one of the rules above applies"""
+        if self.pinned_to_primary():
+            return self._primary('primary_read_your_writes')
+        if not self.replica_ok:
+            return self._primary('primary_failover')
+        if self.lag > self.max_lag:
+            return self._primary('primary_lag')
+        try:
+            conn = self._get(self.reader_pool, self.reader_config)
+        except mysql.connector.Error as e:
+            self._mark_down(e)
+            return self._primary('primary_failover')
+        self._count('replica')
+        return conn
+
+    def _primary(self, reason):
+        self._count(reason)
+        return self.writer()
+
+    def _count(self, reason):
+        with self._lock:
+            self.routed[reason] += 1
+
+    # ---------- read-your-writes ----------
+    def begin_request(self, wrote_at=None):
+        """Called per request with the client's last write time (epoch seconds), if it sent one"""
+        try:
+            self._local.wrote_at = float(wrote_at) if wrote_at else None
+        except ValueError:
+            self._local.wrote_at = None
+        self._local.wrote = None
+
+    def note_write(self):
+        """The current request committed a write; its reads now go to the primary"""
+        self._local.wrote_at = self._local.wrote = time.time()
+
+    def pinned_to_primary(self):
+        """True while the current request's reads go to the primary for read-your-writes"""
+        wrote_at = getattr(self._local, 'wrote_at', None)
+        return bool(wrote_at) and time.time() - wrote_at < self.max_lag + self.check_interval
+
+    def end_request(self):
+        """Time of a write made during the request (for the client to send back), or None"""
+        wrote = getattr(self._local, 'wrote', None)
+        self._local.wrote_at = self._local.wrote = None
+        return wrote
+
+    # ---------- health ----------
+    def _mark_down(self, error):
+        if self.replica_ok:
+            logger.error(f"❌ Read replica unavailable, reading from the primary: {error}")
+        self.replica_ok = False
+        self.last_error = str(error)
+
+    def check(self):
+        """Measure replica lag and reachability once"""
+        self.last_check = time.time()
+        try:
+            conn = self.connect(**self.reader_config)
+            try:
+                lag = replica_lag(conn)
+            except NotAReplica:
+                if not self.allow_standalone:
+                    raise
+                lag = 0.0
+            finally:
+                conn.close()
+        except Exception as e:
+            self._mark_down(e)
+            return False
+        if lag is None:
+            self._mark_down('replication is not running')
+            self.lag = None
+            return False
+        self.lag = lag
+        if not self.replica_ok:
+            logger.info(f"✅ Read replica available (lag {lag:.0f}s)")
+        self.replica_ok = True
+        self.last_error = None
+        return True
+
+    def status(self):
+        with self._lock:
+            routed = dict(self.routed)
+        return {
+            'replica': f"{self.reader_config.get('host')}:{self.reader_config.get('port')}",
+            'replica_ok': self.replica_ok,
+            'lag_seconds': self.lag,
+            'max_lag_seconds': self.max_lag,
+            'last_check': self.last_check,
+            'last_error': self.last_error,
+            'reads': routed
+        }
+
+    # ---------- background thread ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-router', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.check_interval + 5)
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            self.check()
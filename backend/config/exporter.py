@@ -0,0 +1,354 @@
+# config/exporter.py
+#
+#   python -m config.exporter predictions --out exports/
+#   python -m config.exporter attacks --out exports/ --backend sqlite --sqlite-path data/nids.sqlite3
+#   python -m config.exporter status --out exports/
+#
+# Streams predictions or attacks out of the database into date-partitioned
+# Parquet files with typed columns:
+#
+#   exports/predictions/date=2026-10-19/part-000000000001.parquet
+#
+# Rows are read in id order from an unbuffered cursor, batch_size at a time,
+# so memory stays constant however long the history is. Every rows_per_file
+# rows the open files are closed, renamed from .tmp and the last exported id
+# is saved to exports/_state.json; the next run continues after it. File
+# names come from the first id of their segment, so re-running an
+# interrupted segment overwrites its files instead of duplicating rows.
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Export is unavailable until pyarrow is installed
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_state.json'
+PARQUET_MIME = 'application/vnd.apache.parquet'
+
+# table: [(column, type)], type one of int64/int32/int8/float32/bool/timestamp/string
+EXPORT_COLUMNS = {
+    'predictions': [
+        ('id', 'int64'),
+        ('timestamp', 'timestamp'),
+        ('prediction', 'int8'),
+        ('prediction_label', 'string'),
+        ('confidence', 'float32'),
+        ('attack_probability', 'float32'),
+        ('normal_probability', 'float32'),
+        ('is_attack', 'bool'),
+        ('client_ip', 'string'),
+        ('duration', 'float32'),
+        ('src_bytes', 'int64'),
+        ('dst_bytes', 'int64'),
+        ('count', 'int32'),
+        ('srv_count', 'int32'),
+        ('serror_rate', 'float32'),
+        ('srv_serror_rate', 'float32'),
+        ('dst_host_count', 'int32'),
+        ('dst_host_srv_count', 'int32'),
+        ('dst_host_serror_rate', 'float32'),
+        ('dst_host_srv_serror_rate', 'float32'),
+        ('sample_weight', 'float32'),
+        ('attack_category', 'string'),
+        ('category_probabilities', 'string'),
+    ],
+    'attacks': [
+        ('id', 'int64'),
+        ('prediction_id', 'int64'),
+        ('timestamp', 'timestamp'),
+        ('attack_type', 'string'),
+        ('severity', 'string'),
+    ],
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError('Parquet export needs pyarrow (pip install pyarrow)')
+
+
+def arrow_type(kind):
+    return {
+        'int64': pa.int64(), 'int32': pa.int32(), 'int8': pa.int8(),
+        'float32': pa.float32(), 'bool': pa.bool_(),
+        'timestamp': pa.timestamp('s'), 'string': pa.string(),
+    }[kind]
+
+
+def export_schema(table):
+    require_pyarrow()
+    return pa.schema([(name, arrow_type(kind)) for name, kind in EXPORT_COLUMNS[table]])
+
+
+def export_query(table, placeholder='%s'):
+    """Rows after an id and up to a fixed upper id, in id order"""
+    columns = ', '.join(name for name, _ in EXPORT_COLUMNS[table])
+    return (f"SELECT {columns} FROM {table} "
+            f"WHERE id > {placeholder} AND id <= {placeholder} ORDER BY id")
+
+
+def to_arrow(table, rows):
+    """DB-API row tuples -> pyarrow Table with the export schema"""
+    arrays = []
+    for (name, kind), values in zip(EXPORT_COLUMNS[table], zip(*rows)):
+        if kind == 'timestamp':
+            # datetime objects from MySQL, 'YYYY-MM-DD HH:MM:SS' text from SQLite
+            arrays.append(pa.array(np.array(values, dtype='datetime64[s]'), from_pandas=True))
+        elif kind == 'float32':
+            # DECIMAL columns arrive as Decimal; None becomes null
+            arrays.append(pa.array(np.array(values, dtype=np.float32), from_pandas=True))
+        elif kind == 'bool':
+            arrays.append(pa.array([None if v is None else bool(v) for v in values], type=pa.bool_()))
+        elif kind == 'string':
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+        else:
+            arrays.append(pa.array(values, type=arrow_type(kind)))
+    return pa.Table.from_arrays(arrays, schema=export_schema(table))
+
+
+def id_bounds(store, table):
+    conn = store.get_read_connection()
+    if not conn:
+        raise ConnectionError('Database not available')
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'SELECT MAX(id) FROM {table}')
+        return cursor.fetchone()[0] or 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def iter_tables(store, table, after_id=0, max_rows=None, batch_size=50000):
+    """Yield (pyarrow Table, last id) batches of rows exported after after_id
+
+    The upper id is fixed when the export starts, so rows inserted while it
+    runs are left for the next one.
+    """
+    require_pyarrow()
+    upper = id_bounds(store, table)
+    if max_rows:
+        batch_size = min(batch_size, max_rows)
+    sent = 0
+    batches = store.iter_batches(export_query(table, store.placeholder), (after_id, upper), batch_size)
+    try:
+        for rows in batches:
+            if max_rows and sent + len(rows) > max_rows:
+                rows = rows[:max_rows - sent]
+            sent += len(rows)
+            yield to_arrow(table, rows), rows[-1][0]
+            if max_rows and sent >= max_rows:
+                break
+    finally:
+        batches.close()
+
+
+# ---------- date-partitioned files ----------
+class PartitionedWriter:
+    """One open ParquetWriter per date, committed together at a checkpoint"""
+
+    def __init__(self, root, table, segment_id):
+        self.root = root
+        self.table = table
+        self.name = f"part-{segment_id:012d}.parquet"
+        self.writers = {}
+        self.rows = 0
+
+    def _path(self, day):
+        return os.path.join(self.root, self.table, f"date={day}", self.name)
+
+    def write(self, batch):
+        days = batch.column('timestamp').to_numpy(zero_copy_only=False).astype('datetime64[D]')
+        keys = np.where(np.isnat(days), 'unknown', days.astype(str))
+        for key in np.unique(keys):
+            part = batch.filter(pa.array(keys == key))
+            writer = self.writers.get(key)
+            if writer is None:
+                path = self._path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = pq.ParquetWriter(path + '.tmp', batch.schema, compression='zstd')
+                self.writers[key] = writer
+            writer.write_table(part)
+        self.rows += batch.num_rows
+
+    def commit(self):
+        """Close every file and move it into place; returns the files written"""
+        files = []
+        for day, writer in self.writers.items():
+            writer.close()
+            path = self._path(day)
+            os.replace(path + '.tmp', path)
+            files.append(path)
+        self.writers = {}
+        return files
+
+    def abort(self):
+        for day, writer in self.writers.items():
+            writer.close()
+            try:
+                os.remove(self._path(day) + '.tmp')
+            except FileNotFoundError:
+                pass
+        self.writers = {}
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(out_dir, state):
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def remove_partial_files(out_dir, table):
+    """Delete .tmp files left by an interrupted run"""
+    for directory, _, names in os.walk(os.path.join(out_dir, table)):
+        for name in names:
+            if name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))
+
+
+def export_table(store, table, out_dir, batch_size=50000, rows_per_file=1000000, max_rows=None):
+    """Export rows after the saved checkpoint; returns (rows exported, last id)"""
+    require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    remove_partial_files(out_dir, table)
+    state = load_state(out_dir)
+    progress = state.setdefault(table, {'last_id': 0, 'rows': 0, 'files': 0})
+    last_id = progress['last_id']
+
+    exported = 0
+    writer = None
+    started = time.perf_counter()
+    try:
+        for batch, batch_last_id in iter_tables(store, table, last_id, max_rows, batch_size):
+            if writer is None:
+                writer = PartitionedWriter(out_dir, table, batch.column('id')[0].as_py())
+            writer.write(batch)
+            exported += batch.num_rows
+            last_id = batch_last_id
+
+            if writer.rows >= rows_per_file:
+                checkpoint(out_dir, state, progress, writer, last_id)
+                writer = None
+                rate = exported / (time.perf_counter() - started)
+                logger.info(f"💾 {table}: {exported:,} rows exported (last id {last_id}, {rate:,.0f} rows/s)")
+
+        if writer is not None:
+            checkpoint(out_dir, state, progress, writer, last_id)
+            writer = None
+    finally:
+        if writer is not None:
+            # Interrupted mid-segment: the next run redoes it from the checkpoint
+            writer.abort()
+    return exported, last_id
+
+
+def checkpoint(out_dir, state, progress, writer, last_id):
+    files = writer.commit()
+    progress['rows'] += writer.rows
+    progress['files'] += len(files)
+    progress['last_id'] = last_id
+    progress['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    save_state(out_dir, state)
+
+
+# ---------- streaming over HTTP ----------
+class _ChunkSink:
+    """Write-only file object that hands written bytes to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(store, table, after_id=0, max_rows=None, batch_size=50000):
+    """Yield one Parquet file as byte chunks, one row group per batch"""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, export_schema(table), compression='zstd')
+    for batch, _ in iter_tables(store, table, after_id, max_rows, batch_size):
+        writer.write_table(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def main():
+    from config.database_config import DatabaseConfig
+    from config.storage import MySQLStorage, SQLiteStorage
+
+    parser = argparse.ArgumentParser(description='Export predictions/attacks to Parquet')
+    parser.add_argument('command', choices=['predictions', 'attacks', 'status'])
+    parser.add_argument('--out', default='exports', help='output directory')
+    parser.add_argument('--env', default='DEV', choices=['DEV', 'PROD'])
+    parser.add_argument('--backend', default='mysql', choices=['mysql', 'sqlite'])
+    parser.add_argument('--sqlite-path', default=os.path.join('data', 'nids.sqlite3'))
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--rows-per-file', type=int, default=1000000)
+    parser.add_argument('--max-rows', type=int, default=None, help='stop after this many rows')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.command == 'status':
+        state = load_state(args.out)
+        for table in EXPORT_COLUMNS:
+            progress = state.get(table)
+            if progress:
+                print(f"  {table:<12} last id {progress['last_id']:>12,}  {progress['rows']:>14,} rows  "
+                      f"{progress['files']:>6} files  ({progress.get('updated_at', '-')})")
+            else:
+                print(f"  {table:<12} not exported yet")
+        return
+
+    if args.backend == 'sqlite':
+        store = SQLiteStorage(args.sqlite_path)
+    else:
+        config = DatabaseConfig.DEV if args.env == 'DEV' else DatabaseConfig.PROD
+        store = MySQLStorage({k: config[k] for k in ('host', 'port', 'user', 'password', 'database', 'charset')})
+
+    started = time.perf_counter()
+    exported, last_id = export_table(store, args.command, args.out, args.batch_size,
+                                     args.rows_per_file, args.max_rows)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {exported:,} {args.command} rows exported up to id {last_id} in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# config/incidents.py
+#
+# Attack incidents: one row per burst of attacks instead of one per attack.
+#
+# Every saved attack is added to an open incident keyed by (client_ip,
+# attack_type, severity). An incident stays open while attacks with the same
+# key keep arriving less than window_seconds apart, and is closed once the
+# key has been quiet for window_seconds or the incident has lasted
+# max_duration (so a flood that never stops still lands in the table every
+# few minutes). A background thread writes closed incidents to the
+# `incidents` table in one executemany every flush_interval seconds.
+#
+# Open incidents live in memory only: a crash loses at most max_duration of
+# them, while the predictions they came from are already stored. stop()
+# closes and writes everything still open.
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_COLUMNS = (
+    'client_ip', 'attack_type', 'severity', 'first_seen', 'last_seen', 'attack_count',
+    'min_confidence', 'max_confidence', 'avg_confidence', 'first_prediction_id', 'last_prediction_id',
+)
+
+
+class Incident:
+    """Attacks from one source with one type and severity, close together in time"""
+
+    __slots__ = ('key', 'first_seen', 'last_seen', 'count', 'min_confidence', 'max_confidence',
+                 'confidence_sum', 'first_prediction_id', 'last_prediction_id')
+
+    def __init__(self, key, seen, confidence, prediction_id):
+        self.key = key
+        self.first_seen = self.last_seen = seen
+        self.count = 0
+        self.min_confidence = self.max_confidence = confidence
+        self.confidence_sum = 0.0
+        self.first_prediction_id = prediction_id
+        self.add(seen, confidence, prediction_id)
+
+    def add(self, seen, confidence, prediction_id):
+        self.last_seen = max(self.last_seen, seen)
+        self.count += 1
+        self.min_confidence = min(self.min_confidence, confidence)
+        self.max_confidence = max(self.max_confidence, confidence)
+        self.confidence_sum += confidence
+        self.last_prediction_id = prediction_id
+
+    def as_row(self, timestamp):
+        client_ip, attack_type, severity = self.key
+        return (client_ip, attack_type, severity, timestamp(self.first_seen), timestamp(self.last_seen),
+                self.count, round(self.min_confidence, 2), round(self.max_confidence, 2),
+                round(self.confidence_sum / self.count, 2), self.first_prediction_id, self.last_prediction_id)
+
+    def as_dict(self, status):
+        row = dict(zip(INCIDENT_COLUMNS, self.as_row(lambda value: value)))
+        row.update(id=None, status=status)
+        return row
+
+
+class IncidentAggregator:
+    """Merges attacks into incidents in memory and writes them when they close
+
+    store: a PredictionStore; its connection, placeholder and timestamp
+    format are used for the writes.
+    """
+
+    def __init__(self, store, window_seconds=60, max_duration=300, flush_interval=5.0):
+        self.store = store
+        self.window = timedelta(seconds=window_seconds)
+        self.max_duration = timedelta(seconds=max_duration)
+        self.flush_interval = flush_interval
+        self.open = {}      # key -> Incident
+        self.closed = []    # Incidents waiting to be written
+        self.attacks = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- recording ----------
+    def record(self, attacks):
+        """Add saved attacks: (prediction_id, seen datetime, client_ip, attack_type, severity, confidence)"""
+        with self._lock:
+            for prediction_id, seen, client_ip, attack_type, severity, confidence in attacks:
+                key = (client_ip, attack_type, severity)
+                incident = self.open.get(key)
+                if incident is not None and (seen - incident.last_seen > self.window or
+                                             seen - incident.first_seen >= self.max_duration):
+                    self.closed.append(self.open.pop(key))
+                    incident = None
+                if incident is None:
+                    self.open[key] = Incident(key, seen, confidence, prediction_id)
+                else:
+                    incident.add(seen, confidence, prediction_id)
+                self.attacks += 1
+
+    def close_expired(self, now=None):
+        """Move incidents whose window has passed to the write queue; returns how many"""
+        now = now or datetime.now()
+        with self._lock:
+            expired = [key for key, incident in self.open.items()
+                       if now - incident.last_seen > self.window or
+                       now - incident.first_seen >= self.max_duration]
+            for key in expired:
+                self.closed.append(self.open.pop(key))
+            return len(expired)
+
+    # ---------- flushing ----------
+    def flush(self, close_all=False):
+        """Write closed incidents in one statement; returns the number written"""
+        with self._flush_lock:
+            if close_all:
+                with self._lock:
+                    self.closed.extend(self.open.values())
+                    self.open = {}
+            else:
+                self.close_expired()
+            with self._lock:
+                if not self.closed:
+                    return 0
+                batch, self.closed = self.closed, []
+
+            conn = None
+            try:
+                conn = self.store.get_connection()
+                if not conn:
+                    raise ConnectionError('no database connection')
+                cursor = conn.cursor()
+                try:
+                    cursor.executemany(self.store._insert_sql('incidents', INCIDENT_COLUMNS),
+                                       [incident.as_row(self.store._timestamp) for incident in batch])
+                    conn.commit()
+                finally:
+                    cursor.close()
+            except Exception as e:
+                # Keep them for the next attempt
+                self.failed_flushes += 1
+                logger.error(f"❌ Incident flush failed, will retry: {e}")
+                if conn:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                with self._lock:
+                    self.closed = batch + self.closed
+                return 0
+            finally:
+                if conn:
+                    conn.close()
+
+            self.written += len(batch)
+            if self.store.version:
+                self.store.version.bump()
+            return len(batch)
+
+    def snapshot(self):
+        """Open and not yet written incidents, newest activity first"""
+        with self._lock:
+            rows = ([incident.as_dict('open') for incident in self.open.values()] +
+                    [incident.as_dict('closing') for incident in self.closed])
+        return sorted(rows, key=lambda row: row['last_seen'], reverse=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'attacks': self.attacks,
+                'open': len(self.open),
+                'pending': len(self.closed),
+                'written': self.written,
+                'failed_flushes': self.failed_flushes
+            }
+
+    # ---------- background thread ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='incidents', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write every incident, open or not"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush(close_all=True)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,99 @@
+# config/migrate_feature_blobs.py
+#
+#   python -m config.migrate_feature_blobs                 # backfill, keep the JSON text
+#   python -m config.migrate_feature_blobs --clear-text    # backfill and free the JSON text
+#
+# Backfills predictions.features_blob from the legacy JSON columns:
+# raw_features (SimpleDatabase schema) or raw_data (MySQLDatabase schema).
+# Works in id order in small batches, each its own transaction, so it can
+# run against a live table and be interrupted and restarted at any point.
+import argparse
+import logging
+import time
+
+import mysql.connector
+
+from config.database_config import DatabaseConfig
+from utils.feature_codec import decode_json_features, encode_features
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_column(cursor):
+    cursor.execute('''
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'predictions'
+        AND COLUMN_NAME IN ('raw_features', 'raw_data', 'features_blob')
+    ''')
+    columns = {row[0] for row in cursor.fetchall()}
+    if 'features_blob' not in columns:
+        cursor.execute('ALTER TABLE predictions ADD COLUMN features_blob VARBINARY(255)')
+        logger.info("✅ Added predictions.features_blob column")
+    for name in ('raw_features', 'raw_data'):
+        if name in columns:
+            return name
+    return None
+
+
+def migrate(connection, batch_size=5000, clear_text=False):
+    """Encode every row that has legacy JSON but no blob; returns rows migrated"""
+    cursor = connection.cursor()
+    source = legacy_column(cursor)
+    connection.commit()
+    if source is None:
+        logger.info("Nothing to migrate: no raw_features/raw_data column")
+        return 0
+
+    update = 'UPDATE predictions SET features_blob = %s' + (f', {source} = NULL' if clear_text else '') + ' WHERE id = %s'
+    last_id, migrated, failed = 0, 0, 0
+    started = time.perf_counter()
+    while True:
+        cursor.execute(f'''
+            SELECT id, {source} FROM predictions
+            WHERE id > %s AND features_blob IS NULL AND {source} IS NOT NULL
+            ORDER BY id LIMIT %s
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        params = []
+        for row_id, text in rows:
+            try:
+                params.append((encode_features(decode_json_features(text)), row_id))
+            except ValueError:
+                failed += 1  # Unparseable text stays as it is
+        cursor.executemany(update, params)
+        connection.commit()
+
+        last_id = rows[-1][0]
+        migrated += len(params)
+        rate = migrated / (time.perf_counter() - started)
+        logger.info(f"💾 Migrated {migrated:,} rows (last id {last_id}, {rate:,.0f} rows/s)")
+
+    cursor.close()
+    if failed:
+        logger.warning(f"⚠ {failed} rows had unparseable {source} and were left unchanged")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill predictions.features_blob from JSON text')
+    parser.add_argument('--env', default='DEV', choices=['DEV', 'PROD'])
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--clear-text', action='store_true', help='set the JSON column to NULL once encoded')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    config = DatabaseConfig.DEV if args.env == 'DEV' else DatabaseConfig.PROD
+    connection = mysql.connector.connect(**{k: config[k] for k in
+                                            ('host', 'port', 'user', 'password', 'database', 'charset')})
+    try:
+        migrated = migrate(connection, args.batch_size, args.clear_text)
+        print(f"✅ {migrated:,} rows migrated")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+# config/migrations.py
+#
+#   python -m config.migrations status
+#   python -m config.migrations migrate
+#   python -m config.migrations verify     # EXPLAIN every application query
+#
+# Versioned schema migrations shared by SimpleDatabase (app.py) and
+# MySQLDatabase (config/mysql_manager.py). The two classes historically
+# created different `predictions` / `attacks` tables; every migration here is
+# written against either starting point and converges them on one set of
+# columns and indexes. Applied versions are recorded in `schema_migrations`.
+import argparse
+import logging
+
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = 'nids_schema_migrations'
+
+PREDICTION_COLUMNS = [
+    ('features_count', 'INT'),
+    ('dst_host_count', 'INT'),
+    ('dst_host_srv_count', 'INT'),
+    ('dst_host_serror_rate', 'DECIMAL(5,4)'),
+    ('dst_host_srv_serror_rate', 'DECIMAL(5,4)'),
+    ('duration', 'DECIMAL(10,4)'),
+    ('user_agent', 'TEXT'),
+    ('request_path', 'VARCHAR(255)'),
+    ('raw_data', 'JSON'),
+    ('raw_features', 'TEXT'),
+    ('features_blob', 'VARBINARY(255)'),
+]
+
+SAMPLING_COLUMNS = [
+    ('sample_weight', 'DOUBLE DEFAULT 1'),
+]
+
+# Written by the scoring pass (utils/categories.py); probabilities as JSON
+CATEGORY_COLUMNS = [
+    ('attack_category', 'VARCHAR(16)'),
+    ('category_probabilities', 'VARCHAR(255)'),
+]
+
+ATTACK_COLUMNS = [
+    ('alert_sent', 'BOOLEAN DEFAULT FALSE'),
+    ('acknowledged', 'BOOLEAN DEFAULT FALSE'),
+    ('acknowledged_by', 'VARCHAR(100)'),
+    ('acknowledged_at', 'TIMESTAMP NULL'),
+    ('notes', 'TEXT'),
+]
+
+# (table, index name, columns), each matched to the queries in QUERY_PLANS
+QUERY_INDEXES = [
+    ('predictions', 'idx_is_attack_timestamp', ('is_attack', 'timestamp')),
+    ('predictions', 'idx_timestamp', ('timestamp',)),
+    ('predictions', 'idx_client_ip_timestamp', ('client_ip', 'timestamp')),
+    ('attacks', 'idx_attacks_timestamp', ('timestamp',)),
+    ('attacks', 'idx_attacks_prediction_id', ('prediction_id',)),
+]
+
+# Indexes of the incidents table (config/incidents.py), created with it
+INCIDENT_INDEXES = [
+    ('incidents', 'idx_incidents_last_seen', ('last_seen',)),
+    ('incidents', 'idx_incidents_client_ip_last_seen', ('client_ip', 'last_seen')),
+]
+
+# Single-column indexes from the MySQLDatabase schema that no query uses or
+# that are a prefix of a composite index above; each costs every insert
+UNUSED_INDEXES = [
+    ('predictions', 'idx_is_attack'),
+    ('predictions', 'idx_client_ip'),
+    ('predictions', 'idx_prediction'),
+    ('predictions', 'idx_src_bytes'),
+    ('attacks', 'idx_attack_type'),
+    ('attacks', 'idx_severity'),
+    ('attacks', 'idx_alert_sent'),
+]
+
+
+# ---------- schema inspection ----------
+def table_columns(cursor, table):
+    cursor.execute('''
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def table_indexes(cursor, table):
+    """{index name: (column, ...)} in key order"""
+    cursor.execute('''
+        SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    ''', (table,))
+    indexes = {}
+    for name, column in cursor.fetchall():
+        indexes.setdefault(name, ())
+        indexes[name] += (column,)
+    return indexes
+
+
+def add_missing_columns(cursor, table, columns):
+    existing = table_columns(cursor, table)
+    missing = [f"ADD COLUMN {name} {definition}" for name, definition in columns if name not in existing]
+    if missing:
+        # Appended columns are an instant metadata change on MySQL 8
+        cursor.execute(f"ALTER TABLE {table} {', '.join(missing)}")
+        logger.info(f"✅ {table}: added {len(missing)} columns")
+
+
+def ensure_index(cursor, table, name, columns):
+    """Create the index unless one with exactly these columns already exists"""
+    indexes = table_indexes(cursor, table)
+    if any(existing == tuple(columns) for existing in indexes.values()):
+        return
+    cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    logger.info(f"✅ {table}: created index {name} ({', '.join(columns)})")
+
+
+def drop_index(cursor, table, name):
+    if name in table_indexes(cursor, table):
+        cursor.execute(f"DROP INDEX {name} ON {table}")
+        logger.info(f"🗑 {table}: dropped index {name}")
+
+
+# ---------- migrations ----------
+def converge_prediction_columns(cursor):
+    add_missing_columns(cursor, 'predictions', PREDICTION_COLUMNS)
+
+
+def converge_attack_columns(cursor):
+    add_missing_columns(cursor, 'attacks', ATTACK_COLUMNS)
+
+
+def create_statistics(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS statistics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE UNIQUE,
+            total_predictions INT DEFAULT 0,
+            attack_count INT DEFAULT 0,
+            normal_count INT DEFAULT 0,
+            false_positives INT DEFAULT 0,
+            false_negatives INT DEFAULT 0,
+            avg_confidence DECIMAL(5,2),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    ''')
+
+
+def query_indexes(cursor):
+    # Create the replacements first so no query is ever left without an index
+    for table, name, columns in QUERY_INDEXES:
+        ensure_index(cursor, table, name, columns)
+    for table, name in UNUSED_INDEXES:
+        drop_index(cursor, table, name)
+
+
+def statistics_buffer(cursor):
+    add_missing_columns(cursor, 'statistics', [('confidence_sum', 'DECIMAL(16,2)')])
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_flushes (
+            flush_id CHAR(32) PRIMARY KEY,
+            flushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_flushed_at (flushed_at)
+        )
+    ''')
+
+
+def create_incidents(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS incidents (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            client_ip VARCHAR(45),
+            attack_type VARCHAR(50),
+            severity VARCHAR(20),
+            first_seen DATETIME,
+            last_seen DATETIME,
+            attack_count INT,
+            min_confidence DECIMAL(5,2),
+            max_confidence DECIMAL(5,2),
+            avg_confidence DECIMAL(5,2),
+            first_prediction_id INT,
+            last_prediction_id INT
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    ''')
+    for table, name, columns in INCIDENT_INDEXES:
+        ensure_index(cursor, table, name, columns)
+
+
+def sampled_persistence(cursor):
+    add_missing_columns(cursor, 'predictions', SAMPLING_COLUMNS)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sampled_counts (
+            date DATE PRIMARY KEY,
+            dropped BIGINT DEFAULT 0
+        )
+    ''')
+
+
+def attack_categories(cursor):
+    add_missing_columns(cursor, 'predictions', CATEGORY_COLUMNS)
+
+
+MIGRATIONS = [
+    (1, 'converge prediction columns', converge_prediction_columns),
+    (2, 'converge attack columns', converge_attack_columns),
+    (3, 'create statistics table', create_statistics),
+    (4, 'composite query indexes', query_indexes),
+    (5, 'statistics buffer bookkeeping', statistics_buffer),
+    (6, 'create incidents table', create_incidents),
+    (7, 'sampled persistence of normal traffic', sampled_persistence),
+    (8, 'attack categories', attack_categories),
+]
+
+
+def applied_versions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT version FROM schema_migrations')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def run_migrations(connection):
+    """Apply pending migrations in order; returns the versions applied"""
+    cursor = connection.cursor()
+    applied = []
+    try:
+        # Workers start together; only one of them migrates
+        cursor.execute("SELECT GET_LOCK(%s, 30)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            logger.warning("⚠ Timed out waiting for the schema migration lock")
+            return applied
+        try:
+            done = applied_versions(cursor)
+            for version, name, migrate in MIGRATIONS:
+                if version in done:
+                    continue
+                migrate(cursor)
+                cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                               (version, name))
+                connection.commit()
+                applied.append(version)
+                logger.info(f"✅ Migration {version}: {name}")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+    return applied
+
+
+# ---------- query plan verification ----------
+# (description, query, params, index the plan must be able to use)
+QUERY_PLANS = [
+    ('stats: attack count',
+     'SELECT COUNT(*) FROM predictions WHERE is_attack = 1', (), 'idx_is_attack_timestamp'),
+    ('stats: normal count',
+     'SELECT COUNT(*) FROM predictions WHERE is_attack = 0', (), 'idx_is_attack_timestamp'),
+    ('recent predictions',
+     'SELECT * FROM predictions ORDER BY timestamp DESC LIMIT 50', (), 'idx_timestamp'),
+    ('search predictions by range',
+     'SELECT * FROM predictions WHERE timestamp BETWEEN %s AND %s ORDER BY timestamp DESC',
+     ('2026-01-01', '2026-01-02'), 'idx_timestamp'),
+    ('search attacks by range',
+     'SELECT * FROM predictions WHERE timestamp BETWEEN %s AND %s AND is_attack = %s ORDER BY timestamp DESC',
+     ('2026-01-01', '2026-01-02', 1), 'idx_is_attack_timestamp'),
+    ('attacks today',
+     '''SELECT p.*, a.attack_type, a.severity FROM predictions p
+        JOIN attacks a ON p.id = a.prediction_id
+        WHERE p.is_attack = 1 AND p.timestamp >= CURDATE() AND p.timestamp < CURDATE() + INTERVAL 1 DAY
+        ORDER BY p.timestamp DESC''', (), 'idx_is_attack_timestamp'),
+    ('client history',
+     'SELECT * FROM predictions WHERE client_ip = %s AND timestamp >= %s ORDER BY timestamp DESC',
+     ('10.0.0.1', '2026-01-01'), 'idx_client_ip_timestamp'),
+    ('/api/attacks',
+     'SELECT * FROM attacks ORDER BY timestamp DESC LIMIT 100', (), 'idx_attacks_timestamp'),
+    ('/api/attacks/optimized join',
+     '''SELECT a.id, p.confidence FROM attacks a JOIN predictions p ON a.prediction_id = p.id
+        ORDER BY a.timestamp DESC LIMIT 100''', (), 'idx_attacks_timestamp'),
+    ('/api/attacks?view=incidents',
+     'SELECT * FROM incidents WHERE last_seen >= %s ORDER BY last_seen DESC LIMIT 100',
+     ('2026-01-01',), 'idx_incidents_last_seen'),
+    ('/api/attacks?view=incidents&client_ip=',
+     'SELECT * FROM incidents WHERE client_ip = %s ORDER BY last_seen DESC LIMIT 100',
+     ('10.0.0.1',), 'idx_incidents_client_ip_last_seen'),
+]
+
+
+def verify_query_plans(connection):
+    """EXPLAIN every query in QUERY_PLANS; returns [(description, ok, chosen key, access type)]
+
+    A query passes when its expected index is among possible_keys (or is the
+    chosen key) and no table it reads is fully scanned without an index.
+    """
+    cursor = connection.cursor(dictionary=True)
+    results = []
+    try:
+        for description, query, params, expected in QUERY_PLANS:
+            cursor.execute(f"EXPLAIN {query}", params)
+            plan = cursor.fetchall()
+            usable = any(expected in (row.get('possible_keys') or '').split(',') or row.get('key') == expected
+                         for row in plan)
+            scans = [row for row in plan if row.get('type') == 'ALL' and not row.get('key')]
+            chosen = ', '.join(f"{row['table']}:{row.get('key') or '-'}" for row in plan)
+            types = ', '.join(str(row.get('type')) for row in plan)
+            results.append((description, usable and not scans, chosen, types))
+    finally:
+        cursor.close()
+    return results
+
+
+def main():
+    from config.database_config import DatabaseConfig
+
+    parser = argparse.ArgumentParser(description='NIDS schema migrations')
+    parser.add_argument('command', choices=['status', 'migrate', 'verify'])
+    parser.add_argument('--env', default='DEV', choices=['DEV', 'PROD'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    config = DatabaseConfig.DEV if args.env == 'DEV' else DatabaseConfig.PROD
+    connection = mysql.connector.connect(**{k: config[k] for k in
+                                            ('host', 'port', 'user', 'password', 'database', 'charset')})
+    try:
+        if args.command == 'migrate':
+            applied = run_migrations(connection)
+            print(f"✅ Applied {len(applied)} migrations" if applied else "✅ Schema is up to date")
+        elif args.command == 'status':
+            cursor = connection.cursor()
+            done = applied_versions(cursor)
+            cursor.close()
+            for version, name, _ in MIGRATIONS:
+                print(f"  {'✅' if version in done else '⏳'} {version:>3}  {name}")
+        else:
+            failures = 0
+            for description, ok, chosen, types in verify_query_plans(connection):
+                failures += not ok
+                print(f"  {'✅' if ok else '❌'} {description:<30} key={chosen}  type={types}")
+            if failures:
+                raise SystemExit(f"❌ {failures} queries cannot use their index")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,38 @@
 # database/mysql_manager.py
 import mysql.connector
 from mysql.connector import pooling
-import json
 from datetime import datetime
+import json
 import logging
+import os
 from config.database_config import DatabaseConfig
+from config.db_router import DatabaseRouter
+from config.migrations import run_migrations
+from config.stats_buffer import StatsBuffer
+from config.storage import close_unread
+from utils.categories import record_columns, signatures
+from utils.feature_codec import encode_features
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_SEARCH_ROWS = int(os.getenv('NIDS_MAX_STREAM_ROWS', 100000))
+
+STATS_LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'stats')
+
 class MySQLDatabase:
     """MySQL Database Manager for NIDS"""
     
     def __init__(self, environment='DEV'):
         self.environment = environment
         self.config = DatabaseConfig.DEV if environment == 'DEV' else DatabaseConfig.PROD
+        self.replica_config = DatabaseConfig.DEV_REPLICA if environment == 'DEV' else DatabaseConfig.PROD_REPLICA
         self.connection_pool = None
+        self.router = None
         self.init_pool()
+        self.init_router()
         self.init_database()
+        self.stats_buffer = StatsBuffer(self.get_connection, STATS_LOG_DIR).start()
     
     def init_pool(self):
         """Initialize connection pool"""
@@ -37,6 +52,28 @@ class MySQLDatabase:
             logger.error(f"❌ Failed to initialize connection pool: {err}")
             raise
     
+    def init_router(self):
+        """Send the query methods below to the read replica, if one is configured"""
+        if not self.replica_config['host']:
+            return
+        keys = ('host', 'port', 'user', 'password', 'database', 'charset')
+        self.router = DatabaseRouter(
+            {k: self.config[k] for k in keys},
+            {k: self.replica_config[k] for k in keys},
+            read_pool_size=self.replica_config['pool_size'],
+            max_lag=DatabaseConfig.REPLICA_MAX_LAG,
+            check_interval=DatabaseConfig.REPLICA_CHECK_INTERVAL,
+            allow_standalone=DatabaseConfig.REPLICA_ALLOW_STANDALONE,
+            writer=self.get_connection
+        ).start()
+        logger.info(f"✅ Queries routed to read replica {self.replica_config['host']}")
+    
+    def get_read_connection(self):
+        """Replica connection for the query methods, or the primary when the router says so"""
+        if self.router:
+            return self.router.reader()
+        return self.get_connection()
+    
     def get_connection(self):
         """Get connection from pool"""
         try:
@@ -82,13 +119,12 @@ class MySQLDatabase:
                     user_agent TEXT,
                     request_path VARCHAR(255),
                     raw_data JSON,
+                    features_blob VARBINARY(255),
                     
                     -- Indexes for performance
                     INDEX idx_timestamp (timestamp),
-                    INDEX idx_is_attack (is_attack),
-                    INDEX idx_prediction (prediction),
-                    INDEX idx_src_bytes (src_bytes),
-                    INDEX idx_client_ip (client_ip)
+                    INDEX idx_is_attack_timestamp (is_attack, timestamp),
+                    INDEX idx_client_ip_timestamp (client_ip, timestamp)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             ''')
             
@@ -107,9 +143,8 @@ class MySQLDatabase:
                     notes TEXT,
                     
                     FOREIGN KEY (prediction_id) REFERENCES predictions(id) ON DELETE CASCADE,
-                    INDEX idx_attack_type (attack_type),
-                    INDEX idx_severity (severity),
-                    INDEX idx_alert_sent (alert_sent)
+                    INDEX idx_attacks_timestamp (timestamp),
+                    INDEX idx_attacks_prediction_id (prediction_id)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             ''')
             
@@ -132,6 +167,9 @@ class MySQLDatabase:
             connection.commit()
             logger.info("✅ Database tables initialized successfully")
             
+            # Converge with the SimpleDatabase schema and add the query indexes
+            run_migrations(connection)
+            
         except mysql.connector.Error as err:
             logger.error(f"❌ Failed to initialize database: {err}")
             connection.rollback()
@@ -149,10 +187,12 @@ class MySQLDatabase:
         try:
             # Extract features from prediction data
             features = prediction_data.get('features', {})
+            # Shared with the attacks row so both land in the same partition
+            created_at = datetime.now().replace(microsecond=0)
             
             cursor.execute('''
                 INSERT INTO predictions (
-                    prediction, prediction_label, confidence,
+                    timestamp, prediction, prediction_label, confidence,
                     attack_probability, normal_probability,
                     features_count,
                     src_bytes, dst_bytes, count, srv_count,
@@ -160,9 +200,11 @@ class MySQLDatabase:
                     dst_host_count, dst_host_srv_count,
                     dst_host_serror_rate, dst_host_srv_serror_rate,
                     duration,
-                    is_attack, client_ip, user_agent, request_path, raw_data
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    is_attack, client_ip, user_agent, request_path, features_blob,
+                    attack_category, category_probabilities
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             ''', (
+                created_at,
                 prediction_data.get('prediction'),
                 prediction_data.get('prediction_label'),
                 prediction_data.get('confidence'),
@@ -184,27 +226,35 @@ class MySQLDatabase:
                 client_ip,
                 user_agent,
                 request_path,
-                json.dumps(prediction_data)
+                encode_features(features),
+                prediction_data.get('category'),
+                json.dumps(prediction_data['category_probabilities'], separators=(',', ':'))
+                if prediction_data.get('category_probabilities') else None
             ))
             
             prediction_id = cursor.lastrowid
             
             # If it's an attack, log to attacks table
             if prediction_data.get('prediction') == 1:
-                attack_type = self._determine_attack_type(features)
+                # Set by the scoring pass; otherwise the same signature table
+                attack_type = (prediction_data.get('attack_type') or
+                               str(signatures(record_columns([features]))[0][0]))
                 severity = self._determine_severity(prediction_data)
                 
                 cursor.execute('''
-                    INSERT INTO attacks (prediction_id, attack_type, severity)
-                    VALUES (%s, %s, %s)
-                ''', (prediction_id, attack_type, severity))
-            
-            # Update daily statistics
-            self._update_statistics(connection, cursor, prediction_data)
+                    INSERT INTO attacks (prediction_id, timestamp, attack_type, severity)
+                    VALUES (%s, %s, %s, %s)
+                ''', (prediction_id, created_at, attack_type, severity))
             
             connection.commit()
+            if self.router:
+                self.router.note_write()
             logger.info(f"✅ Prediction logged with ID: {prediction_id}")
             
+            # Daily statistics are aggregated in memory and flushed in bulk
+            self.stats_buffer.record(prediction_data.get('prediction') == 1,
+                                     prediction_data.get('confidence', 0))
+            
             return prediction_id
             
         except mysql.connector.Error as err:
@@ -216,27 +266,6 @@ class MySQLDatabase:
             cursor.close()
             connection.close()
     
-    def _determine_attack_type(self, features):
-        """Determine type of attack based on features"""
-        src_bytes = features.get('src_bytes', 0)
-        dst_bytes = features.get('dst_bytes', 0)
-        count = features.get('count', 0)
-        serror_rate = features.get('serror_rate', 0)
-        duration = features.get('duration', 0)
-        
-        if src_bytes > 50000 and dst_bytes == 0:
-            return "DoS Attack"
-        elif count > 500:
-            return "High Volume Attack"
-        elif serror_rate > 0.7:
-            return "Error-Based Attack"
-        elif duration > 10 and count > 100:
-            return "Port Scanning"
-        elif src_bytes > 100000:
-            return "Flood Attack"
-        else:
-            return "Suspicious Activity"
-    
     def _determine_severity(self, prediction_data):
         """Determine attack severity based on probability"""
         attack_prob = prediction_data.get('probabilities', {}).get('attack', 0)
@@ -250,53 +279,10 @@ class MySQLDatabase:
         else:
             return "LOW"
     
-    def _update_statistics(self, connection, cursor, prediction_data):
-        """Update daily statistics"""
-        today = datetime.now().date()
-        
-        # Check if today's record exists
-        cursor.execute('SELECT id FROM statistics WHERE date = %s', (today,))
-        result = cursor.fetchone()
-        
-        if result:
-            # Update existing record
-            stats_id = result[0]
-            is_attack = prediction_data.get('prediction') == 1
-            
-            if is_attack:
-                cursor.execute('''
-                    UPDATE statistics 
-                    SET attack_count = attack_count + 1,
-                        total_predictions = total_predictions + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                ''', (stats_id,))
-            else:
-                cursor.execute('''
-                    UPDATE statistics 
-                    SET normal_count = normal_count + 1,
-                        total_predictions = total_predictions + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                ''', (stats_id,))
-        else:
-            # Create new record
-            is_attack = prediction_data.get('prediction') == 1
-            
-            cursor.execute('''
-                INSERT INTO statistics (date, total_predictions, attack_count, normal_count, avg_confidence)
-                VALUES (%s, 1, %s, %s, %s)
-            ''', (
-                today,
-                1 if is_attack else 0,
-                0 if is_attack else 1,
-                prediction_data.get('confidence', 0)
-            ))
-    
     # Query Methods
     def get_recent_predictions(self, limit=50):
         """Get recent predictions"""
-        connection = self.get_connection()
+        connection = self.get_read_connection()
         cursor = connection.cursor(dictionary=True)
         
         try:
@@ -312,7 +298,7 @@ class MySQLDatabase:
     
     def get_attacks_today(self):
         """Get today's attacks"""
-        connection = self.get_connection()
+        connection = self.get_read_connection()
         cursor = connection.cursor(dictionary=True)
         
         try:
@@ -320,7 +306,9 @@ class MySQLDatabase:
                 SELECT p.*, a.attack_type, a.severity 
                 FROM predictions p
                 JOIN attacks a ON p.id = a.prediction_id
-                WHERE DATE(p.timestamp) = CURDATE()
+                WHERE p.is_attack = 1
+                  AND p.timestamp >= CURDATE()
+                  AND p.timestamp < CURDATE() + INTERVAL 1 DAY
                 ORDER BY p.timestamp DESC
             ''')
             return cursor.fetchall()
@@ -330,7 +318,7 @@ class MySQLDatabase:
     
     def get_statistics(self, days=7):
         """Get statistics for last N days"""
-        connection = self.get_connection()
+        connection = self.get_read_connection()
         cursor = connection.cursor(dictionary=True)
         
         try:
@@ -344,10 +332,17 @@ class MySQLDatabase:
             cursor.close()
             connection.close()
     
-    def search_predictions(self, start_date, end_date, is_attack=None, min_confidence=None):
-        """Search predictions with filters"""
-        connection = self.get_connection()
-        cursor = connection.cursor(dictionary=True)
+    def search_predictions(self, start_date, end_date, is_attack=None, min_confidence=None,
+                           limit=MAX_SEARCH_ROWS, batch_size=1000):
+        """Search predictions with filters, yielding batches of row dicts
+        
+        Rows come from an unbuffered cursor batch_size at a time and at most
+        `limit` (capped at MAX_SEARCH_ROWS) are returned. Closing the
+        generator early releases the connection without reading the rest.
+        """
+        connection = self.get_read_connection()
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        finished = False
         
         try:
             query = '''
@@ -364,10 +359,19 @@ class MySQLDatabase:
                 query += ' AND confidence >= %s'
                 params.append(min_confidence)
             
-            query += ' ORDER BY timestamp DESC'
+            query += ' ORDER BY timestamp DESC LIMIT %s'
+            params.append(min(limit, MAX_SEARCH_ROWS))
             
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            finished = True
         finally:
-            cursor.close()
-            connection.close()
\ No newline at end of file
+            if finished:
+                cursor.close()
+                connection.close()
+            else:
+                close_unread(connection)
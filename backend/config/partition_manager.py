@@ -0,0 +1,278 @@
+# config/partition_manager.py
+#
+#   python -m config.partition_manager status
+#   python -m config.partition_manager convert --granularity day
+#   python -m config.partition_manager maintain --retention-days 30 --ahead 7
+#
+# Range-partitions `predictions` and `attacks` on their timestamp column, one
+# partition per day or ISO week. Partitions are named after their exclusive
+# upper bound (p20261020 holds rows before 2026-10-20) and a trailing `pmax`
+# catches anything past the last bound. Expired partitions are removed with
+# ALTER TABLE ... DROP PARTITION, which discards whole tablespaces instead of
+# deleting (and locking) rows one by one.
+#
+# MySQL does not allow foreign keys on partitioned InnoDB tables, so
+# `convert` drops attacks.prediction_id's foreign key. The cascade is kept by
+# construction instead: both tables share the same partition bounds, every
+# attack row carries its prediction's timestamp, and a purge drops the same
+# bounds from `attacks` and `predictions` together.
+import argparse
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('predictions', 'attacks')
+GRANULARITIES = ('day', 'week')
+LOCK_NAME = 'nids_partition_maintenance'
+
+
+def period_start(day, granularity):
+    """First day of the partition period containing `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def period_step(granularity):
+    return timedelta(days=7 if granularity == 'week' else 1)
+
+
+def partition_name(bound):
+    return f"p{bound:%Y%m%d}"
+
+
+def partition_bound(name):
+    """Upper bound date encoded in a partition name, None for pmax/others"""
+    try:
+        return datetime.strptime(name[1:], '%Y%m%d').date()
+    except ValueError:
+        return None
+
+
+class PartitionManager:
+    """Creates, rolls forward and purges day/week partitions"""
+
+    def __init__(self, get_connection, granularity='day', retention_days=30, ahead=7,
+                 tables=TABLES):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        self.get_connection = get_connection
+        self.granularity = granularity
+        self.retention_days = retention_days
+        self.ahead = ahead
+        self.tables = tuple(tables)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- schema inspection ----------
+    def _timestamp_type(self, cursor, table):
+        cursor.execute('''
+            SELECT DATA_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'timestamp'
+        ''', (table,))
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError(f"table {table} has no timestamp column")
+        return row[0].lower()
+
+    def _partitions(self, cursor, table):
+        """[(name, rows)] in bound order; empty when the table is not partitioned"""
+        cursor.execute('''
+            SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        ''', (table,))
+        return cursor.fetchall()
+
+    def _bound_sql(self, column_type, bound):
+        if column_type == 'timestamp':
+            return f"UNIX_TIMESTAMP('{bound:%Y-%m-%d} 00:00:00')"
+        return f"TO_DAYS('{bound:%Y-%m-%d}')"
+
+    def _partition_sql(self, column_type, bounds):
+        parts = [f"PARTITION {partition_name(b)} VALUES LESS THAN ({self._bound_sql(column_type, b)})"
+                 for b in bounds]
+        parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        return ',\n    '.join(parts)
+
+    def _wanted_bounds(self, today=None):
+        """Upper bounds from the current period through `ahead` periods ahead"""
+        today = today or date.today()
+        step = period_step(self.granularity)
+        first = period_start(today, self.granularity) + step
+        periods = max(1, -(-self.ahead // step.days)) + 1
+        return [first + step * i for i in range(periods)]
+
+    # ---------- operations ----------
+    def convert(self, today=None):
+        """One-off: partition existing tables (rewrites them; run in a maintenance window)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            if 'attacks' in self.tables:
+                cursor.execute('''
+                    SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+                    WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'attacks'
+                ''')
+                for (fk,) in cursor.fetchall():
+                    cursor.execute(f"ALTER TABLE attacks DROP FOREIGN KEY `{fk}`")
+                    logger.info(f"🔧 Dropped foreign key attacks.{fk} (not supported on partitioned tables)")
+
+            today = today or date.today()
+            # Everything before the current period lands in the first partition
+            bounds = [period_start(today, self.granularity)] + self._wanted_bounds(today)
+            for table in self.tables:
+                if self._partitions(cursor, table):
+                    logger.info(f"✅ {table} is already partitioned")
+                    continue
+                column_type = self._timestamp_type(cursor, table)
+                expression = ('UNIX_TIMESTAMP(timestamp)' if column_type == 'timestamp'
+                              else 'TO_DAYS(timestamp)')
+                # Every unique key must include the partitioning column
+                cursor.execute(f'''
+                    ALTER TABLE {table}
+                    MODIFY timestamp {column_type.upper()} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    DROP PRIMARY KEY,
+                    ADD PRIMARY KEY (id, timestamp)
+                    PARTITION BY RANGE ({expression}) (
+                    {self._partition_sql(column_type, bounds)}
+                    )
+                ''')
+                logger.info(f"✅ Partitioned {table} by {self.granularity} ({len(bounds) + 1} partitions)")
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def maintain(self, today=None):
+        """Create upcoming partitions and drop expired ones; returns what changed"""
+        today = today or date.today()
+        cutoff = today - timedelta(days=self.retention_days)
+        created, dropped = {}, {}
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            # Serialize maintenance across workers and hosts
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+            if cursor.fetchone()[0] != 1:
+                logger.info("⏭ Partition maintenance already running elsewhere")
+                return {'created': created, 'dropped': dropped, 'skipped': True}
+            try:
+                for table in self.tables:
+                    existing = [name for name, _ in self._partitions(cursor, table)]
+                    if not existing:
+                        logger.warning(f"⚠ {table} is not partitioned; run `convert` first")
+                        continue
+                    column_type = self._timestamp_type(cursor, table)
+                    bounds = {partition_bound(name) for name in existing} - {None}
+                    last = max(bounds)
+                    new = [b for b in self._wanted_bounds(today) if b > last]
+                    if new:
+                        cursor.execute(f'''
+                            ALTER TABLE {table} REORGANIZE PARTITION pmax INTO (
+                            {self._partition_sql(column_type, new)}
+                            )
+                        ''')
+                        created[table] = [partition_name(b) for b in new]
+
+                # Drop the same bounds from every table so an attack never
+                # outlives its prediction; attacks first, predictions last
+                expired = set()
+                for table in self.tables:
+                    existing = [name for name, _ in self._partitions(cursor, table)]
+                    bounded = [name for name in existing if partition_bound(name)]
+                    # Always keep at least one bounded partition
+                    expired.update(name for name in bounded[:-1] if partition_bound(name) <= cutoff)
+                for table in sorted(self.tables, key=lambda t: t != 'attacks'):
+                    names = [name for name, _ in self._partitions(cursor, table) if name in expired]
+                    if names:
+                        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(names)}")
+                        dropped[table] = names
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        for table, names in created.items():
+            logger.info(f"✅ {table}: created {', '.join(names)}")
+        for table, names in dropped.items():
+            logger.info(f"🗑 {table}: dropped {', '.join(names)} (retention {self.retention_days} days)")
+        return {'created': created, 'dropped': dropped, 'skipped': False}
+
+    def status(self):
+        """{table: [{'partition', 'upper_bound', 'rows'}]} (rows are InnoDB estimates)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            result = {}
+            for table in self.tables:
+                result[table] = [{
+                    'partition': name,
+                    'upper_bound': str(partition_bound(name) or 'MAXVALUE'),
+                    'rows': rows,
+                } for name, rows in self._partitions(cursor, table)]
+            return result
+        finally:
+            cursor.close()
+            conn.close()
+
+    # ---------- background maintenance ----------
+    def start(self, interval=3600):
+        """Run maintain() now and then every `interval` seconds in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,),
+                                        name='partition-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.error(f"❌ Partition maintenance failed: {e}")
+            self._stop.wait(interval)
+
+
+def main():
+    from config.database_config import DatabaseConfig
+
+    parser = argparse.ArgumentParser(description='Manage predictions/attacks partitions')
+    parser.add_argument('command', choices=['status', 'convert', 'maintain'])
+    parser.add_argument('--env', default='DEV', choices=['DEV', 'PROD'])
+    parser.add_argument('--granularity', default='day', choices=GRANULARITIES)
+    parser.add_argument('--retention-days', type=int, default=30)
+    parser.add_argument('--ahead', type=int, default=7, help='days of partitions to create ahead')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    config = DatabaseConfig.DEV if args.env == 'DEV' else DatabaseConfig.PROD
+    connect_args = {k: config[k] for k in ('host', 'port', 'user', 'password', 'database', 'charset')}
+    manager = PartitionManager(lambda: mysql.connector.connect(**connect_args),
+                               granularity=args.granularity,
+                               retention_days=args.retention_days, ahead=args.ahead)
+
+    if args.command == 'convert':
+        manager.convert()
+        manager.maintain()
+    elif args.command == 'maintain':
+        manager.maintain()
+    for table, partitions in manager.status().items():
+        print(f"{table}: {len(partitions)} partitions")
+        for p in partitions:
+            print(f"  {p['partition']:<10} < {p['upper_bound']:<10} ~{p['rows']} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# config/sampling.py
+#
+# Which scored rows are written to `predictions`.
+#
+# Attacks and every normal prediction the model is not sure about
+# (normal_probability <= keep_below, i.e. "Likely Normal" and "Uncertain" /
+# MONITOR) are always stored with sample_weight 1. Confident normal rows are
+# sampled per source (the stratum): the first min_per_stratum of each source
+# in every window_seconds window are stored with weight 1, so quiet sources
+# stay visible, and past that each row is stored with probability `rate` and
+# weight 1 / rate. SUM(sample_weight) over any subset of stored rows is then
+# an unbiased estimate of how many rows it stands for.
+#
+# Rows that are not stored are still counted exactly: PredictionStore adds
+# them to `sampled_counts` in the same transaction as the kept rows.
+import random
+import threading
+import time
+
+
+class SamplingPolicy:
+    """Per-row store / drop decision with the weight a stored row carries"""
+
+    def __init__(self, rate=1.0, keep_below=95.0, min_per_stratum=10, window_seconds=60,
+                 max_strata=10000, seed=None, clock=time.time):
+        self.rate = rate
+        self.keep_below = keep_below
+        self.min_per_stratum = min_per_stratum
+        self.window_seconds = window_seconds
+        self.max_strata = max_strata
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._window = None
+        self._seen = {}  # source -> confident normal rows this window
+        self._lock = threading.Lock()
+        self.kept = {'attack': 0, 'uncertain': 0, 'normal': 0}
+        self.dropped = 0
+
+    def _stratum_count(self, source):
+        window = int(self.clock() // self.window_seconds)
+        if window != self._window:
+            self._window = window
+            self._seen = {}
+        count = self._seen.get(source)
+        if count is None:
+            if len(self._seen) >= self.max_strata:
+                return self.min_per_stratum  # Too many sources: sample every new one
+            count = 0
+        self._seen[source] = count + 1
+        return count
+
+    def weights(self, records):
+        """Weight per (prediction_data, features, client_ip) record; 0 means not stored"""
+        weights = []
+        with self._lock:
+            for prediction_data, _, client_ip in records:
+                if int(prediction_data.get('prediction', 0)) == 1:
+                    self.kept['attack'] += 1
+                    weights.append(1.0)
+                elif float(prediction_data.get('probabilities', {}).get('normal', 0)) <= self.keep_below:
+                    self.kept['uncertain'] += 1
+                    weights.append(1.0)
+                elif self._stratum_count(client_ip) < self.min_per_stratum:
+                    self.kept['normal'] += 1
+                    weights.append(1.0)
+                elif self._random.random() < self.rate:
+                    self.kept['normal'] += 1
+                    weights.append(1.0 / self.rate)
+                else:
+                    self.dropped += 1
+                    weights.append(0.0)
+        return weights
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'keep_below': self.keep_below,
+                'min_per_source': self.min_per_stratum,
+                'kept': dict(self.kept),
+                'dropped': self.dropped
+            }
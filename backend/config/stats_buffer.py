@@ -0,0 +1,311 @@
+# config/stats_buffer.py
+#
+# Write-side aggregation for the daily `statistics` table.
+#
+# Instead of a SELECT + UPDATE/INSERT on today's row inside every
+# prediction's transaction, record() adds the prediction to per-day deltas
+# held in memory, and a background thread flushes all days in one
+# INSERT ... ON DUPLICATE KEY UPDATE every few seconds.
+#
+# Crash tolerance: every record() is also appended to a replay segment
+# (one JSON line per delta) under log_dir. A flush commits the deltas
+# together with the ids of the segments they came from into
+# `stats_flushes`, in one transaction, and then deletes those segment files.
+# On start, segments whose id is already in `stats_flushes` are deleted and
+# the rest are replayed, so each delta is applied exactly once. While the
+# database is unreachable, segments are compacted to one line per day once
+# they exceed max_log_bytes, which keeps the log bounded.
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; segments are then not locked between processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('total', 'attacks', 'normal', 'confidence_sum', 'false_positives', 'false_negatives')
+
+FLUSH_SQL = '''
+    INSERT INTO statistics (date, total_predictions, attack_count, normal_count,
+                            confidence_sum, false_positives, false_negatives, avg_confidence)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE
+        confidence_sum = COALESCE(confidence_sum, avg_confidence * total_predictions, 0)
+                         + VALUES(confidence_sum),
+        avg_confidence = confidence_sum / NULLIF(total_predictions + VALUES(total_predictions), 0),
+        total_predictions = total_predictions + VALUES(total_predictions),
+        attack_count = attack_count + VALUES(attack_count),
+        normal_count = normal_count + VALUES(normal_count),
+        false_positives = false_positives + VALUES(false_positives),
+        false_negatives = false_negatives + VALUES(false_negatives)
+'''
+
+
+class Segment:
+    """One replay log file, held open and locked while its deltas are unflushed"""
+
+    def __init__(self, path, mode='a'):
+        self.path = path
+        self.id = os.path.basename(path)[len('stats-'):-len('.log')]
+        self.file = open(path, mode)
+        self.size = self.file.seek(0, os.SEEK_END)
+
+    def lock(self, blocking=True):
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except OSError:
+            return False
+
+    def append(self, line):
+        self.file.write(line)
+        self.file.flush()
+        self.size += len(line)
+
+    def remove(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def add_delta(pending, day, delta):
+    totals = pending.setdefault(day, [0, 0, 0, 0.0, 0, 0])
+    for i, value in enumerate(delta):
+        totals[i] += value
+
+
+class StatsBuffer:
+    """Per-day statistics deltas, flushed in bulk with a bounded replay log"""
+
+    def __init__(self, get_connection, log_dir, flush_interval=5.0, max_log_bytes=4 * 1024 * 1024):
+        self.get_connection = get_connection
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self.max_log_bytes = max_log_bytes
+        self.pending = {}
+        self.segments = []          # unflushed segments, oldest first; the last one is written to
+        self.unverified = []        # recovered segments not yet checked against stats_flushes
+        self.flushes = 0
+        self.failed_flushes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._recover()
+        self._open_segment()
+
+    # ---------- replay log ----------
+    def _open_segment(self):
+        segment = Segment(os.path.join(self.log_dir, f"stats-{uuid.uuid4().hex}.log"))
+        segment.lock()
+        self.segments.append(segment)
+
+    def _log_bytes(self):
+        return sum(segment.size for segment in self.segments)
+
+    def _compact(self):
+        """Replace every unflushed segment with one holding a line per day (lock held)"""
+        old = self.segments
+        self.segments = []
+        self._open_segment()
+        compacted = self.segments[0]
+        for day, totals in self.pending.items():
+            compacted.append(json.dumps([day] + totals) + '\n')
+        self._open_segment()
+        for segment in old:
+            segment.remove()
+        logger.warning(f"⚠ Statistics replay log compacted to {len(self.pending)} days")
+
+    def _recover(self):
+        """Replay segments left by crashed processes that were never flushed"""
+        candidates = []
+        for name in sorted(os.listdir(self.log_dir)):
+            if not (name.startswith('stats-') and name.endswith('.log')):
+                continue
+            segment = Segment(os.path.join(self.log_dir, name), mode='a+')
+            if segment.lock(blocking=False):
+                candidates.append(segment)
+            else:
+                segment.file.close()  # A live process still owns it
+
+        if candidates:
+            self.unverified = candidates
+            self._verify_recovered()
+
+    def _verify_recovered(self):
+        """Drop recovered segments that were already flushed and replay the rest
+
+        If the database cannot be asked, the segments stay unverified and
+        are retried before the next flush.
+        """
+        flushed = self._flushed_ids([segment.id for segment in self.unverified])
+        if flushed is None:
+            return
+        replayed = 0
+        with self._lock:
+            for segment in self.unverified:
+                if segment.id in flushed:
+                    segment.remove()
+                    continue
+                segment.file.seek(0)
+                for line in segment.file:
+                    try:
+                        day, *delta = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from the crash
+                    add_delta(self.pending, day, delta)
+                    replayed += 1
+                self.segments.insert(0, segment)
+        self.unverified = []
+        if replayed:
+            logger.info(f"🔄 Replayed {replayed} statistics deltas from crashed processes")
+
+    def _connect(self):
+        """A connection, or None; SimpleDatabase returns None, MySQLDatabase raises"""
+        try:
+            return self.get_connection()
+        except Exception as e:
+            logger.error(f"❌ Statistics buffer has no database connection: {e}")
+            return None
+
+    def _flushed_ids(self, ids):
+        conn = self._connect()
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"SELECT flush_id FROM stats_flushes WHERE flush_id IN ({placeholders})", ids)
+            return {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"❌ Could not read stats_flushes: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    # ---------- recording ----------
+    def record(self, is_attack, confidence, day=None):
+        """Count one prediction towards its day"""
+        self._add(day, [1, int(bool(is_attack)), int(not is_attack), float(confidence or 0.0), 0, 0])
+
+    def record_feedback(self, false_positive=False, false_negative=False, day=None):
+        """Count an analyst's correction of an earlier prediction"""
+        self._add(day, [0, 0, 0, 0.0, int(bool(false_positive)), int(bool(false_negative))])
+
+    def _add(self, day, delta):
+        day = (day or date.today()).isoformat()
+        with self._lock:
+            add_delta(self.pending, day, delta)
+            self.segments[-1].append(json.dumps([day] + delta) + '\n')
+            if self._log_bytes() > self.max_log_bytes:
+                self._compact()
+
+    # ---------- flushing ----------
+    def flush(self):
+        """Write all pending deltas in one statement; returns the number of days flushed"""
+        with self._flush_lock:
+            if self.unverified:
+                self._verify_recovered()
+            with self._lock:
+                if not self.pending:
+                    return 0
+                deltas, self.pending = self.pending, {}
+                segments, self.segments = self.segments, []
+                self._open_segment()
+
+            conn = self._connect()
+            try:
+                if not conn:
+                    raise ConnectionError('no database connection')
+                cursor = conn.cursor()
+                try:
+                    rows, params = [], []
+                    for day, (total, attacks, normal, conf_sum, fp, fn) in sorted(deltas.items()):
+                        rows.append('(%s, %s, %s, %s, %s, %s, %s, %s)')
+                        params += [day, total, attacks, normal, round(conf_sum, 2), fp, fn,
+                                   round(conf_sum / total, 2) if total else None]
+                    cursor.execute(FLUSH_SQL.format(rows=', '.join(rows)), params)
+                    cursor.executemany('INSERT INTO stats_flushes (flush_id) VALUES (%s)',
+                                       [(segment.id,) for segment in segments])
+                    conn.commit()
+                finally:
+                    cursor.close()
+            except Exception as e:
+                # Keep the deltas (and their segments) for the next attempt
+                self.failed_flushes += 1
+                logger.error(f"❌ Statistics flush failed, will retry: {e}")
+                if conn:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                with self._lock:
+                    for day, delta in deltas.items():
+                        add_delta(self.pending, day, delta)
+                    self.segments = segments + self.segments
+                return 0
+            finally:
+                if conn:
+                    conn.close()
+
+            for segment in segments:
+                segment.remove()
+            self.flushes += 1
+            return len(deltas)
+
+    def prune_flush_markers(self, days=7):
+        """Forget flush ids older than any segment could be"""
+        conn = self._connect()
+        if not conn:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM stats_flushes WHERE flushed_at < NOW() - INTERVAL %s DAY', (days,))
+            conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Could not prune stats_flushes: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    def snapshot(self):
+        """Unflushed deltas per day, for dashboards that want up-to-the-second counts"""
+        with self._lock:
+            return {day: dict(zip(FIELDS, totals)) for day, totals in self.pending.items()}
+
+    # ---------- background thread ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stats-buffer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and flush what is left"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        ticks = 0
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            ticks += 1
+            if ticks % 1000 == 0:
+                self.prune_flush_markers()
@@ -0,0 +1,655 @@
+# config/storage.py
+#
+# Storage backends for predictions and attacks.
+#
+# PredictionStore holds everything that does not depend on the database:
+# turning a prediction into rows, batched appends, and the queries behind
+# /api/stats, /api/attacks and /api/attacks/optimized. Attack incidents are
+# aggregated by config/incidents.py. SimpleDatabase
+# (app.py) is the MySQL backend; SQLiteStorage below is an embedded backend
+# for single-node sensors, tests and offline benchmarks. app.py picks one
+# with NIDS_STORAGE_BACKEND.
+import json
+import os
+import sqlite3
+import threading
+import traceback
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config.migrations import INCIDENT_INDEXES, QUERY_INDEXES
+from utils.categories import record_columns, signatures
+from utils.feature_codec import CURRENT_VERSION, FEATURE_LAYOUTS, decode_many, encode_features
+
+PREDICTION_INSERT_COLUMNS = (
+    'timestamp', 'prediction', 'prediction_label', 'confidence',
+    'attack_probability', 'normal_probability',
+    'src_bytes', 'dst_bytes', 'count', 'srv_count',
+    'serror_rate', 'srv_serror_rate',
+    'dst_host_count', 'dst_host_srv_count',
+    'dst_host_serror_rate', 'dst_host_srv_serror_rate',
+    'duration', 'features_count',
+    'is_attack', 'client_ip', 'features_blob', 'sample_weight',
+    'attack_category', 'category_probabilities',
+)
+
+# One predictions row, in insert order; save_predictions reads fields by name
+PredictionRow = namedtuple('PredictionRow', PREDICTION_INSERT_COLUMNS)
+
+ATTACK_INSERT_COLUMNS = ('prediction_id', 'timestamp', 'attack_type', 'severity')
+
+# /api/predictions/search rows; the features come from features_blob, decoded
+# into one field per feature, rather than from the rounded feature columns
+PREDICTION_SEARCH_COLUMNS = (
+    'id', 'timestamp', 'prediction', 'prediction_label', 'confidence',
+    'attack_probability', 'normal_probability', 'is_attack', 'client_ip',
+    'sample_weight', 'attack_category', 'category_probabilities',
+)
+
+ATTACK_DETAILS_QUERY = '''
+    SELECT
+        a.id as attack_id,
+        a.prediction_id,
+        a.timestamp as attack_timestamp,
+        a.attack_type,
+        a.severity,
+        p.timestamp as prediction_timestamp,
+        p.prediction,
+        p.prediction_label,
+        p.confidence as model_confidence,
+        p.attack_probability,
+        p.normal_probability,
+        p.src_bytes,
+        p.dst_bytes,
+        p.count,
+        p.srv_count,
+        p.serror_rate,
+        p.srv_serror_rate,
+        p.is_attack,
+        p.client_ip,
+        p.attack_category,
+        p.category_probabilities
+    FROM attacks a
+    JOIN predictions p ON a.prediction_id = p.id
+    ORDER BY a.timestamp DESC
+'''
+
+
+def convert_value(value):
+    """Convert numpy/pandas types to Python native types"""
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    elif isinstance(value, pd.Series):
+        return value.iloc[0].item() if len(value) > 0 else 0
+    elif isinstance(value, pd.DataFrame):
+        return value.iloc[0, 0].item() if value.shape[0] > 0 and value.shape[1] > 0 else 0
+    elif isinstance(value, np.ndarray):
+        return value.item() if value.size > 0 else 0
+    else:
+        return value
+
+
+def close_unread(conn):
+    """Release a MySQL connection whose unbuffered result was not read to the end"""
+    # The unread rows are still on the socket, so the session cannot be
+    # reused; disconnecting makes a pool reconnect it on next use
+    try:
+        getattr(conn, '_cnx', conn).disconnect()
+    except Exception:
+        pass
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class PredictionStore:
+    """Backend-independent prediction persistence and queries
+
+    Subclasses provide get_connection() and set `placeholder` to their DB-API
+    paramstyle marker.
+    """
+
+    placeholder = '%s'
+    stats = None  # StatsBuffer for the daily statistics table, set by init_worker
+    incidents = None  # IncidentAggregator, set by init_worker
+    attack_rows = True  # False: attacks are kept as incidents only, not one row each
+    sampling = None  # SamplingPolicy for confident normal rows, set by init_worker
+    router = None  # DatabaseRouter when reads go to a replica (config/db_router.py)
+    version = None  # DataVersion bumped after each commit, for the response cache
+
+    # ---------- backend hooks ----------
+    def get_connection(self):
+        raise NotImplementedError
+
+    def get_read_connection(self):
+        """Connection for dashboard and analyst queries; the writer unless a router says otherwise"""
+        return self.get_connection()
+
+    def _dict_cursor(self, conn):
+        return conn.cursor(dictionary=True)
+
+    def _fetch_dicts(self, cursor):
+        return cursor.fetchall()
+
+    def _reserve_ids(self, cursor, n):
+        """Called before a batch insert; may return the first id the batch will get"""
+        return None
+
+    def _autoinc_settings(self, cursor):
+        """(auto_increment_increment, innodb_autoinc_lock_mode), read once per store"""
+        settings = getattr(self, '_autoinc', None)
+        if settings is None:
+            cursor.execute('SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode')
+            settings = self._autoinc = tuple(int(value) for value in cursor.fetchone())
+        return settings
+
+    def _insert_predictions(self, cursor, sql, rows, reserved):
+        """Insert prediction rows and return their ids in input order"""
+        step, lock_mode = self._autoinc_settings(cursor)
+        if len(rows) == 1 or lock_mode == 2:
+            # Interleaved lock mode does not promise one statement a
+            # contiguous block of ids, so each row reports its own
+            ids = []
+            for row in rows:
+                cursor.execute(sql, row)
+                ids.append(cursor.lastrowid)
+            return ids
+        # Lock modes 0 and 1 give a multi-row insert one block of ids,
+        # auto_increment_increment apart, starting at lastrowid
+        cursor.executemany(sql, rows)
+        if cursor.rowcount != len(rows):
+            raise RuntimeError(f'inserted {cursor.rowcount} of {len(rows)} prediction rows')
+        first_id = cursor.lastrowid
+        return list(range(first_id, first_id + len(rows) * step, step))
+
+    def _timestamp(self, value):
+        return value
+
+    def _stream_cursor(self, conn, dictionary=False):
+        # Unbuffered: rows stay on the server until fetchmany() asks for them
+        cursor = conn.cursor(buffered=False, dictionary=dictionary)
+        # A slow reader must not trip the server's write timeout mid-stream
+        cursor.execute('SET SESSION net_write_timeout = 600')
+        return cursor
+
+    def _abandon_stream(self, conn, cursor):
+        close_unread(conn)
+
+    def _count_sampled_sql(self):
+        p = self.placeholder
+        return (f"INSERT INTO sampled_counts (date, dropped) VALUES ({p}, {p}) "
+                "ON DUPLICATE KEY UPDATE dropped = dropped + VALUES(dropped)")
+
+    def _insert_sql(self, table, columns):
+        values = ', '.join([self.placeholder] * len(columns))
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+
+    # ---------- row building ----------
+    def _prediction_row(self, prediction_data, features, client_ip, created_at, sample_weight=1.0):
+        prediction = int(convert_value(prediction_data.get('prediction', 0)))
+        probabilities = prediction_data.get('probabilities', {})
+        category_probabilities = prediction_data.get('category_probabilities')
+
+        def feature(name, cast):
+            return cast(convert_value(features.get(name, 0)))
+
+        return PredictionRow(
+            created_at,
+            prediction,
+            str(prediction_data.get('prediction_label', 'Unknown')),
+            float(convert_value(prediction_data.get('confidence', 0))),
+            float(convert_value(probabilities.get('attack', 0))),
+            float(convert_value(probabilities.get('normal', 0))),
+            feature('src_bytes', int), feature('dst_bytes', int),
+            feature('count', int), feature('srv_count', int),
+            feature('serror_rate', float), feature('srv_serror_rate', float),
+            feature('dst_host_count', int), feature('dst_host_srv_count', int),
+            feature('dst_host_serror_rate', float), feature('dst_host_srv_serror_rate', float),
+            feature('duration', float),
+            len(features),
+            prediction == 1,
+            str(client_ip),
+            # Features as a versioned float32 vector
+            encode_features(features),
+            sample_weight,
+            prediction_data.get('category'),
+            json.dumps(category_probabilities, separators=(',', ':')) if category_probabilities else None,
+        )
+
+    def _determine_severity(self, attack_prob):
+        """Determine attack severity"""
+        if attack_prob > 80:
+            return "CRITICAL"
+        elif attack_prob > 60:
+            return "HIGH"
+        elif attack_prob > 40:
+            return "MEDIUM"
+        else:
+            return "LOW"
+
+    # ---------- writes ----------
+    def save_prediction(self, prediction_data, features, client_ip):
+        """Save prediction to database"""
+        print(f"💾 Attempting to save prediction to database...")
+        ids = self.save_predictions([(prediction_data, features, client_ip)])
+        if ids and ids[0] is None:
+            print("⏭ Normal prediction counted but not stored (sampled out)")
+        elif ids:
+            print(f"✅ Saved to database with ID: {ids[0]}")
+            return ids[0]
+        return None
+
+    def save_predictions(self, records):
+        """Append many (prediction_data, features, client_ip) in one transaction
+
+        Returns the new prediction ids in input order, or None on failure.
+        With a sampling policy, records it does not store get None for an
+        id and are only counted, in `sampled_counts`.
+        """
+        if not records:
+            return []
+        conn = self.get_connection()
+        if not conn:
+            print("❌ No database connection available")
+            return None
+
+        cursor = conn.cursor()
+        try:
+            # One timestamp for both rows keeps an attack in the same
+            # partition as its prediction
+            now = datetime.now().replace(microsecond=0)
+            created_at = self._timestamp(now)
+            weights = self.sampling.weights(records) if self.sampling else [1.0] * len(records)
+            kept = [record for record, weight in zip(records, weights) if weight]
+            rows = [self._prediction_row(data, features, client_ip, created_at, weight)
+                    for (data, features, client_ip), weight in zip(records, weights) if weight]
+
+            ids = []
+            if rows:
+                reserved = self._reserve_ids(cursor, len(rows))
+                ids = self._insert_predictions(cursor, self._insert_sql('predictions', PREDICTION_INSERT_COLUMNS),
+                                               rows, reserved)
+            dropped = len(records) - len(rows)
+            if dropped:
+                cursor.execute(self._count_sampled_sql(), (now.date().isoformat(), dropped))
+
+            attacks = []
+            attack_records = [(prediction_id, row, data, features)
+                              for prediction_id, row, (data, features, _) in zip(ids, rows, kept) if row.prediction == 1]
+            # The scoring pass sets attack_type; rows saved without one go
+            # through the same signature table in one vectorized call
+            untyped = [features for _, _, data, features in attack_records if not data.get('attack_type')]
+            filled = iter(signatures(record_columns(untyped))[0].tolist() if untyped else [])
+            for prediction_id, row, data, _ in attack_records:
+                attack_type = data.get('attack_type') or next(filled)
+                attacks.append((prediction_id, created_at, attack_type, self._determine_severity(row.attack_probability)))
+            if attacks and self.attack_rows:
+                cursor.executemany(self._insert_sql('attacks', ATTACK_INSERT_COLUMNS), attacks)
+
+            conn.commit()
+            if self.version:
+                self.version.bump()
+            if self.router:
+                self.router.note_write()
+            if self.stats:
+                for row in rows:
+                    self.stats.record(row.is_attack, row.confidence)
+                for (data, _, _), weight in zip(records, weights):
+                    if not weight:
+                        self.stats.record(False, float(convert_value(data.get('confidence', 0))))
+            if self.incidents and attacks:
+                by_id = dict(zip(ids, rows))
+                self.incidents.record([(prediction_id, now, by_id[prediction_id].client_ip, attack_type, severity,
+                                        by_id[prediction_id].confidence)
+                                       for prediction_id, _, attack_type, severity in attacks])
+            if dropped:
+                saved = iter(ids)
+                return [next(saved) if weight else None for weight in weights]
+            return ids
+
+        except Exception as e:
+            print(f"❌ Database save error: {e}")
+            traceback.print_exc()
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    # ---------- queries ----------
+    def get_statistics(self):
+        """Get prediction statistics"""
+        conn = self.get_read_connection()
+        if not conn:
+            return {}
+
+        cursor = self._dict_cursor(conn)
+        try:
+            cursor.execute('SELECT COUNT(*) as total FROM predictions')
+            total = self._fetch_dicts(cursor)[0]['total']
+
+            cursor.execute('SELECT COUNT(*) as attacks FROM predictions WHERE is_attack = 1')
+            attacks = self._fetch_dicts(cursor)[0]['attacks']
+
+            cursor.execute('SELECT COUNT(*) as normal FROM predictions WHERE is_attack = 0')
+            normal = self._fetch_dicts(cursor)[0]['normal']
+
+            # Normal rows the sampling policy did not store, over the days
+            # still retained in predictions
+            cursor.execute('''
+                SELECT COALESCE(SUM(dropped), 0) as dropped FROM sampled_counts
+                WHERE date >= COALESCE((SELECT DATE(MIN(timestamp)) FROM predictions), CURRENT_DATE)
+            ''')
+            sampled_out = int(self._fetch_dicts(cursor)[0]['dropped'])
+            stored = total
+            total += sampled_out
+            normal += sampled_out
+
+            return {
+                'total_predictions': total,
+                'attack_count': attacks,
+                'normal_count': normal,
+                'attack_rate': round((attacks / total * 100), 2) if total > 0 else 0,
+                'stored_predictions': stored,
+                'sampled_out': sampled_out
+            }
+        except Exception as e:
+            print(f"⚠ Statistics error: {e}")
+            return {}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _query_dicts(self, query, params=()):
+        conn = self.get_read_connection()
+        if not conn:
+            raise ConnectionError('Database not available')
+        cursor = self._dict_cursor(conn)
+        try:
+            cursor.execute(query, params)
+            return self._fetch_dicts(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def iter_batches(self, query, params=(), batch_size=5000, dictionary=False):
+        """Yield lists of at most batch_size rows from an unbuffered cursor
+
+        Memory stays at one batch however large the result is. Closing the
+        generator early (a client disconnect, a row cap) releases the
+        connection without reading the rest of the result.
+        """
+        conn = self.get_read_connection()
+        if not conn:
+            raise ConnectionError('Database not available')
+        cursor = self._stream_cursor(conn, dictionary)
+        finished = False
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield self._stream_rows(rows, dictionary)
+            finished = True
+        finally:
+            if finished:
+                cursor.close()
+                conn.close()
+            else:
+                self._abandon_stream(conn, cursor)
+
+    def _stream_rows(self, rows, dictionary):
+        return rows
+
+    def get_attacks(self, limit=100000):
+        """Attack rows, newest first"""
+        return self._query_dicts(f'SELECT * FROM attacks ORDER BY timestamp DESC LIMIT {self.placeholder}',
+                                 (limit,))
+
+    def get_attack_details(self, limit=100000):
+        """Attacks joined with their predictions, newest first"""
+        return self._query_dicts(f'{ATTACK_DETAILS_QUERY} LIMIT {self.placeholder}', (limit,))
+
+    def iter_attacks(self, limit, batch_size=1000):
+        """Batches of attack dicts, newest first (/api/attacks)"""
+        return self.iter_batches(f'SELECT * FROM attacks ORDER BY timestamp DESC LIMIT {self.placeholder}',
+                                 (limit,), batch_size, dictionary=True)
+
+    def iter_attack_details(self, limit, batch_size=1000):
+        """Batches of attacks joined with their predictions (/api/attacks/optimized)"""
+        return self.iter_batches(f'{ATTACK_DETAILS_QUERY} LIMIT {self.placeholder}',
+                                 (limit,), batch_size, dictionary=True)
+
+    def iter_incidents(self, limit, since=None, client_ip=None, batch_size=1000):
+        """Batches of written incidents, latest activity first (/api/attacks?view=incidents)"""
+        p = self.placeholder
+        query = 'SELECT * FROM incidents WHERE 1 = 1'
+        params = []
+        if since is not None:
+            query += f' AND last_seen >= {p}'
+            params.append(self._timestamp(since))
+        if client_ip:
+            query += f' AND client_ip = {p}'
+            params.append(client_ip)
+        query += f' ORDER BY last_seen DESC LIMIT {p}'
+        params.append(limit)
+        return self.iter_batches(query, tuple(params), batch_size, dictionary=True)
+
+    def iter_predictions(self, start, end, is_attack=None, min_confidence=None, limit=1000, batch_size=1000):
+        """Batches of predictions in [start, end], newest first (/api/predictions/search)"""
+        p = self.placeholder
+        query = (f'SELECT {", ".join(PREDICTION_SEARCH_COLUMNS)}, features_blob FROM predictions '
+                 f'WHERE timestamp BETWEEN {p} AND {p}')
+        params = [start, end]
+        if is_attack is not None:
+            query += f' AND is_attack = {p}'
+            params.append(int(bool(is_attack)))
+        if min_confidence is not None:
+            query += f' AND confidence >= {p}'
+            params.append(min_confidence)
+        query += f' ORDER BY timestamp DESC LIMIT {p}'
+        params.append(limit)
+        batches = self.iter_batches(query, tuple(params), batch_size, dictionary=True)
+        try:
+            for batch in batches:
+                yield with_features(batch)
+        finally:
+            batches.close()
+
+    def get_recent_features(self, limit=1000):
+        """Ids and N x 11 feature matrix of the latest predictions"""
+        conn = self.get_read_connection()
+        if not conn:
+            return [], np.empty((0, len(FEATURE_LAYOUTS[CURRENT_VERSION])))
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f'''
+                SELECT id, features_blob FROM predictions
+                WHERE features_blob IS NOT NULL
+                ORDER BY id DESC LIMIT {self.placeholder}
+            ''', (limit,))
+            rows = cursor.fetchall()
+            return [row[0] for row in rows], decode_many([row[1] for row in rows])
+        finally:
+            cursor.close()
+            conn.close()
+
+
+def with_features(rows):
+    """Replace each row's features_blob with one field per feature (None if not stored)"""
+    X = decode_many([row.pop('features_blob') for row in rows])
+    layout = FEATURE_LAYOUTS[CURRENT_VERSION]
+    for row, values in zip(rows, X.tolist()):
+        row.update((name, None if value != value else value) for name, value in zip(layout, values))
+    return rows
+
+
+class SQLiteStorage(PredictionStore):
+    """Embedded backend: one SQLite file in WAL mode, no server needed"""
+
+    placeholder = '?'
+
+    def __init__(self, path, synchronous='NORMAL'):
+        self.path = path
+        self.synchronous = synchronous
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_database()
+        print(f"✅ SQLite storage ready: {path}")
+
+    def get_connection(self):
+        """Per-thread connection, reused across calls (close() is a no-op)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level='DEFERRED')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return _KeepOpen(conn)
+
+    def _dict_cursor(self, conn):
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+
+    def _fetch_dicts(self, cursor):
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _timestamp(self, value):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _stream_cursor(self, conn, dictionary=False):
+        # SQLite cursors already step through the result one row at a time
+        cursor = conn.cursor()
+        if dictionary:
+            cursor.row_factory = sqlite3.Row
+        return cursor
+
+    def _stream_rows(self, rows, dictionary):
+        return [dict(row) for row in rows] if dictionary else rows
+
+    def _abandon_stream(self, conn, cursor):
+        cursor.close()
+
+    def _count_sampled_sql(self):
+        return ("INSERT INTO sampled_counts (date, dropped) VALUES (?, ?) "
+                "ON CONFLICT(date) DO UPDATE SET dropped = dropped + excluded.dropped")
+
+    def _reserve_ids(self, cursor, n):
+        # Take the write lock first so no other writer can interleave ids
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM predictions')
+        return cursor.fetchone()[0] + 1
+
+    def _insert_predictions(self, cursor, sql, rows, reserved):
+        # The write lock taken in _reserve_ids keeps the ids consecutive
+        cursor.executemany(sql, rows)
+        return list(range(reserved, reserved + len(rows)))
+
+    def _init_database(self):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS predictions (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                    prediction INTEGER,
+                    prediction_label TEXT,
+                    confidence REAL,
+                    attack_probability REAL,
+                    normal_probability REAL,
+                    src_bytes INTEGER,
+                    dst_bytes INTEGER,
+                    count INTEGER,
+                    srv_count INTEGER,
+                    serror_rate REAL,
+                    srv_serror_rate REAL,
+                    dst_host_count INTEGER,
+                    dst_host_srv_count INTEGER,
+                    dst_host_serror_rate REAL,
+                    dst_host_srv_serror_rate REAL,
+                    duration REAL,
+                    features_count INTEGER,
+                    is_attack INTEGER,
+                    client_ip TEXT,
+                    features_blob BLOB,
+                    sample_weight REAL DEFAULT 1,
+                    attack_category TEXT,
+                    category_probabilities TEXT
+                )
+            ''')
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(predictions)')}
+            for name, kind in (('sample_weight', 'REAL DEFAULT 1'), ('attack_category', 'TEXT'),
+                               ('category_probabilities', 'TEXT')):
+                if name not in columns:
+                    cursor.execute(f'ALTER TABLE predictions ADD COLUMN {name} {kind}')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS attacks (
+                    id INTEGER PRIMARY KEY,
+                    prediction_id INTEGER REFERENCES predictions(id),
+                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                    attack_type TEXT,
+                    severity TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sampled_counts (
+                    date TEXT PRIMARY KEY,
+                    dropped INTEGER DEFAULT 0
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS incidents (
+                    id INTEGER PRIMARY KEY,
+                    client_ip TEXT,
+                    attack_type TEXT,
+                    severity TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT,
+                    attack_count INTEGER,
+                    min_confidence REAL,
+                    max_confidence REAL,
+                    avg_confidence REAL,
+                    first_prediction_id INTEGER,
+                    last_prediction_id INTEGER
+                )
+            ''')
+            # Same indexes as the MySQL schema after config/migrations.py
+            for table, name, columns in QUERY_INDEXES + INCIDENT_INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+class MySQLStorage(PredictionStore):
+    """Plain MySQL connections without pooling or schema setup, for offline tools"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def get_connection(self):
+        import mysql.connector
+        return mysql.connector.connect(**self.config)
+
+
+class _KeepOpen:
+    """Connection proxy whose close() leaves the per-thread connection open"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
@@ -0,0 +1,279 @@
+# ingest_server.py - persistent streaming ingestion for sensors
+#
+#   python ingest_server.py --tcp 0.0.0.0:9000
+#   python ingest_server.py --unix /run/nids/ingest.sock
+#
+# Sensors keep one connection open and write newline-delimited feature
+# records, either JSON objects keyed by feature name (optionally carrying an
+# "id") or JSON arrays of the 11 features in REQUIRED_FEATURES order. One
+# verdict line is written back per record, in order, on the same connection.
+#
+# Records from all connections are coalesced into batches and scored with
+# the same ScoringPipeline that predict_traffic uses. Each connection may
+# have at most --max-inflight records parsed but not yet answered; past
+# that the server stops reading from it and TCP flow control pushes back on
+# the sensor, so memory stays bounded however fast sensors write.
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+# Load the models without opening database connections or starting the
+# Flask app's background threads
+os.environ.setdefault('NIDS_PREFORK', '1')
+import app as nids  # noqa: E402
+
+READ_CHUNK = 64 * 1024
+
+
+class Connection:
+    """Per-sensor state: in-flight credit and an ordered output queue"""
+
+    def __init__(self, reader, writer, max_inflight):
+        self.reader = reader
+        self.writer = writer
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.credit = asyncio.Condition()
+        self.output = asyncio.Queue()
+        self.records = 0
+        self.closed = False
+        self.peer = writer.get_extra_info('peername') or writer.get_extra_info('sockname')
+
+    async def acquire(self, n):
+        """Take credit for n records; False once the connection can no longer be answered"""
+        async with self.credit:
+            await self.credit.wait_for(
+                lambda: self.closed or self.inflight == 0 or self.inflight + n <= self.max_inflight)
+            if self.closed:
+                return False
+            self.inflight += n
+            return True
+
+    async def idle(self):
+        """Wait until every record read so far has been answered (or the writer stopped)"""
+        async with self.credit:
+            await self.credit.wait_for(lambda: self.closed or self.inflight == 0)
+
+    async def close(self):
+        """Mark the write side gone and wake anything waiting for credit"""
+        async with self.credit:
+            self.closed = True
+            self.credit.notify_all()
+
+    async def release(self, n):
+        async with self.credit:
+            self.inflight -= n
+            self.credit.notify_all()
+
+
+class IngestServer:
+    """Asyncio ingestion server feeding a shared micro-batcher"""
+
+    def __init__(self, pipeline, features, max_batch=4096, max_delay=0.002,
+                 max_inflight=8192, max_line=4096):
+        self.pipeline = pipeline
+        self.features = list(features)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_inflight = max_inflight
+        self.max_line = max_line
+        # Jobs waiting for the batcher; bounded by the per-connection credit
+        self.jobs = asyncio.Queue()
+        self.connections = 0
+        self.records = 0
+        self.batches = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def parse(self, lines):
+        """Parse raw lines into (ids, matrix, errors) without per-row DataFrames"""
+        n = len(lines)
+        X = np.zeros((n, len(self.features)))
+        ids = [None] * n
+        errors = {}
+        features = self.features
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+                if isinstance(record, list):
+                    X[i] = record
+                else:
+                    ids[i] = record.get('id')
+                    X[i] = [record.get(f, 0.0) for f in features]
+            except (ValueError, TypeError, AttributeError) as e:
+                errors[i] = str(e)
+        return ids, X, errors
+
+    def format(self, ids, result, offset, n, errors):
+        """Render verdict lines for rows [offset, offset + n) of a scored batch"""
+        out = []
+        if result is not None:
+            prediction = result.prediction
+            confidence = result.confidence
+            attack_prob = result.attack_prob
+            rule_matched = result.rule_matched
+        for i in range(n):
+            rid = json.dumps(ids[i])
+            if result is None or i in errors:
+                out.append(f'{{"id":{rid},"error":{json.dumps(errors[i])}}}\n')
+                continue
+            r = offset + i
+            out.append(
+                f'{{"id":{rid},"prediction":{prediction[r]},'
+                f'"confidence":{confidence[r]:.2f},'
+                f'"attack_probability":{attack_prob[r] * 100:.2f},'
+                f'"detection_method":"{"Manual Rules" if rule_matched[r] else "ML Model"}"}}\n'
+            )
+        return ''.join(out).encode()
+
+    async def handle(self, reader, writer):
+        conn = Connection(reader, writer, self.max_inflight)
+        self.connections += 1
+        writer_task = asyncio.create_task(self._write(conn))
+        buffer = b''
+        try:
+            while True:
+                chunk = await reader.read(READ_CHUNK)
+                if not chunk:
+                    break
+                buffer += chunk
+                if b'\n' not in chunk:
+                    if len(buffer) > self.max_line:
+                        raise ValueError('record exceeds maximum line length')
+                    continue
+                *lines, buffer = buffer.split(b'\n')
+                if len(buffer) > self.max_line:
+                    raise ValueError('record exceeds maximum line length')
+                lines = [line for line in lines if line.strip()]
+                if not lines:
+                    continue
+                if not await conn.acquire(len(lines)):
+                    break
+                ids, X, errors = self.parse(lines)
+                await self.jobs.put((conn, ids, X, errors))
+            if buffer.strip() and await conn.acquire(1):
+                ids, X, errors = self.parse([buffer])
+                await self.jobs.put((conn, ids, X, errors))
+            await conn.idle()
+        except (ConnectionError, ValueError) as e:
+            print(f"⚠ Ingest connection {conn.peer} closed: {e}")
+        finally:
+            await conn.output.put(None)
+            await writer_task
+            self.connections -= 1
+
+    async def _write(self, conn):
+        """Write verdicts back in order, releasing credit once the socket drains"""
+        try:
+            while True:
+                item = await conn.output.get()
+                if item is None:
+                    break
+                payload, n = item
+                conn.writer.write(payload)
+                await conn.writer.drain()
+                conn.records += n
+                await conn.release(n)
+        except ConnectionError:
+            pass
+        finally:
+            await conn.close()
+            conn.writer.close()
+
+    async def batcher(self):
+        """Coalesce queued jobs into batches and score them off the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.jobs.get()]
+            rows = len(jobs[0][1])
+            deadline = loop.time() + self.max_delay
+            while rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self.jobs.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                jobs.append(job)
+                rows += len(job[1])
+
+            X = jobs[0][2] if len(jobs) == 1 else np.vstack([job[2] for job in jobs])
+            try:
+                result = await loop.run_in_executor(None, self.pipeline.score, X)
+            except Exception as e:
+                print(f"❌ Ingest batch scoring failed: {e}")
+                for conn, ids, _, _ in jobs:
+                    errors = {i: 'scoring failed' for i in range(len(ids))}
+                    conn.output.put_nowait((self.format(ids, None, 0, len(ids), errors), len(ids)))
+                continue
+
+            offset = 0
+            for conn, ids, rows_X, errors in jobs:
+                n = len(ids)
+                conn.output.put_nowait((self.format(ids, result, offset, n, errors), n))
+                # Sensors are counted per connection address in /api/top-talkers
+                source = conn.peer[0] if isinstance(conn.peer, tuple) else str(conn.peer)
+                scored = np.ones(n, dtype=bool)
+                scored[list(errors)] = False
+                nids.record_scored(source, rows_X[scored], result.prediction[offset:offset + n][scored])
+                offset += n
+                self.errors += len(errors)
+            self.records += rows
+            self.batches += 1
+
+    async def report(self, interval):
+        last_records, last_time = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            rate = (self.records - last_records) / (now - last_time)
+            last_records, last_time = self.records, now
+            avg_batch = self.records / self.batches if self.batches else 0
+            print(f"📊 Ingest: {self.connections} connections, {self.records} records, "
+                  f"{rate:,.0f} rec/s, avg batch {avg_batch:.0f}, {self.errors} errors")
+
+
+async def serve(args):
+    server = IngestServer(nids.pipeline, nids.REQUIRED_FEATURES, max_batch=args.max_batch,
+                          max_delay=args.max_delay_ms / 1000, max_inflight=args.max_inflight)
+    listeners = []
+    if args.tcp:
+        host, port = args.tcp.rsplit(':', 1)
+        listeners.append(await asyncio.start_server(server.handle, host, int(port), limit=READ_CHUNK))
+        print(f"🚀 Ingest server listening on tcp://{args.tcp}")
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.unlink(args.unix)
+        listeners.append(await asyncio.start_unix_server(server.handle, args.unix, limit=READ_CHUNK))
+        print(f"🚀 Ingest server listening on unix://{args.unix}")
+
+    tasks = [asyncio.create_task(server.batcher())]
+    if args.report_interval:
+        tasks.append(asyncio.create_task(server.report(args.report_interval)))
+    await asyncio.gather(*(listener.serve_forever() for listener in listeners), *tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NIDS streaming ingestion server')
+    parser.add_argument('--tcp', help='host:port to listen on')
+    parser.add_argument('--unix', help='unix socket path to listen on')
+    parser.add_argument('--max-batch', type=int, default=4096, help='max records per scoring batch')
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help='max wait to fill a batch')
+    parser.add_argument('--max-inflight', type=int, default=8192, help='per-connection unanswered records')
+    parser.add_argument('--report-interval', type=float, default=10.0, help='seconds between stats lines (0 = off)')
+    args = parser.parse_args()
+    if not args.tcp and not args.unix:
+        parser.error('give --tcp and/or --unix')
+
+    # Scoring runs one batch at a time on the executor thread
+    nids.rf_model.n_jobs = int(os.getenv('NIDS_MODEL_JOBS', 1))
+    asyncio.run(serve(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# tests/test_query_plans.py
+#
+#   cd backend && python -m pytest tests/test_query_plans.py
+#
+# Checks that the indexes in config.migrations cover every query in
+# QUERY_PLANS, in two ways:
+#
+#   - offline: EXPLAIN QUERY PLAN against an SQLiteStorage database, which
+#     creates the same QUERY_INDEXES / INCIDENT_INDEXES. Always runs.
+#   - MySQL: for each released starting schema (SimpleDatabase and
+#     MySQLDatabase before config/migrations.py existed), a scratch database
+#     next to DatabaseConfig.DEV (DB_HOST, DB_PORT, DB_USER, DB_PASSWORD,
+#     DB_NAME) is created with that schema and a few thousand rows, migrated
+#     with run_migrations, checked for convergence and EXPLAINed. Skipped
+#     when no MySQL server is reachable or the user cannot create databases.
+from datetime import datetime, timedelta
+
+import pytest
+
+mysql_connector = pytest.importorskip('mysql.connector')
+
+from config.database_config import DatabaseConfig  # noqa: E402
+from config.migrations import (  # noqa: E402
+    CATEGORY_COLUMNS, INCIDENT_INDEXES, PREDICTION_COLUMNS, QUERY_INDEXES, QUERY_PLANS,
+    SAMPLING_COLUMNS, UNUSED_INDEXES, run_migrations, table_columns, table_indexes,
+    verify_query_plans
+)
+from config.storage import SQLiteStorage  # noqa: E402
+
+CONNECT_KEYS = ('host', 'port', 'user', 'password', 'charset')
+
+# MySQL-only expressions in QUERY_PLANS and their SQLite equivalents
+SQLITE_SYNTAX = [
+    ('CURDATE() + INTERVAL 1 DAY', "date('now', '+1 day')"),
+    ('CURDATE()', "date('now')"),
+    ('%s', '?'),
+]
+
+# The schemas the two database classes created before any migration ran
+BASELINE_SCHEMAS = {
+    'simple': [
+        '''CREATE TABLE predictions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            prediction INT,
+            prediction_label VARCHAR(20),
+            confidence DECIMAL(5,2),
+            attack_probability DECIMAL(5,2),
+            normal_probability DECIMAL(5,2),
+            src_bytes BIGINT,
+            dst_bytes BIGINT,
+            count INT,
+            srv_count INT,
+            serror_rate DECIMAL(5,4),
+            srv_serror_rate DECIMAL(5,4),
+            is_attack BOOLEAN,
+            client_ip VARCHAR(45),
+            raw_features TEXT
+        )''',
+        '''CREATE TABLE attacks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            prediction_id INT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            attack_type VARCHAR(50),
+            severity VARCHAR(20),
+            FOREIGN KEY (prediction_id) REFERENCES predictions(id)
+        )''',
+    ],
+    'mysql_manager': [
+        '''CREATE TABLE predictions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            prediction TINYINT,
+            prediction_label VARCHAR(20),
+            confidence DECIMAL(5,2),
+            attack_probability DECIMAL(5,2),
+            normal_probability DECIMAL(5,2),
+            features_count INT,
+            src_bytes BIGINT,
+            dst_bytes BIGINT,
+            count INT,
+            srv_count INT,
+            serror_rate DECIMAL(5,4),
+            srv_serror_rate DECIMAL(5,4),
+            dst_host_count INT,
+            dst_host_srv_count INT,
+            dst_host_serror_rate DECIMAL(5,4),
+            dst_host_srv_serror_rate DECIMAL(5,4),
+            duration DECIMAL(10,4),
+            is_attack BOOLEAN,
+            client_ip VARCHAR(45),
+            user_agent TEXT,
+            request_path VARCHAR(255),
+            raw_data JSON,
+            INDEX idx_timestamp (timestamp),
+            INDEX idx_is_attack (is_attack),
+            INDEX idx_prediction (prediction),
+            INDEX idx_src_bytes (src_bytes),
+            INDEX idx_client_ip (client_ip)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci''',
+        '''CREATE TABLE attacks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            prediction_id INT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            attack_type VARCHAR(50),
+            severity ENUM('LOW', 'MEDIUM', 'HIGH', 'CRITICAL'),
+            alert_sent BOOLEAN DEFAULT FALSE,
+            acknowledged BOOLEAN DEFAULT FALSE,
+            acknowledged_by VARCHAR(100),
+            acknowledged_at TIMESTAMP NULL,
+            notes TEXT,
+            FOREIGN KEY (prediction_id) REFERENCES predictions(id) ON DELETE CASCADE,
+            INDEX idx_attack_type (attack_type),
+            INDEX idx_severity (severity),
+            INDEX idx_alert_sent (alert_sent)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci''',
+        '''CREATE TABLE statistics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE UNIQUE,
+            total_predictions INT DEFAULT 0,
+            attack_count INT DEFAULT 0,
+            normal_count INT DEFAULT 0,
+            false_positives INT DEFAULT 0,
+            false_negatives INT DEFAULT 0,
+            avg_confidence DECIMAL(5,2),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci''',
+    ],
+}
+
+# Rows loaded before EXPLAIN, so the optimizer does not prefer scanning an empty table
+SAMPLE_ROWS = 5000
+
+
+# ============ OFFLINE (SQLite) ============
+def test_every_plan_index_is_declared():
+    declared = {name for _, name, _ in QUERY_INDEXES + INCIDENT_INDEXES}
+    missing = {expected for _, _, _, expected in QUERY_PLANS} - declared
+    assert not missing, f'QUERY_PLANS expects undeclared indexes: {sorted(missing)}'
+
+
+@pytest.fixture(scope='module')
+def sqlite_connection(tmp_path_factory):
+    storage = SQLiteStorage(str(tmp_path_factory.mktemp('plans') / 'nids.sqlite3'))
+    return storage.get_connection()
+
+
+@pytest.mark.parametrize('description,query,params,expected', QUERY_PLANS, ids=[plan[0] for plan in QUERY_PLANS])
+def test_sqlite_plan_uses_its_index(sqlite_connection, description, query, params, expected):
+    for mysql, sqlite in SQLITE_SYNTAX:
+        query = query.replace(mysql, sqlite)
+    steps = [row[-1] for row in sqlite_connection.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+    assert any(f'INDEX {expected} ' in f'{step} ' for step in steps), f'{description}: {steps}'
+    # Every table is read through an index or its primary key, never a bare scan
+    assert all(' USING ' in step for step in steps if step.startswith(('SCAN', 'SEARCH'))), \
+        f'{description}: {steps}'
+
+
+# ============ MySQL ============
+def load_sample_rows(cursor):
+    start = datetime(2026, 1, 1)
+    cursor.executemany(
+        'INSERT INTO predictions (timestamp, prediction, confidence, is_attack, client_ip) '
+        'VALUES (%s, %s, %s, %s, %s)',
+        [(start + timedelta(minutes=i), int(i % 10 == 0), 90.0, i % 10 == 0, f'10.0.{i % 50}.{i % 200}')
+         for i in range(SAMPLE_ROWS)])
+    cursor.execute('SELECT id, timestamp FROM predictions WHERE is_attack = 1')
+    attacks = [(prediction_id, timestamp, 'DoS Attack', 'HIGH') for prediction_id, timestamp in cursor.fetchall()]
+    cursor.executemany('INSERT INTO attacks (prediction_id, timestamp, attack_type, severity) '
+                       'VALUES (%s, %s, %s, %s)', attacks)
+    cursor.executemany(
+        'INSERT INTO incidents (client_ip, attack_type, severity, first_seen, last_seen, attack_count) '
+        'VALUES (%s, %s, %s, %s, %s, %s)',
+        [(f'10.0.{i % 50}.{i % 200}', 'DoS Attack', 'HIGH', start + timedelta(hours=i),
+          start + timedelta(hours=i, minutes=5), 3) for i in range(SAMPLE_ROWS // 10)])
+    for table in ('predictions', 'attacks', 'incidents'):
+        cursor.execute(f'ANALYZE TABLE {table}')
+        cursor.fetchall()
+
+
+@pytest.fixture(scope='module', params=sorted(BASELINE_SCHEMAS))
+def migrated(request):
+    """(connection, versions applied, {description: (ok, key, type)}) for a
+    scratch database migrated from one released schema"""
+    try:
+        connection = mysql_connector.connect(connection_timeout=5,
+                                             **{k: DatabaseConfig.DEV[k] for k in CONNECT_KEYS})
+    except mysql_connector.Error as e:
+        pytest.skip(f'no MySQL server reachable: {e}')
+    database = f"{DatabaseConfig.DEV['database']}_plans_{request.param}"
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f'DROP DATABASE IF EXISTS {database}')
+        cursor.execute(f'CREATE DATABASE {database}')
+    except mysql_connector.Error as e:
+        connection.close()
+        pytest.skip(f'cannot create scratch database {database}: {e}')
+    try:
+        connection.database = database
+        for statement in BASELINE_SCHEMAS[request.param]:
+            cursor.execute(statement)
+        applied = run_migrations(connection)
+        load_sample_rows(cursor)
+        connection.commit()
+        plans = {name: (ok, chosen, types) for name, ok, chosen, types in verify_query_plans(connection)}
+        yield connection, applied, plans
+    finally:
+        cursor.execute(f'DROP DATABASE IF EXISTS {database}')
+        cursor.close()
+        connection.close()
+
+
+def test_migrations_converge(migrated):
+    connection, applied, _ = migrated
+    assert applied, 'no migration ran against the released schema'
+    assert run_migrations(connection) == [], 'a second run applied migrations again'
+
+    cursor = connection.cursor()
+    try:
+        columns = table_columns(cursor, 'predictions')
+        expected = {name for name, _ in PREDICTION_COLUMNS + SAMPLING_COLUMNS + CATEGORY_COLUMNS}
+        assert expected <= columns, f'missing predictions columns: {sorted(expected - columns)}'
+        for table in {table for table, _, _ in QUERY_INDEXES + INCIDENT_INDEXES}:
+            indexes = table_indexes(cursor, table)
+            for index_table, name, index_columns in QUERY_INDEXES + INCIDENT_INDEXES:
+                if index_table == table:
+                    assert tuple(index_columns) in indexes.values(), f'{table}: no index on {index_columns}'
+            unused = [name for unused_table, name in UNUSED_INDEXES if unused_table == table and name in indexes]
+            assert not unused, f'{table}: unused indexes kept: {unused}'
+    finally:
+        cursor.close()
+
+
+@pytest.mark.parametrize('description', [plan[0] for plan in QUERY_PLANS])
+def test_query_uses_its_index(migrated, description):
+    _, _, plans = migrated
+    ok, chosen, types = plans[description]
+    assert ok, f'{description}: key={chosen} type={types}'
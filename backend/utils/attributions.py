@@ -0,0 +1,112 @@
+# utils/attributions.py
+#
+# Per-prediction feature attributions for the served forest.
+#
+# Saabas-style tree-path attributions: walking a row down a tree, every
+# split moves the node's attack probability from the parent's value to the
+# child's, and that change is credited to the split feature. Summed over the
+# path it gives
+#
+#   tree probability = root probability + sum of the per-feature changes
+#
+# and averaged over the trees the same holds for the forest. Contributions
+# only depend on the leaf a row ends in, so they are summed once per leaf
+# when the explainer is built; explaining N rows is then one apply() per
+# tree plus a table lookup, like EarlyExitForest.predict_proba.
+#
+# The forest splits on PCA components. Each component is a linear mix of
+# the scaled model columns, z_k = sum_j W[k, j] * d_j with d the row's offset
+# from the PCA mean, so component k's contribution is shared between the
+# columns in proportion to W[k, j] * d_j / z_k (the rescale rule; shares sum
+# to one). Components with |z_k| < min_share_base, whose shares would be
+# unstable, are split in proportion to W[k, j] ** 2 instead.
+import numpy as np
+
+DTYPE = np.float32  # sklearn trees compare float32 features
+
+
+class TreeAttributions:
+    """Saabas contributions of each forest input to the attack probability"""
+
+    def __init__(self, forest, attack_class=1):
+        self.n_trees = len(forest.estimators_)
+        self.n_features = forest.n_features_in_
+        self.trees = [estimator.tree_ for estimator in forest.estimators_]
+        column = list(forest.classes_).index(attack_class)
+
+        # Per tree: the summed contributions of the path to every node
+        # (n_nodes x n_features); rows of internal nodes are never looked up
+        self.node_contributions = []
+        root = 0.0
+        for tree in self.trees:
+            values = tree.value[:, 0, :]
+            proba = values[:, column] / values.sum(axis=1)
+            root += proba[0]
+            path = np.zeros((tree.node_count, self.n_features), dtype=DTYPE)
+            # Children always come after their parent in sklearn's node arrays
+            for node in range(tree.node_count):
+                feature = tree.feature[node]
+                for child in (tree.children_left[node], tree.children_right[node]):
+                    if child != -1:
+                        path[child] = path[node]
+                        path[child, feature] += proba[child] - proba[node]
+            self.node_contributions.append(path)
+        self.base = root / self.n_trees
+
+    @property
+    def nbytes(self):
+        return sum(table.nbytes for table in self.node_contributions)
+
+    def explain(self, Z):
+        """N x n_features contributions; base + their row sum is the forest's attack probability"""
+        Z = np.ascontiguousarray(Z, dtype=DTYPE)
+        total = np.zeros((len(Z), self.n_features))
+        for tree, table in zip(self.trees, self.node_contributions):
+            total += table[tree.apply(Z)]
+        return total / self.n_trees
+
+
+def through_pca(contributions, centered, pca, min_share_base=1e-6):
+    """Share per-component contributions between the columns PCA mixed into them
+
+    centered: the rows' scaled inputs minus pca.mean_. Returns N x columns
+    contributions with the same row sums.
+    """
+    W = pca.components_
+    if pca.whiten:
+        W = W / np.sqrt(pca.explained_variance_)[:, None]
+    z = centered @ W.T
+    stable = np.abs(z) >= min_share_base
+    ratio = np.divide(contributions, z, out=np.zeros_like(contributions), where=stable)
+    loadings = W ** 2 / (W ** 2).sum(axis=1, keepdims=True)
+    return centered * (ratio @ W) + np.where(stable, 0.0, contributions) @ loadings
+
+
+class Attributions:
+    """Explanations for N rows, in percentage points of attack probability
+
+    contributions: N x len(features); other: the part of each row's
+    contribution that came from model columns serving always fills with
+    zero. base + contributions + other sums to model_attack_probability.
+    """
+
+    def __init__(self, features, base, contributions, other):
+        self.features = list(features)
+        self.base = base * 100
+        self.contributions = contributions * 100
+        self.other = other * 100
+        self.model_attack_probability = self.base + self.contributions.sum(axis=1) + self.other
+
+    def __len__(self):
+        return len(self.contributions)
+
+    def as_dict(self, i, top=None):
+        """Row i with its features ordered by the size of their contribution"""
+        order = np.argsort(-np.abs(self.contributions[i]))[:top]
+        return {
+            'base': round(float(self.base), 2),
+            'model_attack_probability': round(float(self.model_attack_probability[i]), 2),
+            'features': [{'feature': self.features[j], 'contribution': round(float(self.contributions[i, j]), 2)}
+                         for j in order],
+            'other': round(float(self.other[i]), 2)
+        }
@@ -0,0 +1,101 @@
+# utils/batch_codec.py
+import json
+from operator import itemgetter
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # MessagePack support is optional
+    msgpack = None
+
+JSON_TYPES = ('application/json',)
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+class BatchDecodeError(ValueError):
+    """Raised when a batch request body cannot be turned into a feature matrix"""
+
+
+def decode_records(records, features):
+    """JSON array of feature objects -> N x F float matrix"""
+    if not records:
+        return np.empty((0, len(features)))
+    if not all(isinstance(record, dict) for record in records):
+        raise BatchDecodeError('every record must be an object of feature values')
+    getter = itemgetter(*features)
+    try:
+        rows = [getter(record) for record in records]
+    except KeyError as e:
+        missing = e.args[0]
+        row = next(i for i, record in enumerate(records) if missing not in record)
+        raise BatchDecodeError(f"record {row} is missing feature '{missing}'")
+    try:
+        return np.array(rows, dtype=float)
+    except (TypeError, ValueError):
+        raise BatchDecodeError('feature values must be numeric')
+
+
+def decode_columns(columns, features):
+    """Column-oriented {feature: values} -> N x F float matrix
+
+    Values may be lists of numbers or, from MessagePack, little-endian
+    packed float32 byte strings.
+    """
+    if not isinstance(columns, dict):
+        raise BatchDecodeError("'columns' must be an object of feature columns")
+    missing = [f for f in features if f not in columns]
+    if missing:
+        raise BatchDecodeError(f'missing feature columns: {missing}')
+
+    arrays = []
+    for feature in features:
+        values = columns[feature]
+        try:
+            if isinstance(values, (bytes, bytearray, memoryview)):
+                arrays.append(np.frombuffer(values, dtype='<f4'))
+            else:
+                arrays.append(np.asarray(values, dtype=float))
+        except (TypeError, ValueError):
+            raise BatchDecodeError(f"column '{feature}' must hold numeric values")
+
+    if any(a.ndim != 1 for a in arrays):
+        raise BatchDecodeError('feature columns must be flat arrays (send a single record as a one-element array)')
+    lengths = {len(a) for a in arrays}
+    if len(lengths) > 1:
+        raise BatchDecodeError(f'feature columns have different lengths: {sorted(lengths)}')
+
+    X = np.empty((lengths.pop(), len(features)))
+    for j, values in enumerate(arrays):
+        X[:, j] = values
+    return X
+
+
+def decode_batch(body, content_type, features):
+    """Decode a JSON or MessagePack batch body into an N x F float matrix"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise BatchDecodeError('MessagePack support is not installed (pip install msgpack)')
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise BatchDecodeError(f'invalid MessagePack body: {e}')
+    elif content_type in JSON_TYPES or not content_type:
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise BatchDecodeError(f'invalid JSON body: {e}')
+    else:
+        raise BatchDecodeError(f'unsupported content type: {content_type}')
+
+    if isinstance(payload, list):
+        X = decode_records(payload, features)
+    elif isinstance(payload, dict):
+        X = decode_columns(payload.get('columns', payload), features)
+    else:
+        raise BatchDecodeError('body must be an array of records or an object of columns')
+
+    if not np.isfinite(X).all():
+        raise BatchDecodeError('feature values must be finite numbers')
+    return X
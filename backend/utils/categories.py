@@ -0,0 +1,164 @@
+# utils/categories.py
+#
+# Attack categories, computed in the same vectorized pass as the binary
+# decision (ScoringPipeline.score).
+#
+# Every row gets a category of the 4-class model in
+# models/trained_models/config.json (dos, normal, probe, u2r): 'normal' for
+# rows scored normal, otherwise an attack category, or 'unknown' when there
+# is none to give. Attack rows also get a descriptive attack type from the
+# signature table below.
+#
+# The 4-class forest itself is not shipped (it was trained on all 41 KDD
+# features, most of which the API does not receive), so by default the
+# category comes from the matching signature (SignatureCategorizer) and no
+# category probabilities are produced. A multiclass classifier over the same
+# PCA inputs as the served forest (NIDS_CATEGORY_MODEL) adds them, and picks
+# the most likely attack category, with ForestCategorizer.
+#
+# SIGNATURES replaces the two per-row _determine_attack_type heuristics
+# that SimpleDatabase and MySQLDatabase used to run when saving: the first
+# matching row wins, in the order below.
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CATEGORIES = ('dos', 'normal', 'probe', 'u2r')
+NORMAL = 'normal'
+UNKNOWN = 'unknown'
+DEFAULT_ATTACK_TYPE = 'Suspicious Activity'
+
+# (attack type, category, condition over feature columns)
+SIGNATURES = [
+    ('Extreme DoS Attack', 'dos', lambda c: (c['count'] > 500) & (c['serror_rate'] == 1.0)),
+    ('DoS Attack', 'dos', lambda c: (c['src_bytes'] > 50000) & (c['dst_bytes'] == 0)),
+    ('DDoS Attack', 'dos', lambda c: c['src_bytes'] > 100000),
+    ('High Volume Attack', 'dos', lambda c: c['count'] > 500),
+    ('Error-Based Attack', 'dos', lambda c: c['serror_rate'] > 0.7),
+    ('Port Scanning', 'probe', lambda c: (c['duration'] > 10) & (c['count'] > 100)),
+]
+SIGNATURE_FEATURES = ('duration', 'src_bytes', 'dst_bytes', 'count', 'serror_rate')
+
+
+def load_categories(config_path):
+    """Class names of the multiclass model described by config.json"""
+    try:
+        with open(config_path) as f:
+            return tuple(json.load(f)['model_info']['classes'])
+    except (OSError, KeyError, ValueError):
+        return DEFAULT_CATEGORIES
+
+
+def signature_index(columns):
+    """Index of the first matching SIGNATURES row per row; -1 when none matched"""
+    return np.select([condition(columns) for _, _, condition in SIGNATURES], range(len(SIGNATURES)), -1)
+
+
+def signatures(columns):
+    """(attack type, category) arrays for feature columns {name: array}; category '' when none matched"""
+    index = signature_index(columns)
+    types = np.array([name for name, _, _ in SIGNATURES] + [DEFAULT_ATTACK_TYPE], dtype=object)
+    categories = np.array([category for _, category, _ in SIGNATURES] + [''], dtype=object)
+    return types[index], categories[index]
+
+
+def signature_columns(X, feature_names):
+    X = np.asarray(X, dtype=float)
+    index = {name: i for i, name in enumerate(feature_names)}
+    return {name: X[:, index[name]] for name in SIGNATURE_FEATURES}
+
+
+def record_columns(features_list):
+    """Signature columns from feature dicts (rows saved without a precomputed type)"""
+    def value(features, name):
+        try:
+            return float(features.get(name, 0) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    return {name: np.array([value(features, name) for features in features_list])
+            for name in SIGNATURE_FEATURES}
+
+
+class CategoryScore:
+    """Attack type, category and category probabilities (None without a model) for N rows"""
+
+    def __init__(self, categories, attack_type, category, proba=None):
+        self.categories = list(categories)
+        self.attack_type = attack_type
+        self.category = category
+        self.proba = proba
+
+    def probabilities(self, i):
+        """{category: percent} for row i, or None when no multiclass model scored it"""
+        if self.proba is None:
+            return None
+        return {name: round(float(p) * 100, 2) for name, p in zip(self.categories, self.proba[i])}
+
+
+class SignatureCategorizer:
+    """Categories from the signature table; no probabilities"""
+
+    needs_inputs = False
+
+    def __init__(self, categories, feature_names):
+        self.categories = list(categories)
+        self.feature_names = list(feature_names)
+        self._types = np.array([name for name, _, _ in SIGNATURES] + [DEFAULT_ATTACK_TYPE], dtype=object)
+        # Category of each SIGNATURES row; UNKNOWN for categories this model
+        # lacks and, in the last entry, for rows no signature matched
+        self._signature_category = np.array(
+            [category if category in self.categories else UNKNOWN for _, category, _ in SIGNATURES] + [UNKNOWN],
+            dtype=object)
+
+    def categorize(self, X, Z, prediction, attack_prob, normal_prob):
+        index = signature_index(signature_columns(X, self.feature_names))
+        category = np.where(prediction == 1, self._signature_category[index], NORMAL)
+        return CategoryScore(self.categories, self._types[index], category)
+
+
+class ForestCategorizer(SignatureCategorizer):
+    """Categories and probabilities from a multiclass classifier over the served forest's PCA inputs
+
+    classes_ may be category names or their indices in `categories` (as
+    label-encoded training labels are).
+    """
+
+    needs_inputs = True
+
+    def __init__(self, model, categories, feature_names):
+        super().__init__(categories, feature_names)
+        self.model = model
+        names = [self.categories[c] if isinstance(c, (int, np.integer)) else str(c) for c in model.classes_]
+        missing = set(names) - set(self.categories)
+        if missing:
+            raise ValueError(f"Category model classes not in {self.categories}: {sorted(missing)}")
+        self._columns = np.array([self.categories.index(name) for name in names])
+        self._attack = np.array([i for i, name in enumerate(self.categories) if name != NORMAL])
+
+    def _attack_category(self, proba, prediction):
+        """Most likely attack category per row; UNKNOWN on ties"""
+        attack = proba[:, self._attack]
+        best = attack.argmax(axis=1)
+        top = attack.max(axis=1)
+        tied = (attack == top[:, None]).sum(axis=1) > 1
+        names = np.array(self.categories, dtype=object)[self._attack][best]
+        return np.where(prediction == 1, np.where(tied, UNKNOWN, names), NORMAL)
+
+    def categorize(self, X, Z, prediction, attack_prob, normal_prob):
+        types = self._types[signature_index(signature_columns(X, self.feature_names))]
+        proba = np.zeros((len(X), len(self.categories)))
+        if len(X):
+            proba[:, self._columns] = self.model.predict_proba(Z)
+        return CategoryScore(self.categories, types, self._attack_category(proba, prediction), proba)
+
+
+def load_categorizer(model_path, config_path, feature_names):
+    """ForestCategorizer when model_path is set, else SignatureCategorizer"""
+    categories = load_categories(config_path)
+    if model_path:
+        import joblib
+        model = joblib.load(model_path if os.path.isabs(model_path) else
+                            os.path.join(os.path.dirname(config_path), model_path))
+        return ForestCategorizer(model, categories, feature_names)
+    return SignatureCategorizer(categories, feature_names)
@@ -0,0 +1,245 @@
+# utils/drift.py
+#
+# Streaming feature-drift monitor for scored traffic.
+#
+# Rows are compared with the normal-traffic baseline the model was trained
+# on, models/improved_model/normal_mean.pkl: the per-column mean of normal
+# traffic in the scaler's units. The scaler was fitted on that traffic, so a
+# mean shift is measured in its standard deviations. The file holds no
+# distribution shapes, so PSI and KS are scored against a reference
+# histogram of the first reference_rows monitored rows (reference='warmup').
+# reference='baseline' uses a unit-variance normal around each baseline mean
+# instead; it only suits continuous features, as point masses such as a
+# duration that is almost always 0 read as drift against it.
+#
+# Monitored rows (by default those scored normal: drift there means either
+# new normal behaviour or attacks the model lets through) are counted into
+# per-window histograms, a ring of `windows` windows of window_seconds each.
+# The running totals over the ring are updated as rows arrive and as windows
+# expire, so a row costs O(features); the scores are computed from the totals
+# in O(features x bins) when a window closes or a report is asked for:
+#
+#   PSI  = sum over bins of (observed - expected) * ln(observed / expected)
+#   KS   = largest gap between the observed and expected CDF at a bin edge
+#   mean shift = window mean - baseline mean, in standard deviations
+#
+# record() only buffers rows; they are transformed and binned together every
+# flush_rows rows, when the window changes or before a report.
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATUS_ORDER = ('insufficient_data', 'ok', 'warn', 'alert')
+PSI_EPSILON = 1e-4  # keeps empty bins finite in the log ratio
+
+
+class DriftMonitor:
+    """Per-feature histograms over sliding windows, scored against a baseline
+
+    features: names of the monitored columns; baseline_mean: their baseline
+    means; transform: raw rows -> N x len(features) values in the baseline's
+    units.
+    """
+
+    def __init__(self, features, baseline_mean, transform, population='normal', bins=16,
+                 bin_width=0.5, window_seconds=60, windows=5, psi_warn=0.1, psi_alert=0.25,
+                 ks_alert=0.2, shift_alert=1.0, min_rows=500, flush_rows=256, reference='warmup',
+                 reference_rows=10000, clock=time.time):
+        self.features = list(features)
+        self.baseline_mean = np.asarray(baseline_mean, dtype=float)
+        self.transform = transform
+        self.population = population
+        self.bins = bins + 2
+        self.bin_width = bin_width
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.psi_warn = psi_warn
+        self.psi_alert = psi_alert
+        self.ks_alert = ks_alert
+        self.shift_alert = shift_alert
+        self.min_rows = min_rows
+        self.flush_rows = flush_rows
+        self.reference_mode = reference
+        self.reference_rows = reference_rows
+        self.clock = clock
+
+        n_features = len(self.features)
+        self._low = self.baseline_mean - bins / 2 * bin_width
+        self._offsets = np.arange(n_features) * self.bins
+        if reference == 'warmup':
+            self.reference = None
+            self._warmup = np.zeros((n_features, self.bins))
+        else:
+            # Unit-variance normal around each baseline mean, same bins
+            edges = [(k - bins / 2) * bin_width for k in range(bins + 1)]
+            cdf = [0.0] + [0.5 * (1 + math.erf(edge / math.sqrt(2))) for edge in edges] + [1.0]
+            self.reference = np.tile(np.diff(cdf), (n_features, 1))
+            self._warmup = None
+        self._warmup_n = 0
+
+        self._ring = {}  # window number -> [counts, sums, rows]
+        self.counts = np.zeros((n_features, self.bins))
+        self.sums = np.zeros(n_features)
+        self.rows = 0
+        self.seen = 0
+        self.status = {feature: 'insufficient_data' for feature in self.features}
+        self.alerts = 0
+        self._window = None
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+
+    # ---------- recording ----------
+    def record(self, X, prediction):
+        """Buffer a scored batch: raw rows and 0/1 predictions"""
+        if len(X) == 1:
+            if self.population == 'normal' and prediction[0] != 0:
+                return
+            rows = X
+        else:
+            X = np.asarray(X, dtype=float)
+            rows = X if self.population == 'all' else X[np.asarray(prediction) == 0]
+            if not len(rows):
+                return
+        window = int(self.clock() // self.window_seconds)
+        with self._lock:
+            if window != self._window and self._pending:
+                self._flush()
+            self._window = window
+            self._pending.append(rows)
+            self._pending_rows += len(rows)
+            if self._pending_rows >= self.flush_rows:
+                self._flush()
+
+    def _flush(self):
+        """Bin the buffered rows into the window they arrived in (lock held)"""
+        if not self._pending:
+            return
+        values = self.transform(np.vstack(self._pending).astype(float, copy=False))
+        self._pending, self._pending_rows = [], 0
+
+        index = np.clip(np.floor((values - self._low) / self.bin_width).astype(np.int64) + 1, 0, self.bins - 1)
+        counts = np.bincount((index + self._offsets).ravel(),
+                             minlength=len(self.features) * self.bins).reshape(len(self.features), self.bins)
+        sums = values.sum(axis=0)
+        n = len(values)
+        self.seen += n
+
+        if self._warmup is not None and self.reference is None:
+            self._warmup += counts
+            self._warmup_n += n
+            if self._warmup_n >= self.reference_rows:
+                self.reference = self._warmup / self._warmup_n
+                logger.info(f"✅ Drift reference captured from {self._warmup_n} rows")
+
+        window = self._ring.get(self._window)
+        if window is None:
+            self._expire(self._window)
+            window = self._ring[self._window] = [np.zeros_like(self.counts), np.zeros_like(self.sums), 0]
+        window[0] += counts
+        window[1] += sums
+        window[2] += n
+        self.counts += counts
+        self.sums += sums
+        self.rows += n
+
+    def _expire(self, current):
+        """Drop windows that left the ring and re-check the alerts once per window"""
+        expired = [number for number in self._ring if number <= current - self.windows]
+        for number in expired:
+            counts, sums, rows = self._ring.pop(number)
+            self.counts -= counts
+            self.sums -= sums
+            self.rows -= rows
+        if self._ring:
+            self._update_status(self._scores())
+        else:
+            self.status = dict.fromkeys(self.features, 'insufficient_data')
+
+    # ---------- scoring ----------
+    def _scores(self):
+        """(psi, ks, mean shift) per feature; psi and ks are None until there is a reference"""
+        n = self.rows
+        if not n:
+            return None
+        shift = self.sums / n - self.baseline_mean
+        if self.reference is None:
+            return None, None, shift
+        observed = self.counts / n
+        expected = self.reference
+        psi = ((observed - expected) * np.log((observed + PSI_EPSILON) / (expected + PSI_EPSILON))).sum(axis=1)
+        ks = np.abs(np.cumsum(observed, axis=1) - np.cumsum(expected, axis=1)).max(axis=1)
+        return psi, ks, shift
+
+    def _feature_status(self, psi, ks, shift):
+        if self.rows < self.min_rows:
+            return 'insufficient_data'
+        if abs(shift) >= self.shift_alert or (psi is not None and (psi >= self.psi_alert or ks >= self.ks_alert)):
+            return 'alert'
+        return 'warn' if psi is not None and psi >= self.psi_warn else 'ok'
+
+    def _update_status(self, scores):
+        if scores is None:
+            return
+        psi, ks, shift = scores
+        for j, feature in enumerate(self.features):
+            values = (None if psi is None else psi[j], None if ks is None else ks[j], shift[j])
+            status = self._feature_status(*values)
+            if status == 'alert' and self.status[feature] != 'alert':
+                self.alerts += 1
+                scored = '' if values[0] is None else f"PSI {values[0]:.3f}, KS {values[1]:.3f}, "
+                logger.warning(f"⚠ Feature drift on {feature}: {scored}mean shift {values[2]:.2f} sd")
+            elif status != 'alert' and self.status[feature] == 'alert':
+                logger.info(f"✅ Feature drift on {feature} cleared")
+            self.status[feature] = status
+
+    def report(self):
+        """Scores per feature over the live windows"""
+        with self._lock:
+            self._flush()
+            if self._window is not None:
+                self._expire(int(self.clock() // self.window_seconds))
+            scores = self._scores()
+            status = dict(self.status)
+            rows, windows = self.rows, len(self._ring)
+        features = {}
+        for j, feature in enumerate(self.features):
+            features[feature] = {
+                'psi': round(float(scores[0][j]), 4) if scores and scores[0] is not None else None,
+                'ks': round(float(scores[1][j]), 4) if scores and scores[1] is not None else None,
+                'mean_shift': round(float(scores[2][j]), 3) if scores else None,
+                'status': status[feature]
+            }
+        return {
+            'status': max(status.values(), key=STATUS_ORDER.index),
+            'population': self.population,
+            'reference': self.reference_mode if self.reference is not None else 'warming_up',
+            'reference_rows': self._warmup_n if self._warmup is not None else None,
+            'rows': rows,
+            'rows_seen': self.seen,
+            'window_seconds': self.window_seconds,
+            'windows': windows,
+            'thresholds': {'psi_warn': self.psi_warn, 'psi_alert': self.psi_alert, 'ks_alert': self.ks_alert,
+                           'mean_shift_alert': self.shift_alert, 'min_rows': self.min_rows},
+            'alerts_raised': self.alerts,
+            'features': features
+        }
+
+    def metrics_text(self, prefix='nids_drift'):
+        """The report in Prometheus text exposition format"""
+        report = self.report()
+        lines = [f"{prefix}_rows {report['rows']}", f"{prefix}_alerts_raised_total {report['alerts_raised']}"]
+        for name in ('psi', 'ks', 'mean_shift'):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for feature, scores in report['features'].items():
+                if scores[name] is not None:
+                    lines.append(f'{prefix}_{name}{{feature="{feature}"}} {scores[name]}')
+        lines.append(f"# TYPE {prefix}_alert gauge")
+        for feature, scores in report['features'].items():
+            lines.append(f'{prefix}_alert{{feature="{feature}"}} {int(scores["status"] == "alert")}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,119 @@
+# utils/early_exit.py
+#
+# Early-exit evaluation of a fitted RandomForestClassifier.
+#
+# predict_traffic only needs to know which side of the attack threshold the
+# forest's mean attack probability falls on. Trees are evaluated one at a
+# time in a fixed order; after k of T trees the final mean is bounded by
+#
+#   (S_k + sum of the smallest leaf value of each remaining tree) / T
+#   (S_k + sum of the largest leaf value of each remaining tree) / T
+#
+# where S_k is the sum of the k attack probabilities seen so far. A row
+# stops as soon as both bounds are on the same side of the threshold. Each
+# tree is walked with Tree.apply() on the still-undecided rows only, which
+# also skips the per-tree input validation and joblib dispatch of
+# RandomForestClassifier.predict_proba.
+import numpy as np
+
+DTYPE = np.float32  # sklearn trees compare float32 features
+
+
+class EarlyExitResult:
+    """Decisions, probability bounds and work done for N rows"""
+
+    def __init__(self, decision, attack_low, attack_high, estimate, trees_evaluated, n_trees):
+        self.decision = decision
+        self.attack_low = attack_low
+        self.attack_high = attack_high
+        self.estimate = estimate
+        self.trees_evaluated = trees_evaluated
+        self.n_trees = n_trees
+
+    @property
+    def exact(self):
+        """Rows that went through every tree (their estimate is the exact mean)"""
+        return self.trees_evaluated == self.n_trees
+
+
+class EarlyExitForest:
+    """Threshold decisions from a fitted forest, stopping once they are certain
+
+    threshold: the decision is attack when the mean attack probability is
+    above it. decide() returns bounds that always contain the exact forest
+    probability; predict_proba() evaluates every tree.
+    """
+
+    def __init__(self, forest, threshold, attack_class=1):
+        self.forest = forest
+        self.threshold = float(threshold)
+        self.n_trees = len(forest.estimators_)
+        self.trees = [estimator.tree_ for estimator in forest.estimators_]
+        column = list(forest.classes_).index(attack_class)
+
+        # Attack probability of every node; leaves are what apply() returns
+        self.leaf_values = []
+        lows, highs = [], []
+        for tree in self.trees:
+            values = tree.value[:, 0, :]
+            proba = values[:, column] / values.sum(axis=1)
+            leaves = tree.children_left == -1
+            self.leaf_values.append(proba)
+            lows.append(proba[leaves].min())
+            highs.append(proba[leaves].max())
+        # Smallest / largest total the trees after position k can still add
+        self.remaining_low = np.append(np.cumsum(lows[::-1])[::-1], 0.0)[1:]
+        self.remaining_high = np.append(np.cumsum(highs[::-1])[::-1], 0.0)[1:]
+
+    def _leaf_proba(self, i, Z):
+        return self.leaf_values[i][self.trees[i].apply(Z)]
+
+    def predict_proba(self, Z):
+        """Exact [normal, attack] probabilities (every tree evaluated)"""
+        Z = np.ascontiguousarray(Z, dtype=DTYPE)
+        total = np.zeros(len(Z))
+        for i in range(self.n_trees):
+            total += self._leaf_proba(i, Z)
+        attack = total / self.n_trees
+        return np.column_stack([1.0 - attack, attack])
+
+    def decide(self, Z, check_every=4):
+        """Attack decision per row, evaluating only the trees it takes
+
+        Bounds are checked after every check_every trees, which keeps the
+        bookkeeping small next to the tree walks themselves.
+        """
+        Z = np.ascontiguousarray(Z, dtype=DTYPE)
+        n = len(Z)
+        total = np.zeros(n)
+        low = np.zeros(n)
+        high = np.ones(n)
+        evaluated = np.full(n, self.n_trees, dtype=np.int32)
+        active = np.arange(n)
+        limit = self.threshold * self.n_trees
+
+        for start in range(0, self.n_trees, check_every):
+            stop = min(start + check_every, self.n_trees)
+            rows = Z if len(active) == n else Z[active]
+            block = self._leaf_proba(start, rows)
+            for i in range(start + 1, stop):
+                block += self._leaf_proba(i, rows)
+            total[active] += block
+            row_low = total[active] + self.remaining_low[stop - 1]
+            row_high = total[active] + self.remaining_high[stop - 1]
+            done = (row_low > limit) | (row_high <= limit)
+            if done.any():
+                finished = active[done]
+                evaluated[finished] = stop
+                low[finished] = row_low[done] / self.n_trees
+                high[finished] = row_high[done] / self.n_trees
+                active = active[~done]
+                if not len(active):
+                    break
+        # Rows still active went through every tree: their mean is exact
+        low[active] = high[active] = total[active] / self.n_trees
+
+        # Mean of the trees seen so far, kept inside the bounds
+        estimate = np.clip(total / evaluated, low, high)
+        decision = (low > self.threshold).astype(int)
+        return EarlyExitResult(decision, low, high, estimate, evaluated, self.n_trees)
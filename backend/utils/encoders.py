@@ -0,0 +1,219 @@
+# utils/encoders.py
+#
+# Response encoders chosen by content negotiation:
+#
+#   json     application/json        orjson when installed, NumPy arrays serialized natively
+#   ndjson   application/x-ndjson    one object per row
+#   csv      text/csv                header line, then one line per row
+#   msgpack  application/msgpack     numeric columns as packed little-endian arrays
+#
+# Column-oriented batch results ({name: ndarray}) are written straight from
+# the arrays by encode_columns(); nothing is converted to per-row dicts
+# unless the format itself is row-oriented. NumpyJSONProvider makes every
+# jsonify() call use the same fast, NumPy-aware JSON encoder.
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+from utils.batch_codec import msgpack
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library json module
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                      | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+def numpy_default(value):
+    """NumPy values the JSON/MessagePack encoders cannot write themselves"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not serializable')
+
+
+def row_default(value):
+    """Database row values: timestamps as 'YYYY-MM-DD HH:MM:SS', DECIMAL as float"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return numpy_default(value)
+
+
+def dumps_json(value, default=row_default):
+    """Compact JSON as bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=default, option=ORJSON_OPTIONS)
+    return json.dumps(value, default=default, separators=(',', ':')).encode()
+
+
+def _column_tokens(values, encode_value):
+    """One encoded bytes token per value, converted a whole column at a time"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiub' and values.ndim == 1:
+        if not len(values):
+            return []
+        # Numbers never contain commas, so one JSON array splits into tokens
+        return dumps_json(values, numpy_default)[1:-1].split(b',')
+    # Labels repeat heavily (risk levels, attack types): encode each once
+    memo = {}
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    return [memo[v] if v in memo else memo.setdefault(v, encode_value(v)) for v in values]
+
+
+def _csv_value(value):
+    out = io.StringIO()
+    csv.writer(out, lineterminator='').writerow([value])
+    return out.getvalue().encode()
+
+
+def _packed_dtype(values):
+    """Little-endian dtype for a packed msgpack column: float32, or the smallest int holding the range"""
+    if values.dtype.kind == 'f':
+        return '<f4'
+    if values.dtype.kind == 'b' or not len(values):
+        return '<i1'
+    low, high = int(values.min()), int(values.max())
+    for dtype in ('<i1', '<i2', '<i4', '<i8'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return '<u8'
+
+
+def _row_template(prefixes, suffix):
+    """bytes %-template with one %s per column"""
+    return b''.join(prefix.replace(b'%', b'%%') + b'%s' for prefix in prefixes) + suffix
+
+
+# ---------- encoders ----------
+class Encoder:
+    name = None
+    mimetype = None
+
+    def encode_columns(self, columns, meta):
+        """Column-oriented result {name: array} plus summary fields -> bytes"""
+        raise NotImplementedError
+
+
+class JSONEncoder(Encoder):
+    name = 'json'
+    mimetype = 'application/json'
+
+    def encode_columns(self, columns, meta):
+        # orjson writes contiguous numeric arrays without converting them to
+        # lists; string arrays go through numpy_default
+        return dumps_json({**meta, 'columns': columns}, numpy_default)
+
+
+class NDJSONEncoder(Encoder):
+    name = 'ndjson'
+    mimetype = 'application/x-ndjson'
+
+    def encode_columns(self, columns, meta):
+        tokens = [_column_tokens(values, lambda v: dumps_json(v, numpy_default)) for values in columns.values()]
+        keys = [(b'{' if i == 0 else b',') + dumps_json(name) + b':' for i, name in enumerate(columns)]
+        template = _row_template(keys, b'}')
+        lines = [template % row for row in zip(*tokens)]
+        return b'\n'.join(lines) + b'\n' if lines else b''
+
+
+class CSVEncoder(Encoder):
+    name = 'csv'
+    mimetype = 'text/csv'
+
+    def encode_columns(self, columns, meta):
+        tokens = []
+        for values in columns.values():
+            column = _column_tokens(values, _csv_value)
+            if isinstance(values, np.ndarray) and values.dtype.kind == 'f' and np.isnan(values).any():
+                # NaN is written to JSON as null; in CSV it is an empty field
+                column = [b'' if token == b'null' else token for token in column]
+            tokens.append(column)
+        template = _row_template([b''] + [b','] * (len(columns) - 1), b'')
+        header = b','.join(_csv_value(name) for name in columns)
+        return b'\n'.join([header] + [template % row for row in zip(*tokens)]) + b'\n'
+
+
+class MsgpackEncoder(Encoder):
+    name = 'msgpack'
+    mimetype = 'application/msgpack'
+
+    def encode_columns(self, columns, meta):
+        packed = {}
+        for name, values in columns.items():
+            if isinstance(values, np.ndarray) and values.dtype.kind in 'fiub':
+                dtype = _packed_dtype(values)
+                packed[name] = {'dtype': dtype, 'data': values.astype(dtype).tobytes()}
+            else:
+                packed[name] = list(values)
+        return msgpack.packb({**meta, 'columns': packed}, default=numpy_default, use_bin_type=True)
+
+
+ENCODERS = {encoder.name: encoder for encoder in
+            (JSONEncoder(), NDJSONEncoder(), CSVEncoder(), MsgpackEncoder())}
+
+MIMETYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'text/csv': 'csv',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
+}
+
+
+def available(formats):
+    return [f for f in formats if f in ENCODERS and (f != 'msgpack' or msgpack is not None)]
+
+
+def negotiate(request, formats=('json', 'ndjson', 'csv', 'msgpack'), default='json'):
+    """Encoder for ?format=, else the best match for the Accept header, else `default`"""
+    formats = available(formats)
+    requested = request.args.get('format', '').lower()
+    if requested in formats:
+        return ENCODERS[requested]
+    offered = [mimetype for mimetype, name in MIMETYPES.items() if name in formats]
+    best = request.accept_mimetypes.best_match(offered)
+    return ENCODERS[MIMETYPES[best]] if best else ENCODERS[default]
+
+
+# ---------- Flask integration ----------
+class NumpyJSONProvider(DefaultJSONProvider):
+    """jsonify() through orjson, with NumPy arrays and scalars accepted as they are
+
+    Anything else orjson cannot write (datetime, Decimal, UUID, dataclasses)
+    falls back to Flask's own conversions and keys stay sorted, so existing
+    responses keep their format.
+    """
+
+    @staticmethod
+    def _fallback(value):
+        try:
+            return numpy_default(value)
+        except TypeError:
+            return DefaultJSONProvider.default(value)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.get('indent'):
+            kwargs.setdefault('default', self._fallback)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self._fallback, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self._fallback, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,94 @@
+# utils/feature_codec.py
+#
+# Compact binary encoding for the raw features stored with each prediction.
+#
+#   byte 0      layout version
+#   bytes 1..   little-endian float32 per feature, in the version's order
+#
+# Version 1 holds the 11 REQUIRED_FEATURES (45 bytes per row, against about
+# 280 bytes of JSON text). A new layout gets a new version number; old rows
+# keep decoding with the layout they were written with.
+import json
+
+import numpy as np
+
+FEATURE_LAYOUTS = {
+    1: ('duration', 'src_bytes', 'dst_bytes', 'count', 'srv_count',
+        'serror_rate', 'srv_serror_rate', 'dst_host_count',
+        'dst_host_srv_count', 'dst_host_serror_rate', 'dst_host_srv_serror_rate'),
+}
+CURRENT_VERSION = 1
+VALUE_DTYPE = np.dtype('<f4')
+
+
+def blob_size(version=CURRENT_VERSION):
+    return 1 + len(FEATURE_LAYOUTS[version]) * VALUE_DTYPE.itemsize
+
+
+def encode_features(features, version=CURRENT_VERSION):
+    """Feature dict -> blob; missing or non-numeric features are stored as 0"""
+    values = np.empty(len(FEATURE_LAYOUTS[version]), dtype=VALUE_DTYPE)
+    for j, name in enumerate(FEATURE_LAYOUTS[version]):
+        try:
+            values[j] = float(features.get(name, 0.0))
+        except (TypeError, ValueError):
+            values[j] = 0.0
+    return bytes([version]) + values.tobytes()
+
+
+def encode_matrix(X, version=CURRENT_VERSION):
+    """N x F matrix (columns in the layout's order) -> list of N blobs"""
+    X = np.asarray(X, dtype=VALUE_DTYPE).reshape(len(X), -1)
+    if X.shape[1] != len(FEATURE_LAYOUTS[version]):
+        raise ValueError(f"expected {len(FEATURE_LAYOUTS[version])} feature columns, got {X.shape[1]}")
+    rows = np.empty((len(X), blob_size(version)), dtype=np.uint8)
+    rows[:, 0] = version
+    rows[:, 1:] = X.view(np.uint8)
+    size = rows.shape[1]
+    raw = rows.tobytes()
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def decode_features(blob):
+    """Blob -> feature dict"""
+    layout = FEATURE_LAYOUTS[blob[0]]
+    values = np.frombuffer(blob, dtype=VALUE_DTYPE, offset=1, count=len(layout))
+    return dict(zip(layout, values.astype(float).tolist()))
+
+
+def decode_many(blobs, features=None):
+    """Many blobs -> N x F float matrix in `features` order (default: current layout)
+
+    Rows of the same version are decoded with one frombuffer call. None,
+    empty or unknown-version rows decode to NaN.
+    """
+    features = list(features or FEATURE_LAYOUTS[CURRENT_VERSION])
+    X = np.full((len(blobs), len(features)), np.nan)
+    by_version = {}
+    for i, blob in enumerate(blobs):
+        if blob:
+            by_version.setdefault(blob[0], []).append(i)
+
+    for version, rows in by_version.items():
+        layout = FEATURE_LAYOUTS.get(version)
+        if layout is None:
+            continue
+        size = blob_size(version)
+        raw = b''.join(bytes(blobs[i]) for i in rows)
+        if len(raw) != size * len(rows):
+            raise ValueError(f"malformed feature blob for layout version {version}")
+        values = np.frombuffer(raw, dtype=np.uint8).reshape(len(rows), size)[:, 1:]
+        values = values.copy().view(VALUE_DTYPE)
+        position = {name: j for j, name in enumerate(layout)}
+        for k, name in enumerate(features):
+            if name in position:
+                X[rows, k] = values[:, position[name]]
+    return X
+
+
+def decode_json_features(text):
+    """Legacy raw_features / raw_data JSON text -> feature dict"""
+    data = json.loads(text) if isinstance(text, (str, bytes, bytearray)) else text
+    if isinstance(data, dict) and isinstance(data.get('features'), dict):
+        data = data['features']  # MySQLDatabase raw_data holds the whole prediction
+    return data if isinstance(data, dict) else {}
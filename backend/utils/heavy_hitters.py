@@ -0,0 +1,182 @@
+# utils/heavy_hitters.py
+#
+# Constant-memory top-K tracking (Space-Saving, Metwally et al. 2005).
+#
+# A SpaceSaving summary keeps at most `capacity` counters. A key that is
+# not tracked while every counter is taken replaces the smallest counter
+# and inherits its count as its error, so for every tracked key
+#
+#   count - error <= true count <= count
+#
+# and any key whose true count exceeds total / capacity is tracked. Memory
+# depends on capacity only, however many distinct sources appear.
+#
+# TopTalkers keeps one set of summaries per time window (a ring of
+# `windows` windows of `window_seconds` each) and merges the windows a query
+# covers, so top-K can be asked for the last minute or the last hour.
+import heapq
+import threading
+import time
+from collections import Counter
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters summary with at most `capacity` counters"""
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counters = {}  # key -> [count, error]
+        self.total = 0
+        self.floor = 0      # bound for untracked keys carried over by merge()
+        self._heap = []     # (count, key), with stale entries skipped lazily
+
+    def __len__(self):
+        return len(self.counters)
+
+    def update(self, key, weight=1):
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[key] = [weight, 0]
+        else:
+            floor = self._pop_min()
+            counter = self.counters[key] = [floor + weight, floor]
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], k) for k, c in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def update_many(self, keys, weights=None):
+        """Add a batch; repeated keys (a flood from one source) collapse first"""
+        counts = Counter()
+        if weights is None:
+            counts.update(keys)
+        else:
+            for key, weight in zip(keys, weights):
+                counts[key] += weight
+        for key, weight in counts.items():
+            self.update(key, weight)
+
+    def _pop_min(self):
+        """Evict the smallest counter; returns its count"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == count:
+                del self.counters[key]
+                return count
+
+    def close(self):
+        """Drop the eviction heap of a summary that takes no more updates"""
+        self._heap = []
+
+    def min_count(self):
+        """Upper bound on the count of any key that is not tracked"""
+        if len(self.counters) < self.capacity:
+            return self.floor
+        return max(self.floor, min(counter[0] for counter in self.counters.values()))
+
+    @classmethod
+    def merged(cls, summaries, capacity):
+        """One summary of several streams
+
+        Counts and errors add. A summary that does not track a key adds its
+        untracked bound (min_count) to both that key's count and error.
+        """
+        merged = cls(capacity)
+        floors = [summary.min_count() for summary in summaries]
+        base = sum(floors)
+        combined = {}
+        for summary, floor in zip(summaries, floors):
+            merged.total += summary.total
+            for key, (count, error) in summary.counters.items():
+                entry = combined.get(key)
+                if entry is None:
+                    entry = combined[key] = [base, base]
+                entry[0] += count - floor
+                entry[1] += error - floor
+        ranked = heapq.nlargest(capacity + 1, combined.items(), key=lambda item: item[1][0])
+        merged.counters = dict(ranked[:capacity])
+        dropped = ranked[capacity][1][0] if len(ranked) > capacity else 0
+        merged.floor = max(base, dropped)
+        merged._heap = [(c[0], k) for k, c in merged.counters.items()]
+        heapq.heapify(merged._heap)
+        return merged
+
+    def merge(self, other):
+        return SpaceSaving.merged([self, other], self.capacity)
+
+    def top(self, k=10):
+        """[(key, count, error)] for the k largest counters"""
+        largest = heapq.nlargest(k, self.counters.items(), key=lambda item: item[1][0])
+        return [(key, count, error) for key, (count, error) in largest]
+
+
+class TopTalkers:
+    """Per-window Space-Saving summaries of sources, attack sources and attack types"""
+
+    STREAMS = ('sources', 'attack_sources', 'attack_types')
+
+    def __init__(self, capacity=1000, window_seconds=60, windows=60, clock=time.time):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.clock = clock
+        self._ring = {}  # window number -> {stream: SpaceSaving}
+        self._lock = threading.Lock()
+
+    def _window(self, now):
+        number = int(now // self.window_seconds)
+        window = self._ring.get(number)
+        if window is None:
+            for old in list(self._ring):
+                if old <= number - self.windows:
+                    del self._ring[old]
+                else:
+                    for summary in self._ring[old].values():
+                        summary.close()
+            window = self._ring[number] = {name: SpaceSaving(self.capacity) for name in self.STREAMS}
+        return window
+
+    def record(self, client_ip, predictions, attack_types=None):
+        """Count a scored batch from one source
+
+        predictions: 0/1 per row; attack_types: type per attack row (in order)
+        """
+        n = len(predictions)
+        attacks = int(sum(predictions))
+        with self._lock:
+            window = self._window(self.clock())
+            window['sources'].update(client_ip, n)
+            if attacks:
+                window['attack_sources'].update(client_ip, attacks)
+                if attack_types is not None:
+                    window['attack_types'].update_many(attack_types)
+
+    def top(self, k=10, seconds=None):
+        """Top-k of each stream over the most recent `seconds` (default: all windows)"""
+        now = self.clock()
+        current = int(now // self.window_seconds)
+        span = self.windows if seconds is None else max(1, min(self.windows, -(-int(seconds) // self.window_seconds)))
+        with self._lock:
+            windows = [self._ring[n] for n in range(current - span + 1, current + 1) if n in self._ring]
+            merged = {name: SpaceSaving.merged([window[name] for window in windows], self.capacity)
+                      for name in self.STREAMS}
+
+        result = {
+            'window_seconds': self.window_seconds,
+            'windows': len(windows),
+            'since': (current - span + 1) * self.window_seconds,
+            'capacity': self.capacity,
+        }
+        for name, summary in merged.items():
+            result[name] = {
+                'total': summary.total,
+                'untracked_max': summary.min_count(),
+                'top': [{'key': key, 'count': count, 'error': error, 'guaranteed': count - error}
+                        for key, count, error in summary.top(k)],
+            }
+        return result
+
@@ -0,0 +1,240 @@
+# utils/response_cache.py
+#
+# Version-validated response cache for the dashboard read endpoints.
+#
+# A response is cached per (path, query parameters, Accept header) together
+# with the data version it was computed at. DataVersion is bumped after
+# every write this process commits, so an entry is served only while
+# nothing has been written since and it is younger than `ttl` seconds; the
+# TTL bounds how long writes made by other worker processes can go unseen.
+#
+# Concurrent misses for one key are coalesced (single flight): the first
+# request computes the response and the others wait for it to land in the
+# cache. Streamed responses are passed through to the first client and
+# collected on the way; they are cached once complete if no larger than
+# max_entry_bytes. Cached responses carry a strong ETag, and a matching
+# If-None-Match gets a 304 without a body.
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import Response, make_response, request
+
+
+class DataVersion:
+    """Monotonic counter bumped on each committed write"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+            return self.value
+
+
+class CacheEntry:
+    __slots__ = ('version', 'created', 'body', 'mimetype', 'etag')
+
+    def __init__(self, version, created, body, mimetype):
+        self.version = version
+        self.created = created
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+
+
+def failed_body(last_chunk):
+    """A streamed body that ended with the error trailer of utils/streaming.py"""
+    return b'"success":false' in last_chunk or last_chunk.startswith(b'{"error"')
+
+
+class ResponseCache:
+    """LRU of successful GET responses, validated against a DataVersion"""
+
+    def __init__(self, version, ttl=5.0, max_entries=256, max_bytes=64 * 1024 * 1024,
+                 max_entry_bytes=8 * 1024 * 1024, wait_timeout=30.0, clock=time.monotonic):
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.wait_timeout = wait_timeout
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.counters = {'hits': 0, 'coalesced': 0, 'misses': 0, 'not_modified': 0,
+                         'stored': 0, 'too_large': 0, 'evicted': 0, 'bypassed': 0}
+        self.recompute_ms = deque(maxlen=256)
+        self._flights = {}  # key -> Event set when the leader's response is done
+        self._lock = threading.Lock()
+
+    # ---------- entries ----------
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != self.version.value or self.clock() - entry.created >= self.ttl:
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.bytes -= len(entry.body)
+
+    def store(self, key, entry):
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = entry
+            self.bytes += len(entry.body)
+            self.counters['stored'] += 1
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.counters['evicted'] += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    # ---------- single flight ----------
+    def _join(self, key):
+        """(event, True) for the request that computes key, (event, False) for the ones that wait"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = threading.Event()
+            return flight, True
+
+    def _land(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.set()
+
+    def _finish(self, key, flight, version, started, body, mimetype):
+        """Record the recompute and cache its body (None: it was too large to keep)"""
+        self.recompute_ms.append((self.clock() - started) * 1000)
+        if body is not None and len(body) <= self.max_entry_bytes:
+            self.store(key, CacheEntry(version, started, body, mimetype))
+        else:
+            self._count('too_large')
+        self._land(key, flight)
+
+    def _tee(self, key, flight, version, started, iterable, mimetype):
+        """Stream the leader's body while keeping a copy for the cache"""
+        chunks, size, last, complete = [], 0, b'', False
+        try:
+            for chunk in iterable:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                yield chunk
+                last = chunk
+                size += len(chunk)
+                if size <= self.max_entry_bytes:
+                    chunks.append(chunk)
+            complete = True
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+            if complete and not failed_body(last):
+                self._finish(key, flight, version, started,
+                             b''.join(chunks) if size <= self.max_entry_bytes else None, mimetype)
+            else:
+                self._land(key, flight)
+
+    # ---------- responses ----------
+    def _respond(self, entry, state):
+        if request.if_none_match.contains(entry.etag):
+            self._count('not_modified')
+            response = Response(status=304)
+        else:
+            response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Cache'] = state
+        return response
+
+    def request_key(self):
+        return (request.path, tuple(sorted(request.args.items(multi=True))), request.headers.get('Accept', ''))
+
+    def cached(self, view, bypass=None):
+        """Decorator for a GET view; bypass() -> True skips the cache for a request"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if bypass and bypass():
+                self._count('bypassed')
+                return view(*args, **kwargs)
+            key = self.request_key()
+            entry = self.lookup(key)
+            if entry:
+                self._count('hits')
+                return self._respond(entry, 'HIT')
+
+            flight, leader = self._join(key)
+            if not leader:
+                flight.wait(self.wait_timeout)
+                entry = self.lookup(key)
+                if entry:
+                    self._count('coalesced')
+                    return self._respond(entry, 'COALESCED')
+                # The leader failed, timed out or was too large to keep
+                self._count('misses')
+                return view(*args, **kwargs)
+
+            self._count('misses')
+            version = self.version.value
+            started = self.clock()
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                self._land(key, flight)
+                raise
+            if response.status_code != 200:
+                self._land(key, flight)
+                return response
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Cache'] = 'MISS'
+            if response.is_streamed:
+                response.response = self._tee(key, flight, version, started, response.response, response.mimetype)
+                # Also releases the waiters if the body is closed before it is read
+                response.call_on_close(lambda: self._land(key, flight))
+                return response
+            self._finish(key, flight, version, started, response.get_data(), response.mimetype)
+            entry = self.lookup(key)
+            return self._respond(entry, 'MISS') if entry else response
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            entries, size = len(self.entries), self.bytes
+            timings = sorted(self.recompute_ms)
+        served = counters['hits'] + counters['coalesced']
+        lookups = served + counters['misses']
+        return {
+            'ttl_seconds': self.ttl,
+            'data_version': self.version.value,
+            'entries': entries,
+            'bytes': size,
+            'hit_rate': round(served / lookups, 4) if lookups else None,
+            **counters,
+            'recompute_ms': {
+                'samples': len(timings),
+                'p50': round(timings[len(timings) // 2], 2) if timings else None,
+                'p95': round(timings[int(len(timings) * 0.95)], 2) if timings else None,
+                'max': round(timings[-1], 2) if timings else None
+            }
+        }
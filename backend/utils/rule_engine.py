@@ -0,0 +1,152 @@
+# utils/rule_engine.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+NO_RULE = -1
+
+
+class RuleTable:
+    """Declarative detection rules compiled into a vectorized evaluator
+
+    Each rule is a list of (field, operator, threshold) conditions joined
+    with "all" or "any", plus the confidence and reason reported when it
+    fires.  Rules are checked in order and the first match wins, matching
+    the if/elif chain they replace.
+    """
+
+    def __init__(self, rules, feature_names, version=None):
+        self.version = version
+        self.feature_names = list(feature_names)
+        self.rules = rules
+        self.names = []
+        self.reasons = []
+        self.confidences = np.zeros(len(rules))
+        self._compiled = []
+
+        columns = {name: i for i, name in enumerate(self.feature_names)}
+        for i, rule in enumerate(rules):
+            match = rule.get('match', 'all')
+            if match not in ('all', 'any'):
+                raise ValueError(f"Rule {rule.get('name', i)}: match must be 'all' or 'any'")
+
+            conditions = []
+            for condition in rule['conditions']:
+                field = condition['field']
+                operator = condition['operator']
+                if field not in columns:
+                    raise ValueError(f"Rule {rule.get('name', i)}: unknown field '{field}'")
+                if operator not in OPERATORS:
+                    raise ValueError(f"Rule {rule.get('name', i)}: unknown operator '{operator}'")
+                conditions.append((columns[field], OPERATORS[operator], float(condition['threshold'])))
+
+            self._compiled.append((match == 'all', conditions))
+            self.names.append(rule.get('name', f'rule_{i}'))
+            self.reasons.append(rule.get('reason', self.names[-1]))
+            self.confidences[i] = float(rule['confidence'])
+
+    @classmethod
+    def from_file(cls, path, feature_names):
+        with open(path) as f:
+            table = json.load(f)
+        return cls(table['rules'], feature_names, version=table.get('version'))
+
+    def evaluate(self, X):
+        """Return the index of the first matching rule per row (NO_RULE if none)"""
+        X = np.asarray(X, dtype=float)
+        matched = np.full(len(X), NO_RULE, dtype=int)
+        unmatched = np.ones(len(X), dtype=bool)
+
+        for index, (require_all, conditions) in enumerate(self._compiled):
+            column, op, threshold = conditions[0]
+            mask = op(X[:, column], threshold)
+            for column, op, threshold in conditions[1:]:
+                if require_all:
+                    mask &= op(X[:, column], threshold)
+                else:
+                    mask |= op(X[:, column], threshold)
+
+            hits = mask & unmatched
+            matched[hits] = index
+            unmatched &= ~hits
+            if not unmatched.any():
+                break
+
+        return matched
+
+    def reason(self, index, row):
+        """Format the reason for rule `index` with the values from one row"""
+        template = self.reasons[index]
+        try:
+            return template.format(**dict(zip(self.feature_names, (float(v) for v in row))))
+        except (KeyError, IndexError, ValueError):
+            return template
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'rules': [
+                {**rule, 'name': self.names[i]} for i, rule in enumerate(self.rules)
+            ]
+        }
+
+
+class HotRuleTable:
+    """RuleTable that reloads itself when the rule file changes on disk
+
+    The file's mtime is checked at most once per check_interval seconds.  A
+    file that fails to parse or compile is reported and the previous table
+    stays active.
+    """
+
+    def __init__(self, path, feature_names, check_interval=2.0):
+        self.path = path
+        self.feature_names = feature_names
+        self.check_interval = check_interval
+        self.loaded_at = None
+        self.last_error = None
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.table = RuleTable.from_file(path, feature_names)
+        self._mtime = os.path.getmtime(path)
+        self.loaded_at = time.time()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            with self._lock:
+                if now - self._checked >= self.check_interval:
+                    self._checked = now
+                    self._reload_if_changed()
+        return self.table
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            self.last_error = str(e)
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self.table = RuleTable.from_file(self.path, self.feature_names)
+            self.loaded_at = time.time()
+            self.last_error = None
+            print(f"✅ Detection rules reloaded from {self.path}")
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠ Failed to reload detection rules: {e}")
+        self._mtime = mtime
@@ -0,0 +1,254 @@
+# utils/scoring.py
+import numpy as np
+
+from utils.attributions import Attributions, TreeAttributions, through_pca
+from utils.categories import signature_columns, signatures
+from utils.early_exit import EarlyExitForest
+from utils.rule_engine import NO_RULE
+
+# With two classes normal_prob == 1 - attack_prob, so decide_attack() is
+# attack_prob > 0.05: the 0.15 branch is implied by the 0.05 one
+ATTACK_THRESHOLD = 0.05
+
+WALK_MAX_ROWS = 1000
+
+
+def decide_attack(attack_prob, normal_prob):
+    """Vectorized form of the AGGRESSIVE ATTACK DETECTION thresholds"""
+    attack_prob = np.asarray(attack_prob)
+    normal_prob = np.asarray(normal_prob)
+    return ((attack_prob > 0.15) | ((attack_prob > 0.05) & (normal_prob < 0.95))).astype(int)
+
+
+def attack_types(X, feature_names):
+    """Attack type per raw feature row from the signature table in utils/categories"""
+    return signatures(signature_columns(X, feature_names))[0]
+
+
+def risk_levels(prediction, confidence, attack_pct, normal_pct):
+    """Vectorized prediction_label / risk_level used by the prediction endpoints"""
+    attack = np.asarray(prediction) == 1
+    conditions = [
+        attack & ((attack_pct > 80) | (confidence > 80)),
+        attack & ((attack_pct > 60) | (confidence > 60)),
+        attack & ((attack_pct > 40) | (confidence > 40)),
+        attack,
+        normal_pct > 95,
+        normal_pct > 80,
+    ]
+    labels = np.select(conditions, ['CRITICAL Attack', 'HIGH Attack', 'MEDIUM Attack',
+                                    'Suspicious Activity', 'Normal', 'Likely Normal'], 'Uncertain')
+    levels = np.select(conditions, ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'NORMAL', 'LOW'], 'MONITOR')
+    return labels, levels
+
+
+RULE_PROBABILITY_MODES = ('rule', 'model')
+
+
+class BatchScore:
+    """Vectorized scoring result for N rows
+
+    Rows matched by a detection rule are classified without running the
+    model; their probabilities are derived from the rule confidence.  The
+    model probabilities for those rows are only computed if a caller asks
+    for them through model_probabilities().
+    """
+
+    def __init__(self, pipeline, X, prediction, confidence, attack_prob, normal_prob,
+                 rule_index, rules, model_proba, early_exit=None, model_rows=None, categories=None):
+        self.pipeline = pipeline
+        self.X = X
+        self.prediction = prediction
+        self.confidence = confidence
+        self.attack_prob = attack_prob
+        self.normal_prob = normal_prob
+        self.rule_index = rule_index
+        self.rules = rules
+        self._model_proba = model_proba
+        # utils/categories.CategoryScore: attack type, category and
+        # category probabilities per row
+        self.categories = categories
+        # Early-exit scoring: attack probabilities are estimates inside
+        # [attack_low, attack_high]; trees_evaluated is 0 for rows the
+        # forest did not score
+        self.early_exit = early_exit is not None
+        if self.early_exit:
+            self.attack_low = np.full(len(X), np.nan)
+            self.attack_high = np.full(len(X), np.nan)
+            self.trees_evaluated = np.zeros(len(X), dtype=np.int32)
+            self.attack_low[model_rows] = early_exit.attack_low
+            self.attack_high[model_rows] = early_exit.attack_high
+            self.trees_evaluated[model_rows] = early_exit.trees_evaluated
+
+    def __len__(self):
+        return len(self.prediction)
+
+    @property
+    def rule_matched(self):
+        return self.rule_index != NO_RULE
+
+    def probabilities(self, i):
+        """[normal, attack] probabilities for row i (as predict_proba orders them)"""
+        return np.array([self.normal_prob[i], self.attack_prob[i]])
+
+    def attack_reasons(self, i):
+        if self.rule_index[i] == NO_RULE:
+            return []
+        return [self.rules.reason(self.rule_index[i], self.X[i])]
+
+    def detection_method(self, i):
+        return 'Manual Rules' if self.rule_index[i] != NO_RULE else 'ML Model'
+
+    def attack_bounds(self, i):
+        """(low, high) bounds of the exact forest attack probability for row i"""
+        return float(self.attack_low[i]), float(self.attack_high[i])
+
+    def explain(self, rows):
+        """Forest attributions (utils/attributions.py) for the given row indices"""
+        return self.pipeline.explain(self.X[rows])
+
+    def model_probabilities(self):
+        """Model [normal, attack] probabilities for every row, computed lazily
+
+        Under early-exit scoring, rows scored by the forest hold estimates.
+        """
+        missing = np.isnan(self._model_proba[:, 0])
+        if missing.any():
+            self._model_proba[missing] = self.pipeline.model_proba(self.X[missing])
+        return self._model_proba
+
+
+class ScoringPipeline:
+    """Rules -> normalization -> scaler -> PCA -> forest, vectorized over rows"""
+
+    def __init__(self, forest, scaler, pca, feature_columns, feature_mapping,
+                 norm_factors, input_features, rules, rule_probabilities='rule',
+                 forest_eval='exact', categorizer=None):
+        self.forest = forest
+        self.forest_eval = forest_eval
+        self.forest_walk = EarlyExitForest(forest, ATTACK_THRESHOLD)
+        self.explainer = TreeAttributions(forest)
+        self.scaler = scaler
+        self.pca = pca
+        self.feature_columns = feature_columns
+        self.input_features = list(input_features)
+        self.rules = rules
+        if rule_probabilities not in RULE_PROBABILITY_MODES:
+            raise ValueError(f"rule_probabilities must be one of {RULE_PROBABILITY_MODES}, "
+                             f"got {rule_probabilities!r}")
+        self.rule_probabilities = rule_probabilities
+        self.categorizer = categorizer
+
+        columns = {name: i for i, name in enumerate(feature_columns)}
+        self._model_columns = np.array([columns[feature_mapping[f]] for f in self.input_features])
+        self._norm_factors = np.array([norm_factors.get(f, 0.0) for f in self.input_features])
+
+    def to_matrix(self, records):
+        """Stack feature dicts into an N x len(input_features) float matrix"""
+        X = np.empty((len(records), len(self.input_features)))
+        for i, record in enumerate(records):
+            for j, feature in enumerate(self.input_features):
+                try:
+                    X[i, j] = float(record.get(feature, 0.0))
+                except (TypeError, ValueError):
+                    X[i, j] = 0.0
+        return X
+
+    def model_space(self, X):
+        """Normalize raw inputs and place them in the model's feature columns"""
+        sample = np.zeros((len(X), len(self.feature_columns)))
+        sample[:, self._model_columns] = np.clip(X * self._norm_factors, -5.0, 5.0)
+        return sample
+
+    def scaled_inputs(self, X):
+        """The input features' model columns in the scaler's units (normal_mean.pkl's space)"""
+        columns = self._model_columns
+        return ((np.clip(X * self._norm_factors, -5.0, 5.0) - self.scaler.mean_[columns]) /
+                self.scaler.scale_[columns])
+
+    def transform(self, X):
+        """Scaled and PCA-projected model inputs for raw rows"""
+        scaled = (self.model_space(X) - self.scaler.mean_) / self.scaler.scale_
+        return self.pca.transform(scaled)
+
+    def explain(self, X):
+        """Attributions of the forest attack probability to the raw input features"""
+        scaled = (self.model_space(X) - self.scaler.mean_) / self.scaler.scale_
+        centered = scaled - self.pca.mean_
+        columns = through_pca(self.explainer.explain(self.pca.transform(scaled)), centered, self.pca)
+        inputs = columns[:, self._model_columns]
+        return Attributions(self.input_features, self.explainer.base, inputs,
+                            columns.sum(axis=1) - inputs.sum(axis=1))
+
+    def model_proba(self, X):
+        """Forest [normal, attack] probabilities for raw rows"""
+        if len(X) == 0:
+            return np.empty((0, 2))
+        return self.forest_proba(self.transform(X))
+
+    def forest_proba(self, Z):
+        """Forest [normal, attack] probabilities for transformed rows"""
+        # Walking the trees directly gives the same probabilities, to within
+        # float rounding, without predict_proba's per-tree validation and
+        # joblib dispatch; only large batches on a multi-threaded forest
+        # still go through predict_proba
+        if len(Z) <= WALK_MAX_ROWS or self.forest.n_jobs in (None, 1):
+            return self.forest_walk.predict_proba(Z)
+        return self.forest.predict_proba(Z)
+
+    def score(self, X, rule_probabilities=None, exact=None):
+        """Score a raw N x len(input_features) matrix
+
+        exact=False stops evaluating trees once a row's decision is certain
+        (see utils/early_exit.py); the default follows forest_eval.
+        """
+        X = np.asarray(X, dtype=float)
+        n = len(X)
+        mode = rule_probabilities or self.rule_probabilities
+        if mode not in RULE_PROBABILITY_MODES:
+            raise ValueError(f"rule_probabilities must be one of {RULE_PROBABILITY_MODES}, got {mode!r}")
+        if exact is None:
+            exact = self.forest_eval != 'early'
+        rules = self.rules.current()
+
+        rule_index = rules.evaluate(X)
+        matched = rule_index != NO_RULE
+        model_rows = ~matched if mode == 'rule' else np.ones(n, dtype=bool)
+
+        # A category model reads the same PCA inputs: transform every row once
+        Z = self.transform(X) if self.categorizer and self.categorizer.needs_inputs and n else None
+
+        model_proba = np.full((n, 2), np.nan)
+        early_exit = None
+        if exact:
+            if Z is None:
+                model_proba[model_rows] = self.model_proba(X[model_rows])
+            elif model_rows.any():
+                model_proba[model_rows] = self.forest_proba(Z[model_rows])
+        elif model_rows.any():
+            early_exit = self.forest_walk.decide(self.transform(X[model_rows]) if Z is None else Z[model_rows])
+            model_proba[model_rows, 0] = 1.0 - early_exit.estimate
+            model_proba[model_rows, 1] = early_exit.estimate
+
+        attack_prob = model_proba[:, 1].copy()
+        normal_prob = model_proba[:, 0].copy()
+        prediction = np.zeros(n, dtype=int)
+        confidence = np.zeros(n)
+
+        ml = ~matched
+        prediction[ml] = decide_attack(attack_prob[ml], normal_prob[ml])
+        confidence[ml] = np.where(prediction[ml] == 1,
+                                  np.maximum(attack_prob[ml] * 100, 60.0),
+                                  normal_prob[ml] * 100)
+
+        prediction[matched] = 1
+        confidence[matched] = rules.confidences[rule_index[matched]]
+        if mode == 'rule':
+            attack_prob[matched] = confidence[matched] / 100
+            normal_prob[matched] = 1.0 - attack_prob[matched]
+
+        categories = None
+        if self.categorizer:
+            categories = self.categorizer.categorize(X, Z, prediction, attack_prob, normal_prob)
+        return BatchScore(self, X, prediction, confidence, attack_prob, normal_prob,
+                          rule_index, rules, model_proba, early_exit, model_rows, categories)
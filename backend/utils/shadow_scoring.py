@@ -0,0 +1,275 @@
+# utils/shadow_scoring.py
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Alternate model generations that can be scored against the served model.
+# A 'served' entry names a forest in the served artifact format (a file in
+# models/improved_model, as exported by compress_model.py and accepted by
+# NIDS_MODEL_FILE) and reuses the served preprocessing: NORM_FACTORS ->
+# scaler_improved -> pca_improved. A 'raw' entry lists its own artifacts
+# (relative to the backend directory) and the steps applied to the raw
+# 11-feature input vector. Shadow models must predict both classes (0 normal,
+# 1 attack): rf_kdd_10percent.pkl was fitted on attack rows only
+# (classes_ == [1]), so it is rejected at load time.
+SHADOW_MODEL_SPECS = {
+    'distill10x8': {
+        'kind': 'served',
+        'forest': 'rf_distill10x8.pkl',
+    },
+    'kdd_10percent': {
+        'kind': 'raw',
+        'model': 'models/rf_kdd_10percent.pkl',
+        'steps': ['models/scaler_kdd_10percent.pkl'],
+    },
+}
+
+SERVED_MODEL_DIR = os.path.join('models', 'improved_model')
+
+
+class ShadowModel:
+    """Alternate model scored on raw input vectors off the hot path"""
+
+    def __init__(self, name, estimator, steps=None, transform=None):
+        self.name = name
+        self.estimator = estimator
+        self.steps = steps or []
+        self.transform = transform
+
+        # Shadow scoring must not compete with the served forest for cores
+        if hasattr(self.estimator, 'n_jobs'):
+            self.estimator.n_jobs = 1
+        if hasattr(self.estimator, 'verbose'):
+            self.estimator.verbose = 0
+
+        classes = np.asarray(getattr(self.estimator, 'classes_', [0, 1])).tolist()
+        if 0 not in classes or 1 not in classes:
+            raise ValueError(f"shadow model {name} predicts classes {classes}, needs both 0 and 1")
+        self.attack_index = classes.index(1)
+
+    @classmethod
+    def from_spec(cls, name, spec, base_dir, transform=None):
+        """Load a shadow model from a SHADOW_MODEL_SPECS entry
+
+        transform maps raw rows to the served model inputs; 'served' entries need it.
+        """
+        if spec.get('kind', 'raw') == 'served':
+            if transform is None:
+                raise ValueError(f"shadow model {name} needs the served preprocessing")
+            estimator = joblib.load(os.path.join(base_dir, SERVED_MODEL_DIR, spec['forest']))
+            return cls(name, estimator, transform=transform)
+        estimator = joblib.load(os.path.join(base_dir, spec['model']))
+        steps = [joblib.load(os.path.join(base_dir, path)) for path in spec.get('steps', [])]
+        return cls(name, estimator, steps)
+
+    def attack_probability(self, raw_matrix):
+        """Return the attack probability for every row of raw_matrix"""
+        if self.transform is not None:
+            return self.estimator.predict_proba(self.transform(raw_matrix))[:, self.attack_index]
+        values = raw_matrix
+        for step in self.steps:
+            if hasattr(step, 'feature_names_in_'):
+                values = pd.DataFrame(values, columns=step.feature_names_in_)
+            values = step.transform(values)
+        return self.estimator.predict_proba(values)[:, self.attack_index]
+
+
+class ShadowStats:
+    """Running agreement, score delta and latency figures for one shadow model"""
+
+    def __init__(self, name, latency_window=1000):
+        self.name = name
+        self.scored = 0
+        self.agreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.flipped_to_attack = 0
+        self.flipped_to_normal = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=latency_window)
+
+    def record(self, primary_decision, shadow_decision, delta, elapsed_ms):
+        n = len(delta)
+        self.scored += n
+        self.agreements += int(np.count_nonzero(primary_decision == shadow_decision))
+        self.flipped_to_attack += int(np.count_nonzero((primary_decision == 0) & (shadow_decision == 1)))
+        self.flipped_to_normal += int(np.count_nonzero((primary_decision == 1) & (shadow_decision == 0)))
+        self.delta_sum += float(delta.sum())
+        abs_delta = np.abs(delta)
+        self.abs_delta_sum += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        self.latencies_ms.append(elapsed_ms / n)
+
+    def summary(self):
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'model': self.name,
+            'scored': self.scored,
+            'agreement_rate': round(self.agreements / self.scored * 100, 2) if self.scored else None,
+            'flipped_to_attack': self.flipped_to_attack,
+            'flipped_to_normal': self.flipped_to_normal,
+            'mean_score_delta': round(self.delta_sum / self.scored * 100, 3) if self.scored else None,
+            'mean_abs_score_delta': round(self.abs_delta_sum / self.scored * 100, 3) if self.scored else None,
+            'max_abs_score_delta': round(self.max_abs_delta * 100, 3),
+            'latency_ms_per_row': {
+                'p50': round(float(np.percentile(latencies, 50)), 4),
+                'p95': round(float(np.percentile(latencies, 95)), 4),
+                'max': round(float(latencies.max()), 4)
+            },
+            'errors': self.errors
+        }
+
+
+class ShadowScorer:
+    """Hands a sample of live feature vectors to a background worker pool
+
+    submit() is called on the request path and never blocks: rows that are
+    not sampled return immediately, and sampled rows are dropped when the
+    queue is full.  Workers drain the queue in small batches and score each
+    batch with every shadow model.
+    """
+
+    def __init__(self, models, decide, sample_rate=0.0, queue_size=10000,
+                 workers=1, batch_size=256):
+        self.models = models
+        self.decide = decide
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.worker_count = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {model.name: ShadowStats(model.name) for model in models}
+        self.stats_lock = threading.Lock()
+        self.submitted = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.workers = []
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 and bool(self.models)
+
+    def start(self):
+        """Start the worker threads (call once per process)"""
+        if not self.enabled or self.workers:
+            return
+        self._stop.clear()
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._run, name=f'shadow-worker-{i}', daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        self._stop.set()
+        for worker in self.workers:
+            worker.join(timeout=1.0)
+        self.workers = []
+
+    def submit(self, raw_vector, primary_attack_prob, primary_prediction):
+        """Offer one scored row to the shadow pool without blocking"""
+        if not self.workers:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._count(1, 0, 0)
+            return False
+        try:
+            self.queue.put_nowait((raw_vector, primary_attack_prob, primary_prediction))
+        except queue.Full:
+            self._count(1, 0, 1)
+            return False
+        self._count(1, 1, 0)
+        return True
+
+    def submit_batch(self, raw_matrix, primary_attack_prob, primary_prediction):
+        """Offer a sample of a scored batch to the shadow pool without blocking"""
+        if not self.workers or len(raw_matrix) == 0:
+            return 0
+        rows = np.flatnonzero(np.random.random(len(raw_matrix)) < self.sample_rate)
+        queued = 0
+        for i in rows:
+            try:
+                self.queue.put_nowait((raw_matrix[i], float(primary_attack_prob[i]), int(primary_prediction[i])))
+            except queue.Full:
+                break
+            queued += 1
+        self._count(len(raw_matrix), queued, len(rows) - queued)
+        return queued
+
+    def _count(self, submitted, sampled, dropped):
+        # Request threads submit concurrently; += on a shared int is not atomic
+        with self.stats_lock:
+            self.submitted += submitted
+            self.sampled += sampled
+            self.dropped += dropped
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            raw_matrix = np.vstack([item[0] for item in batch])
+            primary_prob = np.array([item[1] for item in batch], dtype=float)
+            primary_decision = np.array([item[2] for item in batch], dtype=int)
+
+            for model in self.models:
+                try:
+                    started = time.perf_counter()
+                    shadow_prob = model.attack_probability(raw_matrix)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    shadow_decision = self.decide(shadow_prob, 1.0 - shadow_prob)
+                    with self.stats_lock:
+                        self.stats[model.name].record(primary_decision, shadow_decision,
+                                                      shadow_prob - primary_prob, elapsed_ms)
+                except Exception as e:
+                    print(f"⚠ Shadow model {model.name} failed: {e}")
+                    with self.stats_lock:
+                        self.stats[model.name].errors += len(batch)
+
+    def summary(self):
+        with self.stats_lock:
+            models = [stats.summary() for stats in self.stats.values()]
+            submitted, sampled, dropped = self.submitted, self.sampled, self.dropped
+        return {
+            'enabled': self.enabled,
+            'running': bool(self.workers),
+            'sample_rate': self.sample_rate,
+            'submitted': submitted,
+            'sampled': sampled,
+            'dropped': dropped,
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'models': models
+        }
+
+
+def load_shadow_models(names, base_dir, transform=None):
+    """Load the named shadow models, skipping any that fail to load"""
+    models = []
+    for name in names:
+        spec = SHADOW_MODEL_SPECS.get(name)
+        if spec is None:
+            print(f"⚠ Unknown shadow model: {name}")
+            continue
+        try:
+            models.append(ShadowModel.from_spec(name, spec, base_dir, transform))
+            print(f"✅ Shadow model loaded: {name}")
+        except Exception as e:
+            print(f"⚠ Failed to load shadow model {name}: {e}")
+    return models
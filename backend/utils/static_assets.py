@@ -0,0 +1,185 @@
+# utils/static_assets.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # Brotli precompression is optional
+    brotli = None
+
+# Content-hashed build outputs (main.52e128cd.js, 453.57b6d368.chunk.js, ...)
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.(chunk\.)?[a-z0-9]+(\.map)?$')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/manifest+json', 'image/svg+xml', 'image/x-icon',
+                      'image/vnd.microsoft.icon')
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+CACHE_DEFAULT = 'public, max-age=3600'
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, key, data, mimetype, cache_control, min_compress_size):
+        self.key = key
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        digest = hashlib.blake2b(data, digest_size=10).hexdigest()
+        self.variants = {None: (data, f'"{digest}"')}
+
+        if len(data) >= min_compress_size and mimetype.startswith(COMPRESSIBLE_TYPES):
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                self.variants['gzip'] = (gz, f'"{digest}-gz"')
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                if len(br) < len(data):
+                    self.variants['br'] = (br, f'"{digest}-br"')
+
+    @property
+    def size(self):
+        return len(self.variants[None][0])
+
+
+def accepted_encodings(header):
+    """Encodings the client accepts, from an Accept-Encoding header"""
+    accepted = set()
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+
+class StaticAssetIndex:
+    """In-memory index of the React build, served with negotiation and ETags
+
+    The folder is walked once at startup; requests are answered from memory
+    without touching the filesystem. With reload=True the folder's mtimes
+    are re-checked at most once per check_interval seconds and the index is
+    rebuilt when anything changed (for development).
+    """
+
+    def __init__(self, root, reload=False, check_interval=1.0, min_compress_size=512):
+        self.root = root
+        self.reload = reload
+        self.check_interval = check_interval
+        self.min_compress_size = min_compress_size
+        self.assets = {}
+        self.index_html = None
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.build()
+
+    def _walk(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, self.root).replace(os.sep, '/'), path
+
+    def _current_signature(self):
+        signature = []
+        for key, path in self._walk():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((key, stat.st_mtime_ns, stat.st_size))
+        return sorted(signature)
+
+    def build(self):
+        """(Re)load every file under root into memory"""
+        started = time.perf_counter()
+        assets = {}
+        for key, path in self._walk():
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"⚠ Could not read static file {key}: {e}")
+                continue
+            mimetype = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+            if key == 'index.html':
+                cache_control = CACHE_REVALIDATE
+            elif HASHED_NAME.search(key):
+                cache_control = CACHE_IMMUTABLE
+            else:
+                cache_control = CACHE_DEFAULT
+            assets[key] = StaticAsset(key, data, mimetype, cache_control, self.min_compress_size)
+
+        self.assets = assets
+        self.index_html = assets.get('index.html')
+        self._signature = self._current_signature() if self.reload else None
+        total = sum(asset.size for asset in assets.values())
+        print(f"✅ Static index: {len(assets)} files, {total / 1024:.0f} KB "
+              f"({'gzip+br' if brotli else 'gzip'}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            signature = self._current_signature()
+            if signature != self._signature:
+                print("🔄 Static folder changed, rebuilding index")
+                self.build()
+
+    def get(self, key):
+        if self.reload:
+            self._reload_if_changed()
+        return self.assets.get(key)
+
+    def get_index(self):
+        if self.reload:
+            self._reload_if_changed()
+        return self.index_html
+
+    def response(self, asset, request):
+        """Build the response for an asset, honouring If-None-Match and Accept-Encoding"""
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and candidate in accepted:
+                encoding = candidate
+                break
+        data, etag = asset.variants[encoding]
+
+        headers = {
+            'ETag': etag,
+            'Cache-Control': asset.cache_control,
+        }
+        if len(asset.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or
+                              etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))):
+            return Response(status=304, headers=headers)
+
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(data, mimetype=asset.mimetype, headers=headers)
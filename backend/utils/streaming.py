@@ -0,0 +1,77 @@
+# utils/streaming.py
+#
+# Chunked JSON / NDJSON response bodies built from row batches.
+#
+# Query endpoints used to fetchall() and jsonify() the whole result. These
+# helpers take the batches yielded by PredictionStore.iter_batches() and
+# emit one chunk per batch instead, so a worker holds a single batch at a
+# time. When the client disconnects the server closes the body generator,
+# which closes the batch generator and with it the database cursor.
+from utils.encoders import dumps_json
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson')
+
+
+def wants_ndjson(request):
+    """?format=ndjson, or an Accept header that prefers NDJSON over JSON"""
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(('application/json',) + NDJSON_TYPES)
+    return best in NDJSON_TYPES
+
+
+def primed(batches):
+    """Run the query up to its first batch now, so connection and SQL errors
+    surface before a 200 status is sent; returns an equivalent generator"""
+    first = next(batches, None)
+    return _resume(first, batches)
+
+
+def _resume(first, batches):
+    try:
+        if first is not None:
+            yield first
+            yield from batches
+    finally:
+        batches.close()
+
+
+def json_array_body(batches, key, format_row=None, summary=None):
+    """{"<key>": [rows...], "count": n, ...summary(), "success": true} in chunks
+
+    `success` comes last: if the query fails mid-stream the body still ends
+    as valid JSON, with "success": false and the error.
+    """
+    count = 0
+    try:
+        yield f'{{"{key}":['.encode()
+        for rows in batches:
+            if format_row:
+                rows = [format_row(row) for row in rows]
+            if not rows:
+                continue
+            yield (b',' if count else b'') + b','.join(dumps_json(row) for row in rows)
+            count += len(rows)
+        tail = {'count': count}
+        if summary:
+            tail.update(summary())
+        tail['success'] = True
+    except Exception as e:
+        tail = {'count': count, 'success': False, 'error': str(e)}
+    finally:
+        batches.close()
+    yield b'],' + dumps_json(tail)[1:] + b'\n'
+
+
+def ndjson_body(batches, format_row=None):
+    """One JSON document per line; a failure mid-stream ends with an {"error": ...} line"""
+    try:
+        for rows in batches:
+            if format_row:
+                rows = [format_row(row) for row in rows]
+            if rows:
+                yield b'\n'.join(dumps_json(row) for row in rows) + b'\n'
+    except Exception as e:
+        yield dumps_json({'error': str(e)}) + b'\n'
+    finally:
+        batches.close()
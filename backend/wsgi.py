@@ -0,0 +1,8 @@
+# wsgi.py - WSGI entry point for pre-fork servers
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# gunicorn.conf.py preloads this module in the master so the models are
+# loaded once and shared copy-on-write; each worker then calls
+# app.init_worker() to open its own database pool and background threads.
+from app import app as application